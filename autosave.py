@@ -0,0 +1,284 @@
+"""
+Incremental autosave of the session to a local project directory.
+The session is split into sections (fluids, survey, heat tables, tubulars, completions, nodal
+results and the workspace settings). Each save fingerprints every section and appends only the
+ones that changed since the last save to an append-only journal, so a save costs time in
+proportion to the edit rather than to the project. When the journal has grown past the size of
+the last full snapshot (or past a record limit) it is compacted: the whole state is written as a
+.wdp project snapshot and the journal starts over.
+
+The directory holds:
+- snapshot.wdp: the last compacted state (project_format), with the journal sequence it covers
+- journal.log: records of <4-byte header length><JSON header><payload>, the payload being the
+  section's values as a .wdp project. Every record is flushed and fsynced when written.
+
+Recovery loads the snapshot and replays the journal records written after it, stopping at the
+first torn or corrupt record, so a crash loses at most the edits since the last save.
+"""
+import hashlib
+import io
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from project_format import load_project, project_bytes, save_project
+
+
+# Session state keys saved together; keys not listed here go with 'workspace'
+AUTOSAVE_SECTIONS = {
+    'fluids': ('fluids', 'selected_fluid', 'new_fluid_mode'),
+    'survey': ('survey_data_saved', 'current_survey_type', 'survey_df', 'survey_type', 'bottom_depth',
+               'wellhead_depth', 'depth_reference'),
+    'heat': ('MD_heat', 'TVD_heat'),
+    'tubulars': ('Tubing', 'casing_liners', 'casing_edit_complete', 'tubing_edit_complete'),
+    'completions': ('Completions', 'completions', 'selected_completion', 'new_completion_mode'),
+    'nodal': ('nodal_data',),
+    'workspace': (),
+}
+
+SNAPSHOT_NAME = 'snapshot.wdp'
+JOURNAL_NAME = 'journal.log'
+
+# Compact once the journal holds this many records, even if it is smaller than the snapshot
+MAX_JOURNAL_RECORDS = 200
+# Journal size below which compaction is never worth it
+MIN_COMPACT_BYTES = 1 << 20
+
+# Fast compression for journal records; snapshots use the project default
+_RECORD_COMPRESSLEVEL = 1
+_SEQ_KEY = '__journal_seq__'
+_HEADER_LENGTH = struct.Struct('>I')
+
+
+def project_directory(root, name):
+    """
+    Directory of the autosaved project `name` under `root`. Raises ValueError for names that
+    are empty or would resolve outside `root` (absolute paths, '..', links out of it).
+    """
+    name = name.strip()
+    if not name:
+        raise ValueError("Enter a project name")
+    root = os.path.realpath(root)
+    directory = os.path.realpath(os.path.join(root, name))
+    if directory == root or os.path.commonpath([root, directory]) != root:
+        raise ValueError(f"Project name must be a folder inside the autosave area, not {name!r}")
+    return directory
+def split_sections(state):
+    """{section: {key: value}} for a session state dict"""
+    assigned = {key for keys in AUTOSAVE_SECTIONS.values() for key in keys}
+    sections = {name: {key: state[key] for key in keys if key in state} for name, keys in AUTOSAVE_SECTIONS.items()}
+    sections['workspace'].update({key: value for key, value in state.items() if key not in assigned})
+    return sections
+def _update_digest(digest, value):
+    """
+    Feed a session value to a hash. Tables and arrays are hashed from their column buffers, so
+    fingerprinting a section stays cheap next to encoding it.
+    """
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'T' + repr((list(map(str, value.columns)), value.shape)).encode())
+        for _, column in value.items():
+            _update_digest(digest, column.to_numpy())
+    elif isinstance(value, np.ndarray):
+        digest.update(b'A' + repr((value.shape, str(value.dtype))).encode())
+        if value.dtype.kind in 'biufc':
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(pd.util.hash_array(value.ravel().astype(object)).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'D%d' % len(value))
+        for key, item in value.items():
+            digest.update(repr(key).encode())
+            _update_digest(digest, item)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'L%d' % len(value))
+        for item in value:
+            _update_digest(digest, item)
+    else:
+        digest.update(b'V' + repr(value).encode())
+def section_fingerprint(values):
+    """Hash of a section's values that changes whenever any value does"""
+    digest = hashlib.sha256()
+    _update_digest(digest, values)
+    return digest.hexdigest()
+def _fingerprint(name, values, pending):
+    """Fingerprint of a section, or of its load token while it is pending"""
+    fingerprint = section_fingerprint(values)
+    if name in pending:
+        return f'{pending[name][0]}:{fingerprint}'
+    return fingerprint
+def _read_records(path):
+    """
+    Valid journal records as (header, payload) pairs, and the offset where the valid part of the
+    file ends. Reading stops at the first truncated or corrupt record.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records, 0
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    while offset + _HEADER_LENGTH.size <= len(data):
+        (header_length,) = _HEADER_LENGTH.unpack_from(data, offset)
+        start = offset + _HEADER_LENGTH.size
+        try:
+            header = json.loads(data[start:start + header_length])
+            payload = data[start + header_length:start + header_length + header['size']]
+        except (ValueError, KeyError, TypeError):
+            break
+        if len(payload) != header['size'] or zlib.crc32(payload) != header['crc32']:
+            break
+        records.append((header, payload))
+        offset = start + header_length + header['size']
+    return records, offset
+class ProjectJournal:
+    """Append-only, per-section autosave journal with snapshot compaction in `directory`"""
+    def __init__(self, directory, max_records=MAX_JOURNAL_RECORDS, min_compact_bytes=MIN_COMPACT_BYTES):
+        self.directory = directory
+        self.max_records = max_records
+        self.min_compact_bytes = min_compact_bytes
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self._fingerprints = {}
+        self._seq = 0
+        self._records = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+        self.last_save = None
+
+    def exists(self):
+        """True if the directory holds an autosaved project"""
+        return os.path.exists(self.snapshot_path) or \
+            (os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0)
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return {}, 0
+        state = load_project(self.snapshot_path)
+        return state, int(state.pop(_SEQ_KEY, 0))
+
+    def recover(self):
+        """
+        Autosaved state: the snapshot with the journaled sections written after it applied in order.
+        The journal is cut back to its last valid record and later saves continue from this state.
+        """
+        state, snapshot_seq = self._load_snapshot()
+        records, valid_bytes = _read_records(self.journal_path)
+        self._seq = snapshot_seq
+        self._records = 0
+        for header, payload in records:
+            if header['seq'] <= snapshot_seq:
+                continue
+            state.update(load_project(io.BytesIO(payload)))
+            self._seq = header['seq']
+            self._records += 1
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > valid_bytes:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_bytes)
+        self._journal_bytes = valid_bytes
+        self._snapshot_bytes = os.path.getsize(self.snapshot_path) if os.path.exists(self.snapshot_path) else 0
+        self._fingerprints = {name: section_fingerprint(values)
+                              for name, values in split_sections(state).items()}
+        return state
+
+    def start_new(self, state):
+        """Discard what the directory holds and start it over from `state`"""
+        self._fingerprints = {}
+        self._seq = 0
+        self.compact(state)
+
+    def _append(self, section, values):
+        payload = project_bytes(values, compresslevel=_RECORD_COMPRESSLEVEL)
+        self._seq += 1
+        header = json.dumps({
+            'seq': self._seq,
+            'section': section,
+            'size': len(payload),
+            'crc32': zlib.crc32(payload),
+            'saved_at': datetime.now().isoformat(timespec='seconds')
+        }).encode()
+        record = _HEADER_LENGTH.pack(len(header)) + header + payload
+        with open(self.journal_path, 'ab') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self._records += 1
+        self._journal_bytes += len(record)
+        return len(record)
+
+    def save(self, state, pending=None):
+        """
+        Journal the sections of `state` that changed since the last save, compacting when the
+        journal has outgrown the snapshot. Returns {'sections', 'bytes', 'wall_s', 'compacted'}.
+        `pending` maps sections of a lazily loaded project that no tool has read yet to
+        (token, load): their keys in `state` are placeholders, so the section is identified by
+        its token and load() is only called, without keeping the result, to journal it once.
+        """
+        start = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        pending = pending or {}
+        written = []
+        size = 0
+        for name, values in split_sections(state).items():
+            fingerprint = _fingerprint(name, values, pending)
+            if self._fingerprints.get(name) == fingerprint:
+                continue
+            if name in pending:
+                values = dict(values, **pending[name][1]())
+            size += self._append(name, values)
+            self._fingerprints[name] = fingerprint
+            written.append(name)
+        compacted = written and (self._records >= self.max_records or
+                                 self._journal_bytes > max(self._snapshot_bytes, self.min_compact_bytes))
+        if compacted:
+            self.compact(state, pending)
+        self.last_save = {
+            'sections': written,
+            'bytes': size,
+            'wall_s': time.perf_counter() - start,
+            'compacted': bool(compacted),
+            'time': datetime.now().strftime("%H:%M:%S")
+        }
+        return self.last_save
+
+    def compact(self, state, pending=None):
+        """
+        Write the whole state as the snapshot and empty the journal. The snapshot is written to a
+        temporary file and renamed over the old one, so a crash leaves either snapshot intact.
+        Pending sections (see save) are loaded for the snapshot only.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        pending = pending or {}
+        fingerprints = {name: _fingerprint(name, values, pending) for name, values in split_sections(state).items()}
+        snapshot = dict(state, **{_SEQ_KEY: self._seq})
+        for _, load in pending.values():
+            snapshot.update(load())
+        temporary = self.snapshot_path + '.tmp'
+        with open(temporary, 'wb') as f:
+            save_project(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # Records up to self._seq are covered by the snapshot, so a crash before this truncation
+        # only leaves records that recovery skips
+        with open(self.journal_path, 'wb') as f:
+            os.fsync(f.fileno())
+        self._fingerprints = fingerprints
+        self._records = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = os.path.getsize(self.snapshot_path)
+
+    def status(self):
+        """Journal and snapshot sizes for display"""
+        return {
+            'directory': self.directory,
+            'journal_records': self._records,
+            'journal_bytes': self._journal_bytes,
+            'snapshot_bytes': self._snapshot_bytes,
+            'last_save': self.last_save
+        }
@@ -0,0 +1,384 @@
+"""
+Headless nodal analysis over session files saved by the app (save_session_state JSON or .wdp projects).
+Each file is rebuilt into its fluids, completions, Tubing and casing_liners tables and run through
+the same flow-path selection, nodal analysis and sensitivity code as the Nodal Analysis tab.
+Files are processed on a pool of worker processes and the results written as CSV or Parquet.
+run_field() analyses all completions of one session concurrently; the app's Field Run tab uses it.
+
+Example:
+    python batch_nodal.py sessions/ -o results --workers 16 --format parquet \
+        --sensitivity "Tubing ID" --range 1.0 4.0 0.25
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from nodal_analysis import select_flow_path, run_nodal_analysis, well_path_geometry
+from project_format import PROJECT_EXTENSION, is_project_file, load_project
+from sensitivity import TUBING_PARAMETERS, VALUE_DECIMALS, default_worker_count, iter_chunked, run_sensitivity
+from survey import MD_COLUMN, SURVEY_COLUMNS, TVD_COLUMN, compute_survey
+
+
+# Analysis settings used when neither the session nor the command line gives one (the app's defaults)
+DEFAULT_SETTINGS = {
+    'outlet_pressure': 100.0,
+    'min_flow_rate': 0.0,
+    'max_flow_rate': 5000.0,
+    'num_points': 100,
+    'completions': 'selected',
+    'sensitivity': None,
+    'sensitivity_range': None,
+}
+
+# Columns of the summary table, one row per analysed completion
+SUMMARY_COLUMNS = [
+    'file', 'completion', 'fluid', 'ipr_model', 'tubing', 'tubing_id_in', 'tubing_shoe_depth_ft',
+    'perforation_depth_ft', 'outlet_pressure_psi', 'reservoir_temp_f', 'q_op_stbd', 'p_op_psi',
+    'operating_point_converged', 'vlp_converged', 'vlp_iterations', 'warnings', 'error',
+]
+
+
+def load_session_file(path):
+    """
+    Session tables from a save_session_state JSON file or a .wdp binary project, with
+    DataFrames rebuilt the way load_session_state does.
+    """
+    if is_project_file(path):
+        data = load_project(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+    def table(key, columns):
+        if data.get(key) is not None:
+            return pd.DataFrame(data[key])
+        return pd.DataFrame(columns=columns)
+
+    return {
+        'fluids': data.get('fluids', {}),
+        'completions': data.get('completions', {}),
+        'survey_df': table('survey_df', []),
+        'survey_type': data.get('survey_type', "Vertical"),
+        'MD_heat': table('MD_heat', ['MD(ft)', 'Ambient Temperature']),
+        'TVD_heat': table('TVD_heat', ['TVD(ft)', 'Ambient Temperature']),
+        'Tubing': table('Tubing', ['Name', 'To MD', 'ID(in)', 'OD(in)', 'Wall thickness(in)', 'Roughness(in)']),
+        'casing_liners': table('casing_liners', ['Section type', 'Name', 'From MD', 'To MD', 'ID(in)', 'OD(in)',
+                                                 'Wall thickness(in)', 'Roughness(in)']),
+        'nodal_data': data.get('nodal_data', {}) or {},
+    }
+def completions_to_run(session, which):
+    """
+    Names of the completions to analyse: 'selected' (the Nodal Analysis selection, else every
+    active completion), 'active' or 'all'.
+    """
+    completions = session['completions']
+    selected = session['nodal_data'].get('well_configuration', {}).get('selected_completion')
+    if which == 'selected' and selected in completions:
+        return [selected]
+    if which == 'all':
+        return list(completions)
+    return [name for name, completion in completions.items() if completion['basic_info'].get('active', True)]
+def fluid_for_completion(session, completion_name, prefer_nodal_selection=True):
+    """
+    Fluid properties for a completion: the Nodal Analysis fluid (when the completion is the one
+    selected there and prefer_nodal_selection is set), the completion's assigned fluid, or the first fluid.
+    """
+    fluids = session['fluids']
+    nodal_data = session['nodal_data']
+    nodal_fluid = None
+    if prefer_nodal_selection and nodal_data.get('well_configuration', {}).get('selected_completion') == completion_name:
+        nodal_fluid = nodal_data.get('fluid_selection')
+    candidates = [
+        nodal_fluid,
+        (session['completions'][completion_name].get('fluid_model') or {}).get('selected_fluid'),
+        next(iter(fluids), None),
+    ]
+    for name in candidates:
+        if name in fluids:
+            return name, fluids[name]['properties']
+    raise ValueError(f"No fluid available for completion '{completion_name}'")
+def flow_path_for_completion(session, perforation_depth):
+    """
+    Tubing/casing flow path from the session's tubing table, or its manual tubing parameters.
+    Paths precomputed in session['flow_paths'] (keyed by perforation depth) are reused.
+    """
+    flow_paths = session.get('flow_paths')
+    if flow_paths and perforation_depth in flow_paths:
+        return flow_paths[perforation_depth]
+    well_configuration = session['nodal_data'].get('well_configuration', {})
+    if not session['Tubing'].empty:
+        return select_flow_path(session['Tubing'], session['casing_liners'], perforation_depth,
+                                well_configuration.get('selected_tubing'))
+    manual_params = well_configuration.get('manual_tubing_params')
+    if not manual_params:
+        raise ValueError("No tubing data or manual tubing parameters in session")
+    return select_flow_path(pd.DataFrame({
+        'Name': ['Manual Tubing'],
+        'To MD': [manual_params['length']],
+        'ID(in)': [manual_params['id']],
+        'OD(in)': [manual_params['od']],
+        'Roughness(in)': [manual_params['roughness']]
+    }), None, perforation_depth)
+def geometry_for_session(session):
+    """
+    Well path geometry (nodal_analysis.well_path_geometry) from the session's deviation survey,
+    or None for a vertical well. A geometry precomputed in session['well_geometry'] is reused.
+    """
+    if 'well_geometry' in session:
+        return session['well_geometry']
+    survey_type = session.get('survey_type', "Vertical")
+    if survey_type not in SURVEY_COLUMNS or session['survey_df'].empty:
+        return None
+    survey = compute_survey(session['survey_df'], survey_type)
+    return well_path_geometry(survey[MD_COLUMN], survey[TVD_COLUMN])
+def analyze_completion(session, name, settings, source=None):
+    """
+    Nodal analysis (and sensitivity, if configured) for one completion of a session.
+    Returns (summary row, sensitivity rows); a failure is reported in the row's error column.
+    """
+    row = {'file': source, 'completion': name}
+    sensitivity_rows = []
+    try:
+        completion_data = session['completions'][name]
+        fluid_name, fluid_data = fluid_for_completion(session, name, settings.get('prefer_nodal_selection', True))
+        perforation_depth = completion_data['basic_info']['middle_md']
+        flow_path = flow_path_for_completion(session, perforation_depth)
+
+        outlet_pressure = settings['outlet_pressure']
+        if outlet_pressure is None:
+            outlet_pressure = session['nodal_data'].get('outlet_pressure', DEFAULT_SETTINGS['outlet_pressure'])
+        reservoir_temp = completion_data['reservoir'].get('reservoir_temperature', 180.0)
+        flow_rates = np.linspace(settings['min_flow_rate'], settings['max_flow_rate'], settings['num_points'])
+
+        results = run_nodal_analysis(
+            flow_path['tubing_data'], flow_path['casing_data'], fluid_data, completion_data,
+            outlet_pressure, flow_rates, reservoir_temp, flow_path['tubing_shoe_depth'], perforation_depth,
+            geometry_for_session(session)
+        )
+        row.update({
+            'fluid': fluid_name,
+            'ipr_model': completion_data['basic_info'].get('ipr_model'),
+            'tubing': flow_path['tubing_data']['Name'].iloc[0],
+            'tubing_id_in': float(flow_path['tubing_data']['ID(in)'].iloc[0]),
+            'tubing_shoe_depth_ft': float(flow_path['tubing_shoe_depth']),
+            'perforation_depth_ft': float(perforation_depth),
+            'outlet_pressure_psi': float(outlet_pressure),
+            'reservoir_temp_f': float(reservoir_temp),
+            'q_op_stbd': float(results['q_intersect']),
+            'p_op_psi': float(results['p_intersect']),
+            'operating_point_converged': bool(results['operating_point_converged']),
+            'vlp_converged': results['vlp_converged'],
+            'vlp_iterations': results['vlp_iterations'],
+            'warnings': ' | '.join(flow_path['warnings']),
+            'error': None,
+        })
+
+        if settings.get('sensitivity'):
+            start, end, step = settings['sensitivity_range']
+            param_values = np.round(np.arange(start, end + step, step), VALUE_DECIMALS)
+            # Runs in this process; batches are already spread across workers by file or completion
+            cases = run_sensitivity(results['base_case'], settings['sensitivity'], param_values, max_workers=1)
+            for value, case in zip(param_values, cases):
+                sensitivity_rows.append({
+                    'file': source,
+                    'completion': name,
+                    'parameter': settings['sensitivity'],
+                    'value': float(value),
+                    'q_op_stbd': case['q_op'],
+                    'p_op_psi': case['p_op'],
+                    'vlp_evaluations': case['vlp_evaluations'],
+                })
+    except Exception as e:
+        row['error'] = str(e)
+    return row, sensitivity_rows
+def analyze_session_file(path, settings):
+    """
+    Nodal analysis (and sensitivity, if configured) for the completions of one session file.
+    Returns (summary rows, sensitivity rows) as lists of dicts; failures are reported in the
+    summary's error column instead of raised, so one bad file does not stop a batch.
+    """
+    summary_rows = []
+    sensitivity_rows = []
+    try:
+        session = load_session_file(path)
+        session['well_geometry'] = geometry_for_session(session)
+        names = completions_to_run(session, settings['completions'])
+        if not names:
+            raise ValueError("No completions to analyse")
+    except Exception as e:
+        return [{'file': str(path), 'completion': None, 'error': str(e)}], []
+
+    for name in names:
+        row, rows = analyze_completion(session, name, settings, source=str(path))
+        summary_rows.append(row)
+        sensitivity_rows.extend(rows)
+    return summary_rows, sensitivity_rows
+def _analyze_completion_chunk(session, settings, indexed_names):
+    """Worker task: analyse a run of (index, completion name) from one session"""
+    return [(i, analyze_completion(session, name, settings)[0]) for i, name in indexed_names]
+def run_field(session, settings=None, names=None, max_workers=1, progress_callback=None):
+    """
+    Nodal analysis of many completions of one session (by default every active one), each with
+    its assigned fluid, in-process or on the shared process pool.
+    Flow paths are selected once per distinct perforation depth and the well path geometry once
+    per session, both shipped with the session, and completions are grouped by fluid so each
+    worker builds a fluid's PVT table only once.
+    progress_callback(completed, total) is called as completions finish.
+    Returns a summary DataFrame (SUMMARY_COLUMNS, without file) in completion order.
+    """
+    settings = dict(DEFAULT_SETTINGS, prefer_nodal_selection=False, **(settings or {}))
+    if names is None:
+        names = completions_to_run(session, 'active')
+
+    # Shared tubular preprocessing: one flow path per perforation depth and one well path
+    session = dict(session, flow_paths={}, well_geometry=geometry_for_session(session))
+    for name in names:
+        try:
+            depth = session['completions'][name]['basic_info']['middle_md']
+            if depth not in session['flow_paths']:
+                session['flow_paths'][depth] = flow_path_for_completion(session, depth)
+        except Exception:
+            pass  # reported per completion when it is analysed
+
+    # Shared PVT: completions using the same fluid run next to each other, and so in the same chunks
+    def fluid_key(indexed_name):
+        try:
+            return fluid_for_completion(session, indexed_name[1], False)[0]
+        except ValueError:
+            return ''
+    items = sorted(enumerate(names), key=fluid_key)
+
+    rows = [None] * len(names)
+    for completed, (i, row) in enumerate(
+            iter_chunked(_analyze_completion_chunk, (session, settings), items, max_workers, None), start=1):
+        rows[i] = row
+        if progress_callback is not None:
+            progress_callback(completed, len(rows))
+    return pd.DataFrame(rows, columns=[column for column in SUMMARY_COLUMNS if column != 'file'])
+def find_session_files(paths, recursive=False):
+    """Session JSON and .wdp project files named on the command line, expanding directories"""
+    extensions = ('.json', PROJECT_EXTENSION)
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for root, _, names in os.walk(path):
+                    files.extend(os.path.join(root, name) for name in names if name.lower().endswith(extensions))
+            else:
+                files.extend(os.path.join(path, name) for name in os.listdir(path)
+                             if name.lower().endswith(extensions))
+        else:
+            files.append(path)
+    return sorted(files)
+def run_batch(files, settings, max_workers=None, progress=None):
+    """
+    Analyse every session file, on a process pool when max_workers > 1.
+    progress(completed, total, path) is called as each file finishes.
+    Returns (summary DataFrame, sensitivity DataFrame), both sorted by file and completion.
+    """
+    if max_workers is None:
+        max_workers = default_worker_count()
+    summary_rows = []
+    sensitivity_rows = []
+
+    def collect(path, result, completed):
+        summary_rows.extend(result[0])
+        sensitivity_rows.extend(result[1])
+        if progress is not None:
+            progress(completed, len(files), path)
+
+    if max_workers <= 1 or len(files) <= 1:
+        for completed, path in enumerate(files, start=1):
+            collect(path, analyze_session_file(path, settings), completed)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(files))) as pool:
+            futures = {pool.submit(analyze_session_file, path, settings): path for path in files}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                collect(futures[future], future.result(), completed)
+
+    summary = pd.DataFrame(summary_rows, columns=SUMMARY_COLUMNS)
+    if not summary.empty:
+        summary = summary.sort_values(['file', 'completion'], na_position='first', kind='stable').reset_index(drop=True)
+    sensitivity = pd.DataFrame(sensitivity_rows)
+    if not sensitivity.empty:
+        sensitivity = sensitivity.sort_values(['file', 'completion', 'value'], kind='stable').reset_index(drop=True)
+    return summary, sensitivity
+def write_table(table, path, file_format):
+    """Write a result table as CSV or Parquet (Parquet needs pyarrow or fastparquet)"""
+    if file_format == 'parquet':
+        try:
+            table.to_parquet(path, index=False)
+        except ImportError as e:
+            raise SystemExit(f"Parquet output needs pyarrow or fastparquet installed ({e}). Use --format csv.")
+    else:
+        table.to_csv(path, index=False)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run nodal analysis on session files saved by the Nodal Analysis app."
+    )
+    parser.add_argument('paths', nargs='+', help="Session JSON / .wdp project files or directories of them")
+    parser.add_argument('-o', '--output-dir', default='.', help="Directory for the result tables (default: current)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="Result table format")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: all available cores; 1 runs in this process)")
+    parser.add_argument('--recursive', action='store_true', help="Search directories recursively")
+    parser.add_argument('--completions', choices=['selected', 'active', 'all'], default=DEFAULT_SETTINGS['completions'],
+                        help="Completions to analyse: the session's Nodal Analysis selection (falling back to "
+                             "active completions), every active completion, or all of them")
+    parser.add_argument('--outlet-pressure', type=float, default=None,
+                        help="Wellhead pressure in psi (default: the session's value, else 100)")
+    parser.add_argument('--min-rate', type=float, default=DEFAULT_SETTINGS['min_flow_rate'], help="Minimum VLP rate (STB/D)")
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_SETTINGS['max_flow_rate'], help="Maximum VLP rate (STB/D)")
+    parser.add_argument('--points', type=int, default=DEFAULT_SETTINGS['num_points'], help="Number of VLP rates")
+    parser.add_argument('--sensitivity', choices=list(TUBING_PARAMETERS), default=None,
+                        help="Also run a sensitivity on this parameter")
+    parser.add_argument('--range', nargs=3, type=float, metavar=('START', 'END', 'STEP'),
+                        help="Sensitivity parameter values")
+    parser.add_argument('-q', '--quiet', action='store_true', help="Do not report progress")
+    args = parser.parse_args(argv)
+    if args.sensitivity and not args.range:
+        parser.error("--sensitivity needs --range START END STEP")
+    return args
+def main(argv=None):
+    args = parse_args(argv)
+    files = find_session_files(args.paths, args.recursive)
+    if not files:
+        print("No session files found.", file=sys.stderr)
+        return 1
+
+    settings = dict(DEFAULT_SETTINGS,
+                    outlet_pressure=args.outlet_pressure,
+                    min_flow_rate=args.min_rate,
+                    max_flow_rate=args.max_rate,
+                    num_points=args.points,
+                    completions=args.completions,
+                    sensitivity=args.sensitivity,
+                    sensitivity_range=tuple(args.range) if args.range else None)
+
+    def progress(completed, total, path):
+        if not args.quiet:
+            print(f"[{completed}/{total}] {path}", file=sys.stderr)
+
+    start = time.perf_counter()
+    summary, sensitivity = run_batch(files, settings, args.workers, progress)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    extension = 'parquet' if args.format == 'parquet' else 'csv'
+    write_table(summary, os.path.join(args.output_dir, f"nodal_summary.{extension}"), args.format)
+    if args.sensitivity:
+        write_table(sensitivity, os.path.join(args.output_dir, f"nodal_sensitivity.{extension}"), args.format)
+
+    failures = int(summary['error'].notna().sum()) if 'error' in summary else 0
+    if not args.quiet:
+        print(f"Analysed {len(summary) - failures} completions from {len(files)} files in "
+              f"{time.perf_counter() - start:.1f} s ({failures} failed). Results in {args.output_dir}",
+              file=sys.stderr)
+    return 0 if failures == 0 else 2
+if __name__ == '__main__':
+    sys.exit(main())
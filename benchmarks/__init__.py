@@ -0,0 +1,4 @@
+"""
+Benchmarks for the nodal analysis code. Run from the repository root, e.g.
+    python -m benchmarks.kernels
+"""
@@ -0,0 +1,74 @@
+"""
+Representative wells the benchmarks run against, in the same shapes the app builds them:
+fluid properties dicts, tubing/casing DataFrames and a completion dict.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _well(fluid, tubing_shoe_depth, perforation_depth, tubing_id, casing_id, reservoir_pressure,
+          reservoir_temp, productivity_index, outlet_pressure, max_flow_rate):
+    tubing_data = pd.DataFrame({
+        'Name': ['Tubing'],
+        'To MD': [tubing_shoe_depth],
+        'ID(in)': [tubing_id],
+        'OD(in)': [tubing_id + 0.5],
+        'Wall thickness(in)': [0.25],
+        'Roughness(in)': [0.0006]
+    })
+    casing_data = pd.DataFrame({
+        'Section type': ['Casing'],
+        'Name': ['Production Casing'],
+        'From MD': [0.0],
+        'To MD': [perforation_depth + 200],
+        'ID(in)': [casing_id],
+        'OD(in)': [casing_id + 0.75],
+        'Wall thickness(in)': [0.375],
+        'Roughness(in)': [0.0006]
+    })
+    completion_data = {
+        'basic_info': {'name': 'Completion', 'middle_md': perforation_depth, 'ipr_model': 'Well PI', 'active': True},
+        'reservoir': {
+            'reservoir_pressure': reservoir_pressure,
+            'reservoir_temperature': reservoir_temp,
+            'productivity_index': productivity_index,
+            'use_vogel_below_bubble_point': True,
+            'max_flow_rate': productivity_index * reservoir_pressure,
+            'vogel_coefficient': 0.2,
+            'fetkovich_exponent': 0.9,
+            'jones_coefficient_a': 0.5,
+            'jones_coefficient_b': 0.0001
+        },
+        'fluid_model': {'selected_fluid': 'Fluid'}
+    }
+    return {
+        'fluid_data': fluid,
+        'tubing_data': tubing_data,
+        'casing_data': casing_data,
+        'completion_data': completion_data,
+        'outlet_pressure': outlet_pressure,
+        'reservoir_temp': reservoir_temp,
+        'tubing_shoe_depth': tubing_shoe_depth,
+        'perforation_depth': perforation_depth,
+        'flow_rates': np.linspace(0, max_flow_rate, 100),
+    }
+
+
+# Fixture wells by name
+FIXTURE_WELLS = {
+    'shallow_oil': _well(
+        {'water_cut': 0.1, 'GOR': 150.0, 'API': 38.0, 'gas_specific_gravity': 0.7, 'water_specific_gravity': 1.02},
+        tubing_shoe_depth=2800.0, perforation_depth=3000.0, tubing_id=2.441, casing_id=6.184,
+        reservoir_pressure=1400.0, reservoir_temp=110.0, productivity_index=2.0, outlet_pressure=80.0,
+        max_flow_rate=3000.0),
+    'deep_high_gor': _well(
+        {'water_cut': 0.05, 'GOR': 2000.0, 'API': 42.0, 'gas_specific_gravity': 0.75, 'water_specific_gravity': 1.05},
+        tubing_shoe_depth=13500.0, perforation_depth=14000.0, tubing_id=2.992, casing_id=6.094,
+        reservoir_pressure=7500.0, reservoir_temp=280.0, productivity_index=1.2, outlet_pressure=400.0,
+        max_flow_rate=8000.0),
+    'high_water_cut': _well(
+        {'water_cut': 0.9, 'GOR': 200.0, 'API': 30.0, 'gas_specific_gravity': 0.68, 'water_specific_gravity': 1.08},
+        tubing_shoe_depth=7600.0, perforation_depth=8000.0, tubing_id=3.958, casing_id=8.681,
+        reservoir_pressure=3500.0, reservoir_temp=190.0, productivity_index=5.0, outlet_pressure=150.0,
+        max_flow_rate=12000.0),
+}
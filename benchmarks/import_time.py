@@ -0,0 +1,126 @@
+"""
+Cold-start import cost of the Streamlit app.
+The app's module-level imports are read from its source and replayed, in order, in fresh
+interpreters; each import's incremental time is the median over several runs. The run fails if
+any of the heavy libraries that sections load on demand (plotting, SciPy, the schematics
+library) is pulled in at startup, or, with --compare, if the total grew beyond the threshold.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --save-baseline imports.json
+    python -m benchmarks.import_time --compare imports.json
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'slb intern app.py')
+
+# Libraries that must only be imported when the section using them is opened
+HEAVY_MODULES = ('matplotlib', 'scipy', 'wellarchitecturedesign')
+
+DEFAULT_THRESHOLD = 0.25
+
+# Runs in a fresh interpreter: time each import statement, then list the heavy modules loaded
+_PROBE = """
+import json, sys, time
+statements = json.loads(sys.argv[1])
+heavy = json.loads(sys.argv[2])
+timings = []
+for statement in statements:
+    start = time.perf_counter()
+    try:
+        exec(statement, {})
+        timings.append([statement, time.perf_counter() - start, None])
+    except ImportError as e:
+        timings.append([statement, time.perf_counter() - start, str(e)])
+loaded = sorted({name.split('.')[0] for name in sys.modules} & set(heavy))
+print(json.dumps({'timings': timings, 'heavy_loaded': loaded}))
+"""
+
+
+def app_import_statements(path=APP_PATH):
+    """The app's module-level import statements, in source order, without repeats"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    statements = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            statement = ast.unparse(node)
+            if statement not in statements:
+                statements.append(statement)
+    return statements
+def probe_imports(statements, cwd):
+    """Import statements replayed in one fresh interpreter: (per-statement timings, heavy modules loaded)"""
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE, json.dumps(statements), json.dumps(HEAVY_MODULES)],
+        cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output)
+    return result['timings'], result['heavy_loaded']
+def measure_imports(path=APP_PATH, repeat=5):
+    """
+    Median time (ms) of each app import over `repeat` cold starts, the modules that failed to
+    import and the heavy modules loaded at startup.
+    """
+    statements = app_import_statements(path)
+    cwd = os.path.dirname(path)
+    samples = {statement: [] for statement in statements}
+    errors = {}
+    heavy_loaded = set()
+    for _ in range(repeat):
+        timings, loaded = probe_imports(statements, cwd)
+        heavy_loaded.update(loaded)
+        for statement, seconds, error in timings:
+            samples[statement].append(seconds * 1000)
+            if error:
+                errors[statement] = error
+    medians = {statement: float(np.median(values)) for statement, values in samples.items()}
+    return medians, errors, sorted(heavy_loaded)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the app's cold-start import time.")
+    parser.add_argument('--app', default=APP_PATH, help="Path of the Streamlit script")
+    parser.add_argument('--repeat', type=int, default=5, help="Cold starts to take the median over (default 5)")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Write the timings to a baseline JSON file")
+    parser.add_argument('--compare', metavar='PATH', help="Compare the total against a baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed relative increase in total import time (default {DEFAULT_THRESHOLD})")
+    return parser.parse_args(argv)
+def main(argv=None):
+    args = parse_args(argv)
+    medians, errors, heavy_loaded = measure_imports(args.app, args.repeat)
+    total = sum(medians.values())
+
+    for statement, ms in sorted(medians.items(), key=lambda item: -item[1]):
+        note = f"  (not installed: {errors[statement]})" if statement in errors else ''
+        print(f"{ms:9.1f} ms  {statement}{note}")
+    print(f"{total:9.1f} ms  total")
+
+    status = 0
+    if heavy_loaded:
+        print(f"Loaded at startup but should be imported on demand: {', '.join(heavy_loaded)}", file=sys.stderr)
+        status = 1
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'total_ms': total, 'imports_ms': medians, 'python': sys.version.split()[0]}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_total = json.load(f)['total_ms']
+        change = total / baseline_total - 1
+        print(f"Total {total:.1f} ms vs baseline {baseline_total:.1f} ms ({change:+.1%})")
+        if change > args.threshold:
+            print(f"Import time regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
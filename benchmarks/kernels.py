@@ -0,0 +1,239 @@
+"""
+Micro-benchmarks for the calculation kernels behind the Nodal Analysis tool: segment pressure
+drop, VLP curves, fluid properties / PVT lookups, the IPR-VLP intersection and the IPR models.
+Each kernel runs against every fixture well in benchmarks.fixtures. Memoized kernels are timed
+on their uncached path, so a result measures the calculation and not the cache.
+
+    python -m benchmarks.kernels                              # print calls/s, latency, allocations
+    python -m benchmarks.kernels --save-baseline base.json    # record a baseline
+    python -m benchmarks.kernels --compare base.json          # exit 1 on a regression
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import FIXTURE_WELLS
+from ipr_models import IPR_MODELS, ipr_from_completion
+from nodal_analysis import (
+    calculate_fluid_properties, calculate_segment_pressure_drop_vectorized, calculate_vlp_vectorized,
+    find_intersection_point, find_operating_point
+)
+from pvt_tables import PVTTable, black_oil_properties, get_pvt_table
+
+
+# Latency percentiles reported for every benchmark
+PERCENTILES = (50, 90, 99)
+
+# Default relative slowdown of the median latency that --compare treats as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def _vlp_at(well, pvt_table):
+    """Uncached VLP for one well as a function of rate"""
+    def vlp_at(q):
+        return calculate_vlp_vectorized.__wrapped__(
+            well['tubing_data'], well['casing_data'], well['fluid_data'], well['outlet_pressure'],
+            q, well['reservoir_temp'], well['tubing_shoe_depth'], well['perforation_depth'], pvt_table=pvt_table
+        )
+    return vlp_at
+def _ipr_models(well):
+    """One instance of every registry IPR model (Well PI as the composite PI/Vogel) for the well's reservoir"""
+    models = {}
+    for name in IPR_MODELS:
+        completion = dict(well['completion_data'])
+        completion['basic_info'] = dict(completion['basic_info'], ipr_model=name)
+        model = ipr_from_completion(completion, well['fluid_data'])
+        models[model.name] = model
+    return models
+def build_benchmarks(well):
+    """
+    Benchmarks for one fixture well, as {name: (func, setup)}.
+    func() is the timed call; setup(), when given, runs before each call outside the timed region.
+    """
+    fluid = well['fluid_data']
+    temperature = well['reservoir_temp']
+    diameter = well['tubing_data']['ID(in)'].iloc[0]
+    roughness = well['tubing_data']['Roughness(in)'].iloc[0]
+    length = well['tubing_shoe_depth']
+    flow_rates = well['flow_rates']
+    q_mid = float(flow_rates[len(flow_rates) // 2])
+    pvt_table = get_pvt_table(fluid)
+    pressures = np.geomspace(50, 10000, 200)
+    vlp_at = _vlp_at(well, pvt_table)
+    ipr = ipr_from_completion(well['completion_data'], fluid)
+    q_ipr = np.linspace(0, ipr.aof, 200)
+    p_ipr = ipr.pwf(q_ipr)
+    p_vlp = vlp_at(flow_rates)
+
+    benchmarks = {
+        'segment.scalar': (
+            lambda: calculate_segment_pressure_drop_vectorized(
+                well['outlet_pressure'], q_mid, diameter, roughness, length, fluid, temperature, 60),
+            None),
+        'segment.scalar_pvt_table': (
+            lambda: calculate_segment_pressure_drop_vectorized(
+                well['outlet_pressure'], q_mid, diameter, roughness, length, fluid, temperature, 60,
+                pvt_table=pvt_table),
+            None),
+        'segment.vectorized_100': (
+            lambda: calculate_segment_pressure_drop_vectorized(
+                well['outlet_pressure'], flow_rates[1:], diameter, roughness, length, fluid, temperature, 60,
+                pvt_table=pvt_table),
+            None),
+        'vlp.vectorized_100': (lambda: vlp_at(flow_rates), None),
+        'vlp.vectorized_1': (lambda: vlp_at(np.array([q_mid])), None),
+        'fluid.properties_scalar': (
+            lambda: calculate_fluid_properties(fluid, 2000.0, temperature), None),
+        'fluid.black_oil_200': (lambda: black_oil_properties(pressures, temperature, fluid), None),
+        'fluid.pvt_lookup_200': (lambda: pvt_table.lookup(pressures, temperature), None),
+        'fluid.pvt_table_build': (lambda: PVTTable(fluid), None),
+        'intersection.curves': (lambda: find_intersection_point(q_ipr, p_ipr, flow_rates, p_vlp), None),
+        'intersection.operating_point': (lambda: find_operating_point(ipr.pwf, vlp_at, ipr.aof), None),
+    }
+    for name, model in _ipr_models(well).items():
+        key = name.lower().replace(' + ', '_').replace(' ', '_')
+        benchmarks[f'ipr.{key}.rate_200'] = (lambda model=model: model.rate(pressures), None)
+        benchmarks[f'ipr.{key}.pwf_200'] = (lambda model=model: model.pwf(q_ipr), None)
+    return benchmarks
+def time_benchmark(func, setup=None, min_time=0.2, min_calls=5, max_calls=100000, warmup=2):
+    """
+    Time func() call by call until both min_time seconds and min_calls calls have been spent.
+    Returns the per-call latencies in seconds.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+
+    latencies = []
+    total = 0.0
+    while len(latencies) < max_calls and (total < min_time or len(latencies) < min_calls):
+        if setup is not None:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        elapsed = (time.perf_counter_ns() - start) * 1e-9
+        latencies.append(elapsed)
+        total += elapsed
+    return np.array(latencies)
+def measure_allocations(func, setup=None, calls=3):
+    """Peak traced memory (bytes) and allocated blocks still held per call, averaged over a few calls"""
+    peaks = []
+    blocks = []
+    for _ in range(calls):
+        if setup is not None:
+            setup()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        func()
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+        blocks.append(sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0))
+    return float(np.mean(peaks)), float(np.mean(blocks))
+def run_benchmarks(wells=None, name_filter=None, min_time=0.2, progress=None):
+    """
+    Run every kernel benchmark on every fixture well (optionally only names containing name_filter).
+    Returns a DataFrame with one row per (kernel, well).
+    """
+    wells = FIXTURE_WELLS if wells is None else wells
+    rows = []
+    for well_name, well in wells.items():
+        for name, (func, setup) in build_benchmarks(well).items():
+            if name_filter and name_filter not in name:
+                continue
+            latencies = time_benchmark(func, setup, min_time=min_time)
+            peak_bytes, blocks = measure_allocations(func, setup)
+            row = {
+                'benchmark': name,
+                'well': well_name,
+                'calls': len(latencies),
+                'calls_per_s': len(latencies) / latencies.sum(),
+            }
+            for pct, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+                row[f'p{pct}_us'] = value * 1e6
+            row['peak_kib'] = peak_bytes / 1024
+            row['alloc_blocks'] = blocks
+            rows.append(row)
+            if progress is not None:
+                progress(row)
+    return pd.DataFrame(rows)
+def save_baseline(results, path):
+    """Write benchmark results to a JSON baseline file"""
+    baseline = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        },
+        'results': results.to_dict(orient='records'),
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+def compare_to_baseline(results, path, threshold=DEFAULT_THRESHOLD):
+    """
+    Join results to a saved baseline on (benchmark, well) and flag median-latency regressions.
+    Returns the comparison DataFrame, with a 'regressed' column set where p50 grew by more than threshold.
+    """
+    with open(path) as f:
+        baseline = pd.DataFrame(json.load(f)['results'])
+    comparison = results.merge(baseline[['benchmark', 'well', 'p50_us']], on=['benchmark', 'well'],
+                               how='left', suffixes=('', '_baseline'))
+    comparison['change'] = comparison['p50_us'] / comparison['p50_us_baseline'] - 1
+    comparison['regressed'] = comparison['change'] > threshold
+    return comparison
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the nodal analysis kernels.")
+    parser.add_argument('--filter', default=None, help="Only run benchmarks whose name contains this text")
+    parser.add_argument('--well', action='append', choices=list(FIXTURE_WELLS),
+                        help="Fixture well to run (repeatable; default all)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds spent timing each benchmark")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Write the results to a baseline JSON file")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a baseline JSON file")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative increase in median latency before --compare fails "
+                             f"(default {DEFAULT_THRESHOLD})")
+    return parser.parse_args(argv)
+def main(argv=None):
+    args = parse_args(argv)
+    wells = {name: FIXTURE_WELLS[name] for name in args.well} if args.well else FIXTURE_WELLS
+
+    def progress(row):
+        print(f"{row['benchmark']:<34} {row['well']:<15} {row['calls_per_s']:>12,.1f}/s  "
+              f"p50 {row['p50_us']:>10,.1f} us  p99 {row['p99_us']:>10,.1f} us  "
+              f"peak {row['peak_kib']:>9,.1f} KiB  {row['alloc_blocks']:>8,.0f} blocks", file=sys.stderr)
+
+    results = run_benchmarks(wells, args.filter, args.min_time, progress)
+    if results.empty:
+        raise SystemExit("No benchmarks matched.")
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print(f"Baseline written to {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        comparison = compare_to_baseline(results, args.compare, args.threshold)
+        with pd.option_context('display.width', 200, 'display.max_rows', None):
+            print(comparison[['benchmark', 'well', 'p50_us', 'p50_us_baseline', 'change']].to_string(
+                index=False, float_format=lambda v: f"{v:,.3f}"))
+        regressed = comparison[comparison['regressed']]
+        if not regressed.empty:
+            print(f"{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}:", file=sys.stderr)
+            for _, row in regressed.iterrows():
+                print(f"  {row['benchmark']} [{row['well']}]: {row['change']:+.1%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+End-to-end scaling benchmarks: how the load -> nodal -> sensitivity -> save path behaves as a
+session grows. For every size of every dimension (survey stations, tubing sections, VLP points,
+sensitivity values, completions) a synthetic session is written, then loaded, analysed and saved
+again as the headless tools do it, recording wall time and peak traced memory per stage.
+
+    python -m benchmarks.scaling -o scaling_results           # full sizes, CSV + PNG curves
+    python -m benchmarks.scaling --quick --dimension completions
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from batch_nodal import DEFAULT_SETTINGS, completions_to_run, flow_path_for_completion, fluid_for_completion, \
+    geometry_for_session, load_session_file, run_field
+from benchmarks.synthetic import DEFAULT_SIZES, write_synthetic_session
+from memo_cache import clear_all_caches
+from nodal_analysis import run_nodal_analysis
+from sensitivity import VALUE_DECIMALS, run_sensitivity
+
+
+# Sizes run for each dimension; every other dimension stays at its DEFAULT_SIZES value
+SCALING_SIZES = {
+    'survey_stations': [100, 1000, 10000],
+    'tubing_sections': [1, 10, 50],
+    'vlp_points': [25, 50, 100, 200],
+    'sensitivity_values': [10, 100, 500],
+    'completions': [1, 10, 100, 1000],
+}
+
+# Smaller sizes for a quick check of the harness
+QUICK_SIZES = {
+    'survey_stations': [100, 1000],
+    'tubing_sections': [1, 10],
+    'vlp_points': [25, 100],
+    'sensitivity_values': [10, 50],
+    'completions': [1, 10],
+}
+
+STAGES = ('load', 'nodal', 'sensitivity', 'save')
+
+
+def _json_compatible(obj):
+    """Same conversion save_session_state applies before writing a session"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
+    elif isinstance(obj, pd.DataFrame):
+        return _json_compatible(obj.to_dict())
+    elif isinstance(obj, dict):
+        return {k: _json_compatible(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_json_compatible(item) for item in obj]
+    return obj
+def save_session(session, path):
+    """Write a loaded (and analysed) session back in the save_session_state layout"""
+    data = {key: (value if not value.empty else None) if isinstance(value, pd.DataFrame) else value
+            for key, value in session.items() if key != 'flow_paths'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_json_compatible(data), f)
+def base_case(session, settings):
+    """Nodal analysis of the session's selected completion, as the Nodal Analysis tab runs it"""
+    name = completions_to_run(session, 'selected')[0]
+    completion_data = session['completions'][name]
+    _, fluid_data = fluid_for_completion(session, name)
+    perforation_depth = completion_data['basic_info']['middle_md']
+    flow_path = flow_path_for_completion(session, perforation_depth)
+    return run_nodal_analysis(
+        flow_path['tubing_data'], flow_path['casing_data'], fluid_data, completion_data,
+        settings['outlet_pressure'],
+        np.linspace(settings['min_flow_rate'], settings['max_flow_rate'], settings['num_points']),
+        completion_data['reservoir'].get('reservoir_temperature', 180.0),
+        flow_path['tubing_shoe_depth'], perforation_depth, geometry_for_session(session)
+    )
+def run_pipeline(path, save_path, measure):
+    """
+    Load a session file, run the field and the selected completion's nodal analysis and
+    sensitivity, and save the session with its results. measure(stage, func) runs each stage.
+    """
+    session = measure('load', lambda: load_session_file(path))
+    nodal_data = session['nodal_data']
+    settings = dict(DEFAULT_SETTINGS, outlet_pressure=nodal_data.get('outlet_pressure', 100.0),
+                    num_points=nodal_data.get('num_points', DEFAULT_SETTINGS['num_points']))
+
+    def nodal():
+        field = run_field(session, settings, completions_to_run(session, 'active'))
+        return field, base_case(session, settings)
+    field, results = measure('nodal', nodal)
+
+    sensitivity = nodal_data['sensitivity']
+    n_values = int(round((sensitivity['end_value'] - sensitivity['start_value']) / sensitivity['step_value'])) + 1
+    param_values = np.round(np.linspace(sensitivity['start_value'], sensitivity['end_value'], n_values),
+                            VALUE_DECIMALS)
+    cases = measure('sensitivity', lambda: run_sensitivity(results['base_case'], sensitivity['parameter'],
+                                                           param_values))
+
+    def save():
+        nodal_data['results'] = {key: value for key, value in results.items() if key != 'base_case'}
+        nodal_data['field_results'] = field
+        nodal_data['sensitivity'] = dict(sensitivity, param_values=param_values,
+                                         q_op_values=[case['q_op'] for case in cases],
+                                         p_op_values=[case['p_op'] for case in cases],
+                                         analysis_complete=True)
+        save_session(session, save_path)
+    measure('save', save)
+def measure_case(path, save_path, trace_memory=True):
+    """
+    Wall time (s) per stage from one untraced run of the pipeline and, with trace_memory, the
+    peak traced memory (MiB) each stage allocated above what was held when it started, from a
+    second, traced run. Calculation caches are cleared before each run.
+    """
+    timings = {}
+
+    def timed(stage, func):
+        start = time.perf_counter()
+        result = func()
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    clear_all_caches()
+    run_pipeline(path, save_path, timed)
+    if not trace_memory:
+        return timings, {}
+
+    peaks = {}
+
+    def traced(stage, func):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = func()
+        peaks[stage] = (tracemalloc.get_traced_memory()[1] - current) / 2**20
+        return result
+
+    clear_all_caches()
+    tracemalloc.start()
+    try:
+        run_pipeline(path, save_path, traced)
+    finally:
+        tracemalloc.stop()
+    return timings, peaks
+def run_scaling(sizes=None, workdir=None, trace_memory=True, progress=None):
+    """
+    Run the pipeline over every size of every dimension in sizes (default SCALING_SIZES).
+    Returns a DataFrame with one row per (dimension, size, stage), including a 'total' stage.
+    """
+    sizes = SCALING_SIZES if sizes is None else sizes
+    rows = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for dimension, values in sizes.items():
+            for size in values:
+                path = os.path.join(tmp, f'{dimension}_{size}.json')
+                write_synthetic_session(path, **dict(DEFAULT_SIZES, **{dimension: size}))
+                file_mib = os.path.getsize(path) / 2**20
+                timings, peaks = measure_case(path, os.path.join(tmp, 'saved.json'), trace_memory)
+                for stage in STAGES + ('total',):
+                    rows.append({
+                        'dimension': dimension,
+                        'size': size,
+                        'stage': stage,
+                        'wall_s': sum(timings.values()) if stage == 'total' else timings[stage],
+                        'peak_mib': (max(peaks.values()) if stage == 'total' else peaks[stage]) if peaks else np.nan,
+                        'file_mib': file_mib,
+                    })
+                if progress is not None:
+                    progress(dimension, size, timings, peaks)
+    return pd.DataFrame(rows)
+def plot_scaling(results, output_dir):
+    """One PNG per dimension with wall time and peak memory against size, per stage, on log-log axes"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    paths = []
+    for dimension, table in results.groupby('dimension', sort=False):
+        fig, (ax_time, ax_memory) = plt.subplots(1, 2, figsize=(12, 4.5))
+        for stage, stage_table in table.groupby('stage', sort=False):
+            style = {'linewidth': 2.5, 'color': 'black'} if stage == 'total' else {}
+            ax_time.plot(stage_table['size'], stage_table['wall_s'], 'o-', label=stage, **style)
+            ax_memory.plot(stage_table['size'], stage_table['peak_mib'], 'o-', label=stage, **style)
+        for ax, label in ((ax_time, 'Wall time (s)'), (ax_memory, 'Peak memory (MiB)')):
+            ax.set_xscale('log')
+            ax.set_yscale('log')
+            ax.set_xlabel(dimension.replace('_', ' '))
+            ax.set_ylabel(label)
+            ax.grid(True, which='both', alpha=0.3)
+        ax_time.legend()
+        fig.suptitle(f"Scaling with {dimension.replace('_', ' ')}")
+        fig.tight_layout()
+        path = os.path.join(output_dir, f'scaling_{dimension}.png')
+        fig.savefig(path, dpi=100)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for the load/nodal/sensitivity/save path.")
+    parser.add_argument('-o', '--output-dir', default='.', help="Directory for scaling.csv and the plots")
+    parser.add_argument('--dimension', action='append', choices=list(SCALING_SIZES),
+                        help="Dimension to scale (repeatable; default all)")
+    parser.add_argument('--quick', action='store_true', help="Use the small QUICK_SIZES")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run that measures peak memory")
+    parser.add_argument('--no-plots', action='store_true', help="Only write scaling.csv")
+    return parser.parse_args(argv)
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = QUICK_SIZES if args.quick else SCALING_SIZES
+    if args.dimension:
+        sizes = {dimension: sizes[dimension] for dimension in args.dimension}
+
+    def progress(dimension, size, timings, peaks):
+        stages = '  '.join(f"{stage} {timings[stage]:.3f}s" + (f"/{peaks[stage]:.1f}MiB" if peaks else '')
+                           for stage in STAGES)
+        print(f"{dimension:<20} {size:>7}  {stages}", file=sys.stderr)
+
+    results = run_scaling(sizes, trace_memory=not args.no_memory, progress=progress)
+    os.makedirs(args.output_dir, exist_ok=True)
+    csv_path = os.path.join(args.output_dir, 'scaling.csv')
+    results.to_csv(csv_path, index=False)
+    print(f"Results written to {csv_path}", file=sys.stderr)
+    if not args.no_plots:
+        try:
+            paths = plot_scaling(results, args.output_dir)
+        except ImportError as e:
+            raise SystemExit(f"Plotting needs matplotlib installed ({e}). Use --no-plots for the CSV only.")
+        for path in paths:
+            print(f"Plot written to {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
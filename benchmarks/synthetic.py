@@ -0,0 +1,230 @@
+"""
+Synthetic sessions in the save_session_state JSON format, at configurable sizes, for the
+scaling benchmarks. Every session is a valid app save: it loads in the app and in batch_nodal.
+
+    python -m benchmarks.synthetic big.json --survey-stations 10000 --completions 1000
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from ipr_models import IPR_MODELS
+from survey import ANGLE_COLUMN, AZIMUTH_COLUMN, MD_COLUMN, TVD_COLUMN, DepthIndex, compute_survey
+
+
+# Sizes of a default synthetic session
+DEFAULT_SIZES = {
+    'survey_stations': 100,
+    'tubing_sections': 1,
+    'vlp_points': 100,
+    'sensitivity_values': 10,
+    'completions': 1,
+}
+
+# Fluids the completions are spread across (water cut, GOR, API, gas SG, water SG)
+SYNTHETIC_FLUIDS = {
+    'Light Oil': (0.1, 600.0, 38.0, 0.75, 1.02),
+    'Gassy Oil': (0.05, 1800.0, 42.0, 0.8, 1.03),
+    'Wet Oil': (0.85, 250.0, 30.0, 0.7, 1.07),
+}
+
+
+def synthetic_survey(n_stations, total_md, kickoff_md=1500.0, build_rate=2.0, hold_angle=45.0, azimuth=60.0):
+    """
+    Build-and-hold deviation survey with n_stations evenly spaced stations from surface to total_md:
+    vertical to kickoff_md, building at build_rate °/100ft to hold_angle, then holding.
+    """
+    md = np.linspace(0.0, total_md, max(n_stations, 2))
+    angle = np.clip((md - kickoff_md) * build_rate / 100.0, 0.0, hold_angle)
+    return compute_survey(pd.DataFrame({
+        MD_COLUMN: md, ANGLE_COLUMN: angle, AZIMUTH_COLUMN: np.where(angle > 0, azimuth, 0.0)
+    }))
+def synthetic_tubing(n_sections, shoe_md):
+    """Tubing string of n_sections consecutive sections down to shoe_md, tapering with depth"""
+    to_md = np.linspace(shoe_md / n_sections, shoe_md, n_sections)
+    inner_diameter = np.linspace(3.958, 2.441, n_sections) if n_sections > 1 else np.array([2.992])
+    outer_diameter = inner_diameter + 0.5
+    return pd.DataFrame({
+        'Name': [f'Tubing {i + 1}' for i in range(n_sections)],
+        'To MD': to_md,
+        'ID(in)': inner_diameter,
+        'OD(in)': outer_diameter,
+        'Wall thickness(in)': (outer_diameter - inner_diameter) / 2,
+        'Roughness(in)': np.full(n_sections, 0.0006),
+    })
+def synthetic_casing(total_md):
+    """Surface, intermediate and production casing, the last one to total depth"""
+    return pd.DataFrame({
+        'Section type': ['Casing', 'Casing', 'Casing'],
+        'Name': ['Surface Casing', 'Intermediate Casing', 'Production Casing'],
+        'From MD': [0.0, 0.0, 0.0],
+        'To MD': [1500.0, total_md * 0.6, total_md],
+        'ID(in)': [12.415, 8.681, 6.184],
+        'OD(in)': [13.375, 9.625, 7.0],
+        'Wall thickness(in)': [0.48, 0.472, 0.408],
+        'Roughness(in)': [0.0006, 0.0006, 0.0006],
+    })
+def synthetic_completions(n_completions, top_md, bottom_md, seed=0):
+    """
+    n_completions completions spread between top_md and bottom_md, cycling through the IPR models
+    and the SYNTHETIC_FLUIDS, with reservoir pressure and temperature following depth.
+    """
+    rng = np.random.default_rng(seed)
+    depths = np.round(np.linspace(top_md, bottom_md, n_completions), 1)
+    fluids = list(SYNTHETIC_FLUIDS)
+    models = list(IPR_MODELS)
+    completions = {}
+    for i, depth in enumerate(depths):
+        name = f'Completion {i + 1}'
+        reservoir_pressure = round(0.45 * depth * rng.uniform(0.9, 1.1), 1)
+        completions[name] = {
+            'basic_info': {
+                'name': name,
+                'geometry_profile': 'Deviated',
+                'fluid_entry': 'Single point',
+                'middle_md': float(depth),
+                'type': 'Perforation',
+                'active': True,
+                'ipr_model': models[i % len(models)],
+                'created_date': '2025-01-01 00:00'
+            },
+            'reservoir': {
+                'reservoir_pressure': reservoir_pressure,
+                'reservoir_temperature': round(60 + 0.015 * depth, 1),
+                'productivity_index': round(rng.uniform(0.5, 5.0), 3),
+                'use_vogel_below_bubble_point': bool(i % 2),
+                'vogel_water_cut_correction': False,
+                'max_flow_rate': round(rng.uniform(2000, 8000), 1),
+                'vogel_coefficient': 0.2,
+                'fetkovich_exponent': round(rng.uniform(0.6, 1.0), 3),
+                'jones_coefficient_a': round(rng.uniform(0.1, 1.0), 3),
+                'jones_coefficient_b': round(rng.uniform(1e-5, 1e-4), 6)
+            },
+            'sand': {},
+            'fluid_model': {
+                'selected_fluid': fluids[i % len(fluids)],
+                'flow_rate': 0.0,
+                'pressure': 0.0,
+                'temperature': 0.0
+            },
+            'notes': ''
+        }
+    return completions
+def _completions_table(completions):
+    """The Completions summary table kept alongside the completions dict"""
+    return pd.DataFrame({
+        'Name': list(completions),
+        'Geometry Profile': [c['basic_info']['geometry_profile'] for c in completions.values()],
+        'Fluid entry': [c['basic_info']['fluid_entry'] for c in completions.values()],
+        'Middle MD (ft)': [c['basic_info']['middle_md'] for c in completions.values()],
+        'Type': [c['basic_info']['type'] for c in completions.values()],
+        'Active': [c['basic_info']['active'] for c in completions.values()],
+        'IPR model': [c['basic_info']['ipr_model'] for c in completions.values()],
+    })
+def _table(df):
+    """DataFrame in the to_dict() layout save_session_state writes"""
+    return json.loads(df.to_json())
+def synthetic_session(survey_stations=DEFAULT_SIZES['survey_stations'],
+                      tubing_sections=DEFAULT_SIZES['tubing_sections'],
+                      vlp_points=DEFAULT_SIZES['vlp_points'],
+                      sensitivity_values=DEFAULT_SIZES['sensitivity_values'],
+                      completions=DEFAULT_SIZES['completions'],
+                      total_md=10000.0, seed=0):
+    """
+    Session dict as save_session_state returns it.
+    The well has a build-and-hold survey of survey_stations stations to total_md, a tubing string
+    of tubing_sections sections, and `completions` completions over the bottom 2,000 ft. The Nodal
+    Analysis configuration selects the first completion and the deepest tubing section, and its
+    sensitivity settings hold a Tubing ID range of sensitivity_values values. vlp_points is saved
+    as 'num_points' in the nodal configuration, where the scaling harness reads it.
+    """
+    survey = synthetic_survey(survey_stations, total_md)
+    tubing = synthetic_tubing(tubing_sections, total_md - 2400.0)
+    casing = synthetic_casing(total_md)
+    completions_dict = synthetic_completions(completions, total_md - 2000.0, total_md - 100.0, seed)
+    fluids = {
+        name: {
+            'Created_date': '2025-01-01 00:00',
+            'properties': dict(zip(['water_cut', 'GOR', 'API', 'gas_specific_gravity', 'water_specific_gravity'],
+                                   values)),
+            'notes': ''
+        }
+        for name, values in SYNTHETIC_FLUIDS.items()
+    }
+    first_completion = next(iter(completions_dict))
+    md_heat = pd.DataFrame({'MD(ft)': np.linspace(0, total_md, 11),
+                            'Ambient Temperature': np.linspace(60, 60 + 0.015 * total_md, 11)})
+    depth_index = DepthIndex(survey[MD_COLUMN], survey[TVD_COLUMN], survey[ANGLE_COLUMN])
+    tvd_heat = pd.DataFrame({'TVD(ft)': depth_index.tvd(md_heat['MD(ft)'].to_numpy()),
+                             'Ambient Temperature': md_heat['Ambient Temperature']})
+    start_value, step_value = 1.5, 2.5 / max(sensitivity_values - 1, 1)
+
+    return {
+        'fluids': fluids,
+        'survey_data_saved': {'3D': _table(survey)},
+        'current_survey_type': '3D',
+        'survey_df': _table(survey),
+        'MD_heat': _table(md_heat),
+        'TVD_heat': _table(tvd_heat),
+        'Tubing': _table(tubing),
+        'casing_liners': _table(casing),
+        'Completions': _table(_completions_table(completions_dict)),
+        'completions': completions_dict,
+        'nodal_data': {
+            'well_configuration': {
+                'selected_completion': first_completion,
+                'selected_tubing': tubing['Name'].iloc[-1],
+                'manual_tubing_params': {'id': 2.441, 'od': 2.875, 'length': 5000, 'roughness': 0.0006}
+            },
+            'fluid_selection': completions_dict[first_completion]['fluid_model']['selected_fluid'],
+            'outlet_pressure': 150.0,
+            'num_points': vlp_points,
+            'results': {},
+            'sensitivity': {
+                'parameter': 'Tubing ID',
+                'start_value': start_value,
+                'end_value': round(start_value + step_value * (sensitivity_values - 1), 6),
+                'step_value': round(step_value, 6),
+                'results': {}
+            }
+        },
+        'additional_data': {},
+        'additional_data2': {},
+        'selected_tool': None,
+        'show_well_design': False,
+        'show_fluid_manager': False,
+        'show_nodal_analysis': True,
+        'selected_fluid': None,
+        'selected_completion': None,
+        'new_fluid_mode': False,
+        'new_completion_mode': False,
+        'casing_edit_complete': True,
+        'tubing_edit_complete': True,
+        'bottom_depth': total_md,
+        'wellhead_depth': 0.0,
+        'depth_reference': "Original RKB",
+        'survey_type': '3D'
+    }
+def write_synthetic_session(path, **sizes):
+    """Write a synthetic session (see synthetic_session for the sizes) to a JSON file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(synthetic_session(**sizes), f)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic session JSON file.")
+    parser.add_argument('path', help="Output JSON file")
+    for key, value in DEFAULT_SIZES.items():
+        parser.add_argument('--' + key.replace('_', '-'), type=int, default=value, help=f"(default {value})")
+    parser.add_argument('--total-md', type=float, default=10000.0, help="Well total depth in ft (default 10000)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the completion parameters")
+    return parser.parse_args(argv)
+def main(argv=None):
+    args = parse_args(argv)
+    write_synthetic_session(args.path, total_md=args.total_md, seed=args.seed,
+                            **{key: getattr(args, key) for key in DEFAULT_SIZES})
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,309 @@
+"""
+Bulk import of survey stations and depth tables (ambient temperature / U value) from CSV and
+LAS 2.0 text files, for data sets too long to type into the editors, such as high-density MWD
+surveys and fibre-optic DTS temperature logs.
+Files are parsed in chunks of CHUNK_ROWS rows with the pandas C parser and only the needed
+columns are kept, as float arrays. Columns are matched by name (the app's own headers and the
+usual mnemonics such as DEPT, INC, AZI and TEMP) and depths in metres and temperatures in °C are
+converted to the app's ft and °F. The assembled table is validated with vectorized checks
+(no missing values, strictly increasing depth, inclination and azimuth ranges) and returned in
+the column layout of the app's tables, ready to be stored in survey_df, MD_heat or TVD_heat.
+"""
+import csv
+import io
+import re
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from survey import ANGLE_COLUMN, AZIMUTH_COLUMN, MD_COLUMN
+
+
+# Rows parsed per chunk
+CHUNK_ROWS = 50_000
+
+# File types offered by the upload widgets
+IMPORT_EXTENSIONS = ['csv', 'txt', 'las']
+
+FT_PER_M = 1 / 0.3048
+
+# Depth tables of the Heat transfer tool and the value columns they may hold, in display order
+HEAT_DEPTH_COLUMNS = {'MD': 'MD(ft)', 'TVD': 'TVD(ft)'}
+HEAT_VALUE_COLUMNS = {'u_value': 'U value', 'temperature': 'Ambient Temperature'}
+
+# Valid value ranges checked on import
+INCLINATION_RANGE = (0.0, 180.0)
+AZIMUTH_RANGE = (0.0, 360.0)
+
+# Header names recognised for each column role (lower case, letters and digits only), in order
+# of preference; a generic depth curve is accepted for either depth when no better match exists
+_DEPTH_ALIASES = ('depth', 'dept', 'dep')
+_ALIASES = {
+    'md': ('md', 'mdft', 'measureddepth', 'mdepth') + _DEPTH_ALIASES,
+    'tvd': ('tvd', 'tvdft', 'trueverticaldepth') + _DEPTH_ALIASES,
+    'inclination': ('angle', 'inc', 'incl', 'inclination', 'dev', 'devi'),
+    'azimuth': ('azimuth', 'azi', 'azim', 'az', 'hazi'),
+    'temperature': ('ambienttemperature', 'temperature', 'temp', 'tem', 'dts', 'ambienttemp'),
+    'u_value': ('uvalue', 'u', 'htc'),
+}
+_DEPTH_ROLES = ('md', 'tvd')
+_METRE_UNITS = ('m', 'meter', 'meters', 'metre', 'metres')
+_CELSIUS_UNITS = ('c', 'degc', 'celsius', 'degreesc')
+
+_UNIT_IN_HEADER = re.compile(r'^(.*?)\s*[\(\[]([^\)\]]*)[\)\]]\s*$')
+
+
+def _normalize(text):
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+def _split_header(text):
+    """(normalized name, normalized unit) of a CSV header such as 'MD (ft)' or 'TEMP[degC]'"""
+    match = _UNIT_IN_HEADER.match(text.strip())
+    if match:
+        return _normalize(match.group(1)), _normalize(match.group(2))
+    return _normalize(text), ''
+def _find_columns(names, roles, required):
+    """
+    {role: column position} for the roles found among the normalized column `names`.
+    Raises ValueError naming the columns present when a required role has no match.
+    """
+    found = {}
+    for role in roles:
+        for alias in _ALIASES[role]:
+            if alias in names and names.index(alias) not in found.values():
+                found[role] = names.index(alias)
+                break
+    missing = [role for role in required if role not in found]
+    if missing:
+        raise ValueError(f"No {', '.join(missing)} column found (columns in file: {', '.join(names) or 'none'})")
+    return found
+def _conversion(role, unit):
+    """(scale, offset, description) converting a column to the app's units, or None"""
+    if role in _DEPTH_ROLES and unit in _METRE_UNITS:
+        return FT_PER_M, 0.0, f"{role.upper()} m → ft"
+    if role == 'temperature' and unit in _CELSIUS_UNITS:
+        return 1.8, 32.0, "temperature °C → °F"
+    return None
+@contextmanager
+def _text_handle(file):
+    """Text stream for a path or a binary/text file object (such as an uploaded file)"""
+    if isinstance(file, (str, bytes)) or hasattr(file, '__fspath__'):
+        with open(file, 'r', encoding='utf-8', errors='replace', newline='') as handle:
+            yield handle
+        return
+    if isinstance(file, io.TextIOBase):
+        yield file
+        return
+    file.seek(0)
+    handle = io.TextIOWrapper(file, encoding='utf-8', errors='replace', newline='')
+    try:
+        yield handle
+    finally:
+        handle.detach()  # leave the caller's file open
+def _next_line(handle):
+    """First line that is neither blank nor a '#' comment ('' at the end of the file)"""
+    while True:
+        line = handle.readline()
+        if not line or (line.strip() and not line.lstrip().startswith('#')):
+            return line
+def _split_fields(line, delimiter):
+    if delimiter is None:
+        return line.split()
+    return next(csv.reader([line], delimiter=delimiter))
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+def _csv_layout(handle, first_line):
+    """
+    Delimiter, normalized column names and units of a CSV file from its header line. A units
+    line directly below the header (no numeric field) is read too; otherwise the stream is left
+    at the first data line.
+    """
+    counts = {delimiter: first_line.count(delimiter) for delimiter in (',', ';', '\t', '|')}
+    delimiter = max(counts, key=counts.get)
+    if counts[delimiter] == 0:
+        delimiter = None  # whitespace separated
+    names, units = zip(*(_split_header(field) for field in _split_fields(first_line, delimiter)))
+    units = list(units)
+
+    position = handle.tell()
+    line = handle.readline()
+    fields = _split_fields(line, delimiter) if line.strip() else []
+    if fields and not any(_is_number(field) for field in fields):
+        units = [unit or _normalize(field) for unit, field in zip(units, fields + [''] * len(units))]
+    else:
+        handle.seek(position)
+    return delimiter, list(names), units
+def _las_layout(handle):
+    """
+    Curve mnemonics, their units and the null value from the header sections of a LAS 2.0 file,
+    leaving the stream at the first line of the ~A (data) section.
+    """
+    section = None
+    names, units = [], []
+    null_value = None
+    while True:
+        line = handle.readline()
+        if not line:
+            raise ValueError("No ~A (data) section in LAS file")
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        if stripped.startswith('~'):
+            section = stripped[1:2].upper()
+            if section == 'A':
+                break
+            continue
+        mnemonic, _, rest = stripped.partition('.')
+        unit = '' if not rest or rest[0].isspace() else rest.split(None, 1)[0].split(':')[0]
+        value = rest[len(unit):].partition(':')[0].strip()
+        if section == 'W' and mnemonic.strip().upper() == 'NULL' and _is_number(value):
+            null_value = float(value)
+        elif section == 'W' and mnemonic.strip().upper() == 'WRAP' and value.upper() == 'YES':
+            raise ValueError("Wrapped LAS files are not supported")
+        elif section == 'C':
+            names.append(_normalize(mnemonic))
+            units.append(_normalize(unit))
+    return names, units, null_value
+def _is_las(file, first_line):
+    name = getattr(file, 'name', file if isinstance(file, str) else '')
+    return str(name).lower().endswith('.las') or first_line.lstrip().startswith('~')
+def read_columns(file, roles, required, progress_callback=None):
+    """
+    Columns of a CSV or LAS file for the given roles ('md', 'tvd', 'inclination', 'azimuth',
+    'temperature', 'u_value'), parsed in chunks of CHUNK_ROWS rows and converted to ft and °F.
+    `file` is a path or a file object; progress_callback(rows read) is called after each chunk.
+    Returns {'columns': {role: float array}, 'rows', 'chunks', 'format', 'conversions'}.
+    Raises ValueError when the file has no usable header or lacks a required column.
+    """
+    with _text_handle(file) as handle:
+        first_line = _next_line(handle)
+        if not first_line:
+            raise ValueError("The file is empty")
+        if _is_las(file, first_line):
+            handle.seek(0)
+            names, units, null_value = _las_layout(handle)
+            file_format, options = 'LAS', {'sep': r'\s+', 'comment': '#'}
+        else:
+            delimiter, names, units = _csv_layout(handle, first_line)
+            null_value = None
+            file_format = 'CSV'
+            options = {'sep': delimiter or r'\s+', 'skipinitialspace': True, 'comment': '#'}
+        positions = _find_columns(names, roles, required)
+
+        parts = {role: [] for role in positions}
+        rows = chunks = 0
+        usecols = sorted(positions.values())
+        try:
+            with pd.read_csv(handle, header=None, usecols=usecols, chunksize=CHUNK_ROWS, **options) as reader:
+                for chunk in reader:
+                    for role, position in positions.items():
+                        parts[role].append(pd.to_numeric(chunk[position], errors='coerce').to_numpy(dtype=float))
+                    rows += len(chunk)
+                    chunks += 1
+                    if progress_callback is not None:
+                        progress_callback(rows)
+        except pd.errors.EmptyDataError:
+            pass  # header only: no data rows
+
+    columns, conversions = {}, []
+    for role, position in positions.items():
+        values = np.concatenate(parts[role]) if parts[role] else np.empty(0)
+        if null_value is not None:
+            values[values == null_value] = np.nan
+        conversion = _conversion(role, units[position] if position < len(units) else '')
+        if conversion is not None:
+            scale, offset, description = conversion
+            values = values * scale + offset
+            conversions.append(description)
+        columns[role] = values
+    return {'columns': columns, 'rows': rows, 'chunks': chunks, 'format': file_format, 'conversions': conversions}
+def validate_table(table, depth_column, ranges=None):
+    """
+    Problems found in an imported table, as messages ([] when it is valid): missing or
+    non-numeric values, negative or not strictly increasing depths and values outside `ranges`
+    ({column: (low, high)}, columns the table lacks are skipped). The checks are vectorized over
+    whole columns; each message gives the number of offending rows and the first one (1-based
+    data row).
+    """
+    problems = []
+    for column in table.columns:
+        missing = np.flatnonzero(np.isnan(table[column].to_numpy(dtype=float)))
+        if missing.size:
+            problems.append(f"{column}: {missing.size:,} missing or non-numeric values (first in row {missing[0] + 1:,})")
+
+    depth = table[depth_column].to_numpy(dtype=float)
+    negative = np.flatnonzero(depth < 0)
+    if negative.size:
+        problems.append(f"{depth_column}: {negative.size:,} negative depths (first in row {negative[0] + 1:,})")
+    not_increasing = np.flatnonzero(np.diff(depth) <= 0)
+    if not_increasing.size:
+        i = not_increasing[0]
+        problems.append(f"{depth_column} must increase from row to row: {not_increasing.size:,} rows do not "
+                        f"(first in row {i + 2:,}, {depth[i + 1]:g} after {depth[i]:g})")
+
+    for column, (low, high) in (ranges or {}).items():
+        if column not in table.columns:
+            continue
+        values = table[column].to_numpy(dtype=float)
+        outside = np.flatnonzero((values < low) | (values > high))
+        if outside.size:
+            problems.append(f"{column}: {outside.size:,} values outside {low:g} to {high:g} "
+                            f"(first in row {outside[0] + 1:,}: {values[outside[0]]:g})")
+    return problems
+def _build_table(data, layout, depth_column, ranges, drop_missing, start):
+    """Validated table with the `layout` ({role: column}) columns read, as an import result"""
+    table = pd.DataFrame({column: data['columns'][role] for role, column in layout.items() if role in data['columns']})
+    dropped = 0
+    if drop_missing and len(table):
+        complete = ~np.isnan(table.to_numpy(dtype=float)).any(axis=1)
+        dropped = int((~complete).sum())
+        if dropped:
+            table = table[complete].reset_index(drop=True)
+    if table.empty:
+        raise ValueError("The file has no data rows")
+    problems = validate_table(table, depth_column, ranges)
+    if problems:
+        raise ValueError("\n".join(problems))
+    return {
+        'table': table,
+        'rows': len(table),
+        'dropped': dropped,
+        'chunks': data['chunks'],
+        'format': data['format'],
+        'conversions': data['conversions'],
+        'wall_s': time.perf_counter() - start
+    }
+def import_survey(file, survey_type='3D', drop_missing=False, progress_callback=None):
+    """
+    Survey stations (MD, Angle and, for 3D surveys, Azimuth) from a CSV or LAS file, validated
+    for a compute_survey() table. Rows with a missing value are dropped when drop_missing is set,
+    otherwise they fail validation.
+    Returns {'table', 'rows', 'dropped', 'chunks', 'format', 'conversions', 'wall_s'}; raises
+    ValueError listing the problems when the file cannot be used.
+    """
+    start = time.perf_counter()
+    layout = {'md': MD_COLUMN, 'inclination': ANGLE_COLUMN}
+    ranges = {ANGLE_COLUMN: INCLINATION_RANGE}
+    if survey_type == '3D':
+        layout['azimuth'] = AZIMUTH_COLUMN
+        ranges[AZIMUTH_COLUMN] = AZIMUTH_RANGE
+    data = read_columns(file, list(layout), list(layout), progress_callback)
+    return _build_table(data, layout, MD_COLUMN, ranges, drop_missing, start)
+def import_depth_table(file, depth='MD', drop_missing=False, progress_callback=None):
+    """
+    MD or TVD heat transfer table (depth with U value and/or Ambient Temperature) from a CSV or
+    LAS file, such as a DTS temperature log. See import_survey for drop_missing and the result.
+    """
+    start = time.perf_counter()
+    depth_role = depth.lower()
+    layout = dict({depth_role: HEAT_DEPTH_COLUMNS[depth]}, **HEAT_VALUE_COLUMNS)
+    data = read_columns(file, list(layout), [depth_role], progress_callback)
+    if not set(HEAT_VALUE_COLUMNS) & set(data['columns']):
+        raise ValueError("No Ambient Temperature or U value column found")
+    return _build_table(data, layout, HEAT_DEPTH_COLUMNS[depth], {HEAT_VALUE_COLUMNS['u_value']: (0.0, np.inf)},
+                        drop_missing, start)
@@ -0,0 +1,202 @@
+"""
+Inflow performance relationship (IPR) models shared by the Completions, Nodal Analysis and
+sensitivity views. Every model evaluates on NumPy arrays in both directions: rate(pwf) gives
+the liquid rate (STB/D) for flowing bottomhole pressures (psi) and pwf(q) is its analytic inverse.
+"""
+import numpy as np
+
+
+# Names the completions manager has stored for each model, mapped to the registry name
+IPR_MODEL_ALIASES = {
+    'Fetkovitch': 'Fetkovich',
+}
+
+
+def canonical_ipr_model(name):
+    """Registry name for an IPR model label, accepting older spellings"""
+    return IPR_MODEL_ALIASES.get(name, name)
+def composite_bubble_point(fluid_data, reservoir_pressure, reservoir_temperature):
+    """
+    Bubble point used by the composite PI/Vogel model (Standing correlation), limited to
+    100 psi .. 95% of reservoir pressure. Falls back to 80% of reservoir pressure without fluid data.
+    """
+    if not fluid_data:
+        return reservoir_pressure * 0.8
+    GOR = fluid_data.get('GOR', 500)
+    gas_specific_gravity = fluid_data.get('gas_specific_gravity', 0.85)
+    API = fluid_data.get('API', 35)
+    try:
+        gamma_o = 141.5 / (API + 131.5)
+        pb = 18.2 * ((GOR * gas_specific_gravity) / gamma_o)**0.83 * \
+            10**(0.00091 * reservoir_temperature - 0.0125 * API)
+        return max(100, min(pb, reservoir_pressure * 0.95))
+    except (ArithmeticError, TypeError, ValueError):
+        return reservoir_pressure * 0.8
+class WellPI:
+    """Straight-line productivity index: Q = J (P_ws - P_wf)"""
+    name = 'Well PI'
+
+    def __init__(self, reservoir_pressure, productivity_index):
+        self.reservoir_pressure = reservoir_pressure
+        self.productivity_index = productivity_index
+
+    @property
+    def aof(self):
+        return self.productivity_index * self.reservoir_pressure
+
+    def rate(self, pwf):
+        return np.maximum(0, self.productivity_index * (self.reservoir_pressure - np.asarray(pwf, dtype=float)))
+
+    def pwf(self, q):
+        if self.productivity_index <= 0:
+            return np.where(np.asarray(q, dtype=float) > 0, 0.0, self.reservoir_pressure)
+        return np.clip(self.reservoir_pressure - np.asarray(q, dtype=float) / self.productivity_index,
+                       0, self.reservoir_pressure)
+class CompositeVogel(WellPI):
+    """
+    Straight-line PI above the bubble point and Vogel below it:
+    Q = Q_b + (J P_b / 1.8) [1 - 0.2 (P_wf/P_b) - 0.8 (P_wf/P_b)^2] for P_wf < P_b
+    """
+    name = 'Well PI + Vogel'
+
+    def __init__(self, reservoir_pressure, productivity_index, bubble_point):
+        super().__init__(reservoir_pressure, productivity_index)
+        self.bubble_point = bubble_point
+
+    @property
+    def qb(self):
+        """Rate at the bubble point"""
+        return self.productivity_index * (self.reservoir_pressure - self.bubble_point)
+
+    @property
+    def vogel_rate(self):
+        """Additional rate available below the bubble point"""
+        return self.productivity_index * self.bubble_point / 1.8
+
+    @property
+    def aof(self):
+        return self.qb + self.vogel_rate
+
+    def rate(self, pwf):
+        pwf = np.asarray(pwf, dtype=float)
+        ratio = pwf / self.bubble_point
+        below = self.qb + self.vogel_rate * (1 - 0.2 * ratio - 0.8 * ratio**2)
+        return np.maximum(0, np.where(pwf < self.bubble_point, below, super().rate(pwf)))
+
+    def pwf(self, q):
+        q = np.asarray(q, dtype=float)
+        if self.vogel_rate <= 0:
+            return super().pwf(q)
+        # Root of 0.8 r^2 + 0.2 r - (1 - x) = 0 in the form that stays accurate as x -> 1
+        x = np.clip(1 - (q - self.qb) / self.vogel_rate, 0, None)
+        below = self.bubble_point * 2 * x / (0.2 + np.sqrt(0.04 + 3.2 * x))
+        return np.where(q > self.qb, below, super().pwf(q))
+class Vogel:
+    """Vogel with a general coefficient: Q = Q_max [1 - (1-C) (P_wf/P_ws) - C (P_wf/P_ws)^2]"""
+    name = 'Vogel'
+
+    def __init__(self, reservoir_pressure, max_flow_rate, vogel_coefficient=0.2):
+        self.reservoir_pressure = reservoir_pressure
+        self.max_flow_rate = max_flow_rate
+        self.vogel_coefficient = vogel_coefficient
+
+    @property
+    def aof(self):
+        return self.max_flow_rate
+
+    def rate(self, pwf):
+        ratio = np.asarray(pwf, dtype=float) / self.reservoir_pressure
+        c = self.vogel_coefficient
+        return np.maximum(0, self.max_flow_rate * (1 - (1 - c) * ratio - c * ratio**2))
+
+    def pwf(self, q):
+        c = self.vogel_coefficient
+        # Root of C r^2 + (1-C) r - (1 - x) = 0, written so that C = 0 reduces to the linear case
+        x = np.clip(1 - np.asarray(q, dtype=float) / self.max_flow_rate, 0, 1)
+        denominator = (1 - c) + np.sqrt((1 - c)**2 + 4 * c * x)
+        # At the AOF (x = 0) the root is 0, also for C = 1 where the denominator vanishes too
+        ratio = np.where(x > 0, 2 * x / np.where(x > 0, denominator, 1.0), 0.0)
+        return self.reservoir_pressure * ratio
+class Fetkovich:
+    """Fetkovich back-pressure equation: Q = Q_max [1 - (P_wf/P_ws)^2]^n"""
+    name = 'Fetkovich'
+
+    def __init__(self, reservoir_pressure, max_flow_rate, fetkovich_exponent=1.0):
+        if not fetkovich_exponent > 0:
+            raise ValueError(f"Fetkovich exponent must be positive, got {fetkovich_exponent}")
+        self.reservoir_pressure = reservoir_pressure
+        self.max_flow_rate = max_flow_rate
+        self.fetkovich_exponent = fetkovich_exponent
+
+    @property
+    def aof(self):
+        return self.max_flow_rate
+
+    def rate(self, pwf):
+        ratio = np.asarray(pwf, dtype=float) / self.reservoir_pressure
+        return self.max_flow_rate * np.maximum(0, 1 - ratio**2)**self.fetkovich_exponent
+
+    def pwf(self, q):
+        x = np.clip(np.asarray(q, dtype=float) / self.max_flow_rate, 0, 1)
+        return self.reservoir_pressure * np.sqrt(1 - x**(1 / self.fetkovich_exponent))
+class Jones:
+    """Jones, Blount and Glaze: P_ws - P_wf = A Q + B Q^2"""
+    name = 'Jones'
+
+    def __init__(self, reservoir_pressure, jones_coefficient_a=0.5, jones_coefficient_b=0.001):
+        self.reservoir_pressure = reservoir_pressure
+        self.a = jones_coefficient_a
+        self.b = jones_coefficient_b
+
+    @property
+    def aof(self):
+        return float(self.rate(0.0))
+
+    def rate(self, pwf):
+        drawdown = np.maximum(0, self.reservoir_pressure - np.asarray(pwf, dtype=float))
+        if self.b > 0:
+            # Positive root of B Q^2 + A Q - drawdown = 0, rationalized to avoid cancellation
+            return 2 * drawdown / (self.a + np.sqrt(self.a**2 + 4 * self.b * drawdown))
+        if self.a > 0:
+            return drawdown / self.a
+        return np.zeros_like(drawdown)
+
+    def pwf(self, q):
+        q = np.asarray(q, dtype=float)
+        return np.clip(self.reservoir_pressure - (self.a * q + self.b * q**2), 0, self.reservoir_pressure)
+# IPR models by the name stored in a completion's basic_info['ipr_model']
+IPR_MODELS = {
+    'Well PI': WellPI,
+    'Vogel': Vogel,
+    'Fetkovich': Fetkovich,
+    'Jones': Jones,
+}
+
+
+def ipr_from_completion(completion_data, fluid_data=None):
+    """
+    IPR model for a completion, built from its reservoir parameters.
+    'Well PI' with use_vogel_below_bubble_point becomes the composite PI/Vogel model, with the
+    bubble point taken from fluid_data.
+    """
+    name = canonical_ipr_model(completion_data['basic_info']['ipr_model'])
+    reservoir = completion_data['reservoir']
+    reservoir_pressure = reservoir.get('reservoir_pressure', 3000)
+
+    if name == 'Vogel':
+        return Vogel(reservoir_pressure, reservoir.get('max_flow_rate', 1000.0),
+                     reservoir.get('vogel_coefficient', 0.2))
+    if name == 'Fetkovich':
+        return Fetkovich(reservoir_pressure, reservoir.get('max_flow_rate', 1000.0),
+                         reservoir.get('fetkovich_exponent', 1.0))
+    if name == 'Jones':
+        return Jones(reservoir_pressure, reservoir.get('jones_coefficient_a', 0.5),
+                     reservoir.get('jones_coefficient_b', 0.001))
+    if name not in IPR_MODELS:
+        raise ValueError(f"Unknown IPR model '{name}'. Available: {', '.join(IPR_MODELS)}")
+
+    productivity_index = reservoir.get('productivity_index', 1.0)
+    if reservoir.get('use_vogel_below_bubble_point', False):
+        pb = composite_bubble_point(fluid_data, reservoir_pressure, reservoir.get('reservoir_temperature', 180))
+        return CompositeVogel(reservoir_pressure, productivity_index, pb)
+    return WellPI(reservoir_pressure, productivity_index)
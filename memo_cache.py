@@ -0,0 +1,151 @@
+"""
+Bounded LRU memoization for the nodal analysis kernels.
+Arguments are reduced to a canonical, hashable key: fluid property dicts are fingerprinted by
+their sorted items, floats and NumPy arrays are rounded to a fixed number of decimals, and
+DataFrames are keyed on their columns and values. Each cache keeps hit/miss/eviction counters.
+Calls with an argument that has no canonical form are not cached. Caches are locked, as the
+app's script threads share them.
+input_fingerprint() turns the same canonical form into a stable hash for caches outside this
+module, such as the app's st.cache_data entries.
+"""
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+_CACHES = {}
+
+
+class UncacheableArgument(TypeError):
+    """An argument has no canonical form to key a cache on"""
+def _canonical(value, decimals):
+    """Hashable, quantized representation of a function argument"""
+    if isinstance(value, (bool, np.bool_)) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), decimals)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in 'fc':
+            value = np.round(value, decimals)
+        return ('ndarray', value.shape, str(value.dtype), value.tobytes())
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((str(k), _canonical(v, decimals)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_canonical(v, decimals) for v in value))
+    if hasattr(value, 'columns') and hasattr(value, 'to_numpy'):  # pandas DataFrame
+        return ('DataFrame', tuple(value.columns),
+                tuple(tuple(_canonical(v, decimals) for v in row) for row in value.to_numpy().tolist()))
+    if hasattr(value, 'fingerprint'):  # PVT tables are identified by the fluid inputs they were built from
+        return ('fingerprint', value.fingerprint)
+    # An object's id() can be reused once it is freed, so it cannot identify an argument
+    raise UncacheableArgument(f"No cache key for a {type(value).__name__} argument")
+def _copy_result(result):
+    """Copy mutable results so callers cannot modify what is stored in the cache"""
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    if isinstance(result, dict):
+        return {k: _copy_result(v) for k, v in result.items()}
+    if isinstance(result, tuple):
+        return tuple(_copy_result(v) for v in result)
+    if isinstance(result, list):
+        return [_copy_result(v) for v in result]
+    return result
+class LRUCache:
+    """Ordered dict with a size bound and hit/miss/eviction counters, safe to share between threads"""
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            hits, misses, evictions, size = self.hits, self.misses, self.evictions, len(self._data)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'size': size,
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+_MISSING = object()
+def memoize(maxsize=1024, decimals=6):
+    """
+    Decorator that memoizes a function in a bounded LRU cache.
+    Numeric inputs are rounded to `decimals` places before keying, so values that only differ
+    by float noise share an entry. Calls with an argument that has no canonical form run
+    uncached. The wrapped function gains cache_info() and cache_clear().
+    """
+    def decorator(func):
+        cache = LRUCache(maxsize)
+        _CACHES[func.__qualname__] = cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = (_canonical(args, decimals), _canonical(kwargs, decimals))
+            except UncacheableArgument:
+                return func(*args, **kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.put(key, result)
+            return _copy_result(result)
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+def cache_stats():
+    """Hit/miss/eviction counters for every memoized function, keyed by function name"""
+    return {name: cache.info() for name, cache in _CACHES.items()}
+def clear_all_caches():
+    """Empty every memoized function's cache"""
+    for cache in _CACHES.values():
+        cache.clear()
+def input_fingerprint(*values, decimals=6):
+    """
+    Stable SHA-256 hex digest of the canonical form of values: inputs that would share a
+    memoize() entry share a fingerprint, across reruns and processes. Raises
+    UncacheableArgument for a value that has no canonical form.
+    """
+    return hashlib.sha256(repr(_canonical(values, decimals)).encode()).hexdigest()
@@ -0,0 +1,201 @@
+"""
+Compressed binary project files (.wdp), an alternative to the session JSON written by
+save_session_state. A project is a zip archive holding:
+- manifest.json: the session state with every DataFrame and numeric array replaced by a reference
+- one member per numeric DataFrame column and per numeric array, as .npy typed arrays
+- one JSON member per non-numeric (text/object) column
+Loading reads the manifest and maps each .npy member straight back to an array, so tables and
+results are rebuilt without converting element by element. The loaded state has the same keys
+as a session JSON, with DataFrames and NumPy arrays where the JSON has dicts and lists.
+open_project() reads only the manifest and decodes each top-level key when it is first asked for.
+"""
+import io
+import json
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+PROJECT_FORMAT = 'wdp'
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = '.wdp'
+
+# Array dtypes stored as raw .npy members; anything else is written as JSON
+_NUMERIC_KINDS = 'biuf'
+
+# Python types a value written as JSON may have (numpy scalars are converted to them first)
+_JSON_TYPES = (str, int, float, bool, type(None))
+
+
+def _array_bytes(values):
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(values), allow_pickle=False)
+    return buffer.getvalue()
+def _json_value(value, where):
+    """
+    Plain Python value for a numpy scalar (element-wise in lists and dicts). Raises ValueError
+    naming `where` (the session key path) for values JSON cannot hold, rather than json's
+    TypeError from deep inside the dump.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v, where) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _json_value(v, where) for k, v in value.items()}
+    if not isinstance(value, _JSON_TYPES):
+        raise ValueError(f"Cannot save {where}: {type(value).__name__} values are not supported in a project file")
+    return value
+class _Writer:
+    """Collects archive members while the session state is encoded into the manifest"""
+    def __init__(self):
+        self.members = {}
+
+    def _add(self, data, suffix):
+        name = f'data/{len(self.members)}{suffix}'
+        self.members[name] = data
+        return name
+
+    def column(self, values, where):
+        values = np.asarray(values)
+        if values.dtype.kind in _NUMERIC_KINDS:
+            return {'npy': self._add(_array_bytes(values), '.npy')}
+        return {'json': self._add(json.dumps([_json_value(v, where) for v in values.tolist()]).encode(), '.json')}
+
+    def table(self, df, where):
+        if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1:
+            index = None
+        else:
+            index = self.column(df.index.to_numpy(), f"{where} index")
+        return {
+            '__table__': {
+                'columns': [str(c) for c in df.columns],
+                'dtypes': [str(t) for t in df.dtypes],
+                'data': [self.column(df[c].to_numpy(), f"{where} column '{c}'") for c in df.columns],
+                'index': index,
+                'rows': len(df)
+            }
+        }
+
+    def encode(self, obj, where='state'):
+        """Manifest form of a session value; `where` is its key path, for error messages"""
+        if isinstance(obj, pd.DataFrame):
+            return self.table(obj, where)
+        if isinstance(obj, np.ndarray):
+            if obj.dtype.kind in _NUMERIC_KINDS:
+                return {'__array__': self._add(_array_bytes(obj), '.npy')}
+            return [self.encode(v, f"{where}[{i}]") for i, v in enumerate(obj.tolist())]
+        if isinstance(obj, dict):
+            return {str(k): self.encode(v, f"{where}['{k}']") for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [self.encode(v, f"{where}[{i}]") for i, v in enumerate(obj)]
+        return _json_value(obj, where)
+def save_project(state, file, compresslevel=6):
+    """
+    Write session state (the dict save_session_state builds, or the same keys holding DataFrames
+    and NumPy arrays) to a .wdp project. `file` is a path or a writable binary file object.
+    Raises ValueError naming the key of a value that is not a table, array, number, string,
+    bool, None or container of them; nothing is written in that case.
+    """
+    writer = _Writer()
+    manifest = {
+        'format': PROJECT_FORMAT,
+        'version': PROJECT_VERSION,
+        'state': writer.encode(state)
+    }
+    with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        archive.writestr('manifest.json', json.dumps(manifest))
+        for name, data in writer.members.items():
+            archive.writestr(name, data)
+def project_bytes(state, compresslevel=6):
+    """A .wdp project as bytes, e.g. for a download button"""
+    buffer = io.BytesIO()
+    save_project(state, buffer, compresslevel)
+    return buffer.getvalue()
+class _Reader:
+    """Rebuilds manifest references from the archive members"""
+    def __init__(self, archive):
+        self.archive = archive
+
+    def column(self, ref):
+        if 'npy' in ref:
+            return np.load(io.BytesIO(self.archive.read(ref['npy'])), allow_pickle=False)
+        return np.array(json.loads(self.archive.read(ref['json'])), dtype=object)
+
+    def table(self, spec):
+        index = self.column(spec['index']) if spec['index'] is not None else None
+        columns = {name: self.column(ref) for name, ref in zip(spec['columns'], spec['data'])}
+        df = pd.DataFrame(columns, index=index)
+        if not columns:
+            df = pd.DataFrame(columns=[], index=index if index is not None else pd.RangeIndex(spec['rows']))
+        for name, dtype in zip(spec['columns'], spec['dtypes']):
+            if dtype != str(df[name].dtype):
+                try:
+                    df[name] = df[name].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return df
+
+    def decode(self, obj):
+        if isinstance(obj, dict):
+            if '__table__' in obj and len(obj) == 1:
+                return self.table(obj['__table__'])
+            if '__array__' in obj and len(obj) == 1:
+                return np.load(io.BytesIO(self.archive.read(obj['__array__'])), allow_pickle=False)
+            return {k: self.decode(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.decode(v) for v in obj]
+        return obj
+def read_manifest(archive):
+    """Manifest of an open project archive, checking its format and version"""
+    manifest = json.loads(archive.read('manifest.json'))
+    if manifest.get('format') != PROJECT_FORMAT:
+        raise ValueError("Not a well design project file")
+    if manifest.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f"Project file version {manifest['version']} is newer than this app supports "
+                         f"({PROJECT_VERSION})")
+    return manifest
+def load_project(file):
+    """
+    Session state from a .wdp project (path or readable binary file object), in the layout of a
+    session JSON with DataFrames for tables and NumPy arrays for numeric results.
+    """
+    with zipfile.ZipFile(file) as archive:
+        manifest = read_manifest(archive)
+        return _Reader(archive).decode(manifest['state'])
+class LazyProject:
+    """
+    A project whose top-level session keys are decoded on demand. Only the (compressed) file
+    bytes and the manifest are held; get() decodes a key's tables and arrays each time it is
+    called and pop() decodes it once and forgets it.
+    """
+    def __init__(self, data):
+        self._archive = zipfile.ZipFile(io.BytesIO(data))
+        self._state = read_manifest(self._archive)['state']
+        self._reader = _Reader(self._archive)
+
+    def __contains__(self, key):
+        return key in self._state
+
+    def keys(self):
+        return self._state.keys()
+
+    def get(self, key, default=None):
+        if key not in self._state:
+            return default
+        return self._reader.decode(self._state[key])
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        self._state.pop(key, None)
+        return value
+def open_project(file):
+    """LazyProject for a .wdp project (path or readable binary file object)"""
+    if hasattr(file, 'read'):
+        return LazyProject(file.read())
+    with open(file, 'rb') as f:
+        return LazyProject(f.read())
+def is_project_file(file):
+    """True for a .wdp project (zip archive) rather than session JSON"""
+    return zipfile.is_zipfile(file)
@@ -0,0 +1,282 @@
+"""
+Sensitivity sweeps over the nodal analysis operating point.
+solve_sensitivity_case() solves one parameter value; run_sensitivity() evaluates a whole sweep,
+either in-process or on a process pool with results streamed back chunk by chunk.
+run_sweep() does the same for multi-parameter case sets built by factorial_design() or
+latin_hypercube_design(), returning a columnar table of case parameters and operating points.
+Workers import this module rather than the Streamlit script, so everything sent to them is
+plain data: DataFrames, fluid/completion dicts, IPR models and floats.
+"""
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from nodal_analysis import calculate_vlp_vectorized, find_operating_point
+from pvt_tables import get_pvt_table
+from ipr_models import ipr_from_completion
+
+
+# Tubing column changed by each sensitivity parameter
+TUBING_PARAMETERS = {
+    'Tubing ID': 'ID(in)',
+    'Tubing Roughness': 'Roughness(in)',
+}
+
+# Parameters a multi-parameter sweep can vary: which part of the base case each one changes, and the key in it
+SWEEP_PARAMETERS = {
+    'Tubing ID': ('tubing_data', 'ID(in)'),
+    'Tubing Roughness': ('tubing_data', 'Roughness(in)'),
+    'Wellhead Pressure': ('well', 'outlet_pressure'),
+    'Water Cut': ('fluid_data', 'water_cut'),
+    'GOR': ('fluid_data', 'GOR'),
+    'Reservoir Pressure': ('reservoir', 'reservoir_pressure'),
+}
+
+# Sweep parameters that change the IPR (GOR moves the composite PI/Vogel bubble point)
+IPR_PARAMETERS = ('Reservoir Pressure', 'GOR')
+
+# Parameter values are rounded to the precision the calculation caches key on, so a cached result
+# is always for exactly the same inputs and pooled runs match in-process runs bit for bit
+VALUE_DECIMALS = 6
+
+# Process pool shared by every Streamlit session's script thread, sized to default_worker_count().
+# Workers are started by a fork server: forking the multithreaded Streamlit server is unsafe
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def default_worker_count():
+    """Worker processes used when none is configured: all available cores"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+def apply_tubing_parameter(tubing_data, parameter, value):
+    """Copy of the tubing table with the swept parameter set to value"""
+    if parameter not in TUBING_PARAMETERS:
+        raise ValueError(f"Unknown sensitivity parameter '{parameter}'. Available: {', '.join(TUBING_PARAMETERS)}")
+    modified_tubing_data = tubing_data.copy()
+    modified_tubing_data[TUBING_PARAMETERS[parameter]] = value
+    return modified_tubing_data
+def apply_sweep_case(well, case):
+    """Copy of the base case with each {parameter: value} in case applied"""
+    well = dict(well)
+    copied = set()
+    for parameter, value in case.items():
+        if parameter not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter '{parameter}'. Available: {', '.join(SWEEP_PARAMETERS)}")
+        target, key = SWEEP_PARAMETERS[parameter]
+        if target == 'well':
+            well[key] = value
+            continue
+        if target not in copied:
+            if target == 'tubing_data':
+                well['tubing_data'] = well['tubing_data'].copy()
+            elif target == 'fluid_data':
+                well['fluid_data'] = dict(well['fluid_data'])
+            else:
+                completion = dict(well['completion_data'])
+                completion['reservoir'] = dict(completion['reservoir'])
+                well['completion_data'] = completion
+            copied.add(target)
+        if target == 'tubing_data':
+            well['tubing_data'][key] = value
+        elif target == 'fluid_data':
+            well['fluid_data'][key] = value
+        else:
+            well['completion_data']['reservoir'][key] = value
+    return well
+def solve_case(well, ipr_model=None):
+    """
+    Operating point for a fully specified case.
+    `well` holds tubing_data, casing_data, fluid_data, completion_data, outlet_pressure,
+    reservoir_temp, tubing_shoe_depth, perforation_depth, flow_rates, ipr_q_max and
+    plot_vlp_curves, and optionally the well path geometry (None or absent for a vertical
+    well). The full VLP curve over flow_rates is only computed when plot_vlp_curves is set, and
+    is then also used to bracket the operating point. ipr_model may be passed in when it has
+    already been built for the case's reservoir inputs.
+    Returns a dict with q_op, p_op, vlp_evaluations and vlp_curve (None when not plotted).
+    """
+    tubing_data = well['tubing_data']
+    fluid_data = well['fluid_data']
+    if ipr_model is None:
+        ipr_model = ipr_from_completion(well['completion_data'], fluid_data)
+
+    def vlp_at(q):
+        return calculate_vlp_vectorized(
+            tubing_data, well['casing_data'], fluid_data, well['outlet_pressure'],
+            q, well['reservoir_temp'], well['tubing_shoe_depth'], well['perforation_depth'],
+            pvt_table=get_pvt_table(fluid_data), geometry=well.get('geometry')
+        )
+
+    vlp_curve = None
+    if well.get('plot_vlp_curves', False):
+        vlp_curve = vlp_at(well['flow_rates'])
+        operating_point = find_operating_point(ipr_model.pwf, vlp_at, q_scan=well['flow_rates'], vlp_scan=vlp_curve)
+    else:
+        operating_point = find_operating_point(ipr_model.pwf, vlp_at, well['ipr_q_max'])
+
+    return {
+        'q_op': operating_point['q'],
+        'p_op': operating_point['p'],
+        'vlp_evaluations': operating_point['vlp_evaluations'],
+        'vlp_curve': vlp_curve
+    }
+def solve_sensitivity_case(well, parameter, value):
+    """Operating point for one value of a single tubing parameter (see solve_case for `well`)"""
+    well = dict(well, tubing_data=apply_tubing_parameter(well['tubing_data'], parameter, value))
+    return solve_case(well)
+def _solve_chunk(well, parameter, indexed_values):
+    """Worker task: solve a run of (index, value) cases"""
+    return [(i, solve_sensitivity_case(well, parameter, value)) for i, value in indexed_values]
+def _solve_sweep_chunk(well, indexed_cases):
+    """Worker task: solve a run of (index, case, ipr_model) multi-parameter cases"""
+    results = []
+    for i, case, ipr_model in indexed_cases:
+        result = solve_case(apply_sweep_case(well, case), ipr_model)
+        results.append((i, (result['q_op'], result['p_op'], result['vlp_evaluations'])))
+    return results
+def get_process_pool():
+    """
+    The process pool shared across sweeps and sessions, so workers (and their PVT tables and
+    caches) outlive a single Streamlit rerun. It has default_worker_count() workers; callers
+    limit their own work to the worker count they were asked for (see iter_chunked).
+    A pool broken by a dead worker is replaced; the old one is shut down without cancelling
+    anything still queued on it.
+    """
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None and getattr(_POOL, '_broken', False):
+            _POOL.shutdown(wait=False)
+            _POOL = None
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=default_worker_count(),
+                                        mp_context=multiprocessing.get_context(_POOL_START_METHOD))
+        return _POOL
+def shutdown_process_pool():
+    """Stop the shared worker processes once the work already submitted to them has finished"""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+def iter_chunked(task, args, items, max_workers, chunk_size):
+    """
+    Yield (index, result) from task(*args, chunk) over indexed items.
+    With max_workers <= 1 the items run in this process, in order. Otherwise they are split
+    into chunks (by default about four per worker, to balance load without per-task overhead)
+    and dispatched to the shared process pool, at most max_workers chunks at a time; chunks
+    come back in completion order.
+    """
+    if max_workers is None:
+        max_workers = default_worker_count()
+
+    if max_workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield from task(*args, [item])
+        return
+
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(items) / (4 * max_workers)))
+    pool = get_process_pool()
+    chunks = iter([items[start:start + chunk_size] for start in range(0, len(items), chunk_size)])
+    in_flight = set()
+    try:
+        while True:
+            # Keep up to max_workers of this request's chunks on the pool at once
+            for chunk in chunks:
+                in_flight.add(pool.submit(task, *args, chunk))
+                if len(in_flight) >= max_workers:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+def iter_sensitivity(well, parameter, param_values, max_workers=1, chunk_size=None):
+    """Yield (index, result) for every parameter value as it finishes"""
+    indexed_values = [(i, round(float(value), VALUE_DECIMALS)) for i, value in enumerate(param_values)]
+    yield from iter_chunked(_solve_chunk, (well, parameter), indexed_values, max_workers, chunk_size)
+def run_sensitivity(well, parameter, param_values, max_workers=1, chunk_size=None, progress_callback=None):
+    """
+    Solve every parameter value and return the results in parameter order.
+    progress_callback(completed, total) is called as each result arrives.
+    """
+    results = [None] * len(param_values)
+    for completed, (i, result) in enumerate(
+            iter_sensitivity(well, parameter, param_values, max_workers, chunk_size), start=1):
+        results[i] = result
+        if progress_callback is not None:
+            progress_callback(completed, len(results))
+    return results
+def factorial_design(levels):
+    """
+    Full-factorial case set: every combination of the given levels.
+    levels maps parameter name -> sequence of values; returns parameter name -> array of case values.
+    """
+    names = list(levels)
+    grids = np.meshgrid(*[np.asarray(levels[name], dtype=float) for name in names], indexing='ij')
+    return {name: np.round(grid.ravel(), VALUE_DECIMALS) for name, grid in zip(names, grids)}
+def latin_hypercube_design(bounds, n_cases, seed=None):
+    """
+    Latin-hypercube case set: each parameter's (low, high) range is split into n_cases equal
+    strata, one value is drawn in each, and the strata are paired up by independent shuffles.
+    """
+    rng = np.random.default_rng(seed)
+    cases = {}
+    for name, (low, high) in bounds.items():
+        strata = (rng.permutation(n_cases) + rng.random(n_cases)) / n_cases
+        cases[name] = np.round(low + strata * (high - low), VALUE_DECIMALS)
+    return cases
+def run_sweep(well, cases, max_workers=1, chunk_size=None, progress_callback=None):
+    """
+    Solve a multi-parameter case set (parameter name -> array of values, as returned by the
+    design functions) around the base case `well`.
+    One IPR model is built per distinct combination of IPR_PARAMETERS values and shared by
+    every case using it, and cases are ordered so that those sharing a fluid run in the same
+    batch and reuse its PVT table.
+    Returns a DataFrame with one column per parameter plus q_op, p_op and vlp_evaluations,
+    in the order of the input cases.
+    """
+    names = list(cases)
+    columns = {name: np.asarray(cases[name], dtype=float) for name in names}
+    n_cases = len(columns[names[0]]) if names else 0
+
+    # One IPR per distinct set of reservoir inputs
+    ipr_names = [name for name in names if name in IPR_PARAMETERS]
+    ipr_keys = list(zip(*[columns[name] for name in ipr_names])) if ipr_names else [()] * n_cases
+    ipr_models = {}
+    for key in ipr_keys:
+        if key not in ipr_models:
+            case_well = apply_sweep_case(well, dict(zip(ipr_names, key)))
+            ipr_models[key] = ipr_from_completion(case_well['completion_data'], case_well['fluid_data'])
+
+    # Batch cases that share a fluid (and then an IPR) so workers hit their PVT table cache
+    fluid_names = [name for name, (target, _) in SWEEP_PARAMETERS.items() if target == 'fluid_data' and name in columns]
+    order = np.lexsort([columns[name] for name in reversed(fluid_names + ipr_names)]) if fluid_names + ipr_names \
+        else np.arange(n_cases)
+    items = [(int(i), {name: float(columns[name][i]) for name in names}, ipr_models[ipr_keys[i]]) for i in order]
+
+    q_op = np.full(n_cases, np.nan)
+    p_op = np.full(n_cases, np.nan)
+    vlp_evaluations = np.zeros(n_cases, dtype=np.int32)
+    for completed, (i, (q, p, evaluations)) in enumerate(
+            iter_chunked(_solve_sweep_chunk, (well,), items, max_workers, chunk_size), start=1):
+        q_op[i], p_op[i], vlp_evaluations[i] = q, p, evaluations
+        if progress_callback is not None:
+            progress_callback(completed, n_cases)
+
+    table = pd.DataFrame(columns)
+    table['q_op'] = q_op
+    table['p_op'] = p_op
+    table['vlp_evaluations'] = vlp_evaluations
+    return table
@@ -1,16 +1,25 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from streamlit_option_menu import option_menu
 import numpy as np
 from datetime import datetime
+import functools
 import json
-import pickle
-import base64
-from wellarchitecturedesign import Tubular, Cement, Well, Tubing, Packer
 import os
-from scipy.optimize import fsolve
-from scipy.interpolate import interp1d
+import secrets
+import threading
+import time
+from nodal_analysis import select_flow_path, run_nodal_analysis, well_path_geometry
+from pvt_tables import get_pvt_table
+from ipr_models import IPR_MODELS, canonical_ipr_model, ipr_from_completion
+from batch_nodal import run_field
+from sensitivity import (VALUE_DECIMALS, SWEEP_PARAMETERS, default_worker_count, run_sensitivity, run_sweep,
+                         factorial_design, latin_hypercube_design)
+from memo_cache import cache_stats, clear_all_caches, input_fingerprint
+from stage_timer import StageTimer, total_wall_time
+from project_format import PROJECT_EXTENSION, is_project_file, open_project, project_bytes
+from survey import INPUT_COLUMNS, SURVEY_COLUMNS, DepthIndex, SurveyModel, compute_survey
+from autosave import ProjectJournal, project_directory
+from bulk_import import IMPORT_EXTENSIONS, import_depth_table, import_survey
 # .streamlit/secrets.toml
 password = "3132003"
 import streamlit as st
@@ -155,7 +164,131 @@ if not (st.session_state.show_well_design or st.session_state.show_fluid_manager
     # Add a footer
     st.markdown("---")
     st.caption("Developed during SLB Internship | Inspired by PIPESIM | 2025")
+# --- Cached Analysis Results ---
+# Nodal, sensitivity and sweep results are kept with st.cache_data across reruns and sessions, keyed
+# on memo_cache.input_fingerprint of their inputs. The inputs are passed as underscore arguments so
+# Streamlit does not hash the DataFrames a second time; worker counts and progress bars are not part
+# of the key. A cached function's body only runs on a miss; it marks the miss on a thread-local
+# flag, so each session's script thread tells hits from misses without shared state.
+_cache_miss = threading.local()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_nodal_analysis(cache_key, _args):
+    _cache_miss.computed = True
+    return run_nodal_analysis(*_args)
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_sensitivity(cache_key, _base_case, _parameter, _param_values, _max_workers, _progress_callback):
+    _cache_miss.computed = True
+    return run_sensitivity(_base_case, _parameter, _param_values, max_workers=_max_workers,
+                           progress_callback=_progress_callback)
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_sweep(cache_key, _base_case, _cases, _max_workers, _progress_callback):
+    _cache_miss.computed = True
+    return run_sweep(_base_case, _cases, max_workers=_max_workers, progress_callback=_progress_callback)
+def _start_cache_lookup():
+    """Reset the miss flag before calling a cached function; returns the start time"""
+    _cache_miss.computed = False
+    return time.perf_counter()
+def _record_cache_status(name, cache_key, start):
+    """Note whether the latest `name` result came from the cache, for the cache status indicator"""
+    status = {
+        'key': cache_key[:12],
+        'hit': not getattr(_cache_miss, 'computed', False),
+        'wall_s': time.perf_counter() - start,
+        'time': datetime.now().strftime("%H:%M:%S")
+    }
+    st.session_state.setdefault('analysis_cache_status', {})[name] = status
+    return status
+def cached_nodal_analysis(*args):
+    """run_nodal_analysis through the result cache; a hit's timings show only the cache lookup"""
+    cache_key = input_fingerprint('nodal', *args)
+    start = _start_cache_lookup()
+    results = _cached_nodal_analysis(cache_key, args)
+    status = _record_cache_status('Nodal analysis', cache_key, start)
+    if status['hit']:
+        results['timings'] = {'Cache lookup': {'wall_s': status['wall_s'], 'calls': 1, 'iterations': 0}}
+    return results
+def cached_sensitivity(base_case, parameter, param_values, max_workers=1, progress_callback=None):
+    """run_sensitivity through the result cache"""
+    cache_key = input_fingerprint('sensitivity', base_case, parameter, np.asarray(param_values, dtype=float))
+    start = _start_cache_lookup()
+    case_results = _cached_sensitivity(cache_key, base_case, parameter, param_values, max_workers, progress_callback)
+    _record_cache_status('Sensitivity', cache_key, start)
+    return case_results
+def cached_sweep(base_case, cases, max_workers=1, progress_callback=None):
+    """run_sweep through the result cache"""
+    cache_key = input_fingerprint('sweep', base_case, cases)
+    start = _start_cache_lookup()
+    sweep_table = _cached_sweep(cache_key, base_case, cases, max_workers, progress_callback)
+    _record_cache_status('Sweep', cache_key, start)
+    return sweep_table
+def clear_result_caches():
+    """Drop cached analysis results and the kernel memo caches"""
+    _cached_nodal_analysis.clear()
+    _cached_sensitivity.clear()
+    _cached_sweep.clear()
+    clear_all_caches()
+    st.session_state.analysis_cache_status = {}
+def show_cache_status(names):
+    """Cache status of the latest results under `names`, with a control to invalidate the cache"""
+    statuses = st.session_state.get('analysis_cache_status', {})
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        for name in names:
+            status = statuses.get(name)
+            if status is None:
+                continue
+            if status['hit']:
+                st.caption(f"⚡ {name}: served from cache in {status['wall_s'] * 1000:.1f} ms "
+                           f"(key {status['key']}, {status['time']})")
+            else:
+                st.caption(f"🧮 {name}: computed in {status['wall_s']:.2f} s and cached "
+                           f"(key {status['key']}, {status['time']})")
+    with col2:
+        if st.button("🗑️ Clear cache", key=f"clear_cache_{'_'.join(names)}",
+                     help="Discard cached analysis results so the next run recomputes them"):
+            clear_result_caches()
+            st.rerun()
 # --- Session State Save/Load Functions ---
+def session_snapshot():
+    """
+    Saved part of the session state as live objects: DataFrames (None when empty), NumPy
+    results and plain values. save_session_state() converts it for JSON; project_format
+    writes it as a binary project directly.
+    """
+    def table(key):
+        df = st.session_state[key]
+        return df if not df.empty else None
+    
+    return {
+        'fluids': st.session_state.fluids,
+        'survey_data_saved': dict(st.session_state.survey_data_saved),
+        'current_survey_type': st.session_state.current_survey_type,
+        'survey_df': table('survey_df'),
+        'MD_heat': table('MD_heat'),
+        'TVD_heat': table('TVD_heat'),
+        'Tubing': table('Tubing'),
+        'casing_liners': table('casing_liners'),
+        'Completions': table('Completions'),
+        'completions': st.session_state.completions,
+        'nodal_data': st.session_state.nodal_data if 'nodal_data' in st.session_state else {},
+        'additional_data': st.session_state.additional_data if 'additional_data' in st.session_state else {},
+        'additional_data2': st.session_state.additional_data2 if 'additional_data2' in st.session_state else {},
+        'selected_tool': st.session_state.selected_tool,
+        'show_well_design': st.session_state.show_well_design,
+        'show_fluid_manager': st.session_state.show_fluid_manager,
+        'show_nodal_analysis': st.session_state.show_nodal_analysis,
+        'selected_fluid': st.session_state.selected_fluid,
+        'selected_completion': st.session_state.selected_completion if 'selected_completion' in st.session_state else None,
+        'new_fluid_mode': st.session_state.new_fluid_mode,
+        'new_completion_mode': st.session_state.new_completion_mode if 'new_completion_mode' in st.session_state else False,
+        'casing_edit_complete': st.session_state.casing_edit_complete if 'casing_edit_complete' in st.session_state else False,
+        'tubing_edit_complete': st.session_state.tubing_edit_complete if 'tubing_edit_complete' in st.session_state else False,
+        'bottom_depth': st.session_state.bottom_depth if 'bottom_depth' in st.session_state else 0.0,
+        'wellhead_depth': st.session_state.wellhead_depth if 'wellhead_depth' in st.session_state else 0.0,
+        'depth_reference': st.session_state.depth_reference if 'depth_reference' in st.session_state else "Original RKB",
+        'survey_type': st.session_state.survey_type if 'survey_type' in st.session_state else "Vertical"
+    }
 def save_session_state():
     """Convert session state to a JSON-serializable dictionary"""
     def convert_numpy_to_python(obj):
@@ -168,6 +301,8 @@ def save_session_state():
             return float(obj)
         elif isinstance(obj, (np.bool_, np.bool)):
             return bool(obj)
+        elif isinstance(obj, pd.DataFrame):
+            return convert_numpy_to_python(obj.to_dict())
         elif isinstance(obj, dict):
             return {k: convert_numpy_to_python(v) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -175,38 +310,104 @@ def save_session_state():
         else:
             return obj
     
-    data = {
-        'fluids': convert_numpy_to_python(st.session_state.fluids),
-        'survey_data_saved': {k: convert_numpy_to_python(v.to_dict()) for k, v in st.session_state.survey_data_saved.items()},
-        'current_survey_type': st.session_state.current_survey_type,
-        'survey_df': convert_numpy_to_python(st.session_state.survey_df.to_dict()) if not st.session_state.survey_df.empty else None,
-        'MD_heat': convert_numpy_to_python(st.session_state.MD_heat.to_dict()) if not st.session_state.MD_heat.empty else None,
-        'TVD_heat': convert_numpy_to_python(st.session_state.TVD_heat.to_dict()) if not st.session_state.TVD_heat.empty else None,
-        'Tubing': convert_numpy_to_python(st.session_state.Tubing.to_dict()) if not st.session_state.Tubing.empty else None,
-        'casing_liners': convert_numpy_to_python(st.session_state.casing_liners.to_dict()) if not st.session_state.casing_liners.empty else None,
-        'Completions': convert_numpy_to_python(st.session_state.Completions.to_dict()) if not st.session_state.Completions.empty else None,
-        'completions': convert_numpy_to_python(st.session_state.completions),
-        'nodal_data': convert_numpy_to_python(st.session_state.nodal_data) if 'nodal_data' in st.session_state else {},
-        'additional_data': convert_numpy_to_python(st.session_state.additional_data) if 'additional_data' in st.session_state else {},
-        'additional_data2': convert_numpy_to_python(st.session_state.additional_data2) if 'additional_data2' in st.session_state else {},
-        'selected_tool': st.session_state.selected_tool,
-        'show_well_design': st.session_state.show_well_design,
-        'show_fluid_manager': st.session_state.show_fluid_manager,
-        'show_nodal_analysis': st.session_state.show_nodal_analysis,
-        'selected_fluid': st.session_state.selected_fluid,
-        'selected_completion': st.session_state.selected_completion if 'selected_completion' in st.session_state else None,
-        'new_fluid_mode': st.session_state.new_fluid_mode,
-        'new_completion_mode': st.session_state.new_completion_mode if 'new_completion_mode' in st.session_state else False,
-        'casing_edit_complete': st.session_state.casing_edit_complete if 'casing_edit_complete' in st.session_state else False,
-        'tubing_edit_complete': st.session_state.tubing_edit_complete if 'tubing_edit_complete' in st.session_state else False,
-        'bottom_depth': st.session_state.bottom_depth if 'bottom_depth' in st.session_state else 0.0,
-        'wellhead_depth': st.session_state.wellhead_depth if 'wellhead_depth' in st.session_state else 0.0,
-        'depth_reference': st.session_state.depth_reference if 'depth_reference' in st.session_state else "Original RKB",
-        'survey_type': st.session_state.survey_type if 'survey_type' in st.session_state else "Vertical"
-    }
-    return data
+    return convert_numpy_to_python(session_snapshot())
+# Session keys restored lazily, by section (named as in autosave.AUTOSAVE_SECTIONS)
+LAZY_SECTIONS = {
+    'survey': ('survey_data_saved', 'survey_df'),
+    'heat': ('MD_heat', 'TVD_heat'),
+    'tubulars': ('Tubing', 'casing_liners'),
+    'completions': ('Completions', 'completions'),
+    'nodal': ('nodal_data',),
+}
+
+def _restore_value(key, value):
+    """Session value of a lazily restored key from its saved form (None gives the empty default)"""
+    if key == 'survey_data_saved':
+        return {k: pd.DataFrame(v) for k, v in (value or {}).items()}
+    if key in ('completions', 'nodal_data'):
+        return value if value is not None else {}
+    if value is not None:
+        return pd.DataFrame(value)
+    if key == 'MD_heat':
+        return pd.DataFrame(columns=['MD(ft)', 'Ambient Temperature'])
+    if key == 'TVD_heat':
+        return pd.DataFrame(columns=['TVD(ft)', 'Ambient Temperature'])
+    if key == 'Tubing':
+        return pd.DataFrame(columns=['Name','To MD','ID(in)','OD(in)','Wall thickness(in)','Roughness(in)'])
+    if key == 'casing_liners':
+        return pd.DataFrame(columns=['Section type','Name','From MD','To MD','ID(in)','OD(in)','Wall thickness(in)','Roughness(in)'])
+    if key == 'Completions':
+        return pd.DataFrame(columns=['Name','Geometry Profile','Fluid entry','Middle MD (ft)','Type','Active','IPR model'])
+    return pd.DataFrame()
+def _restore_section(data, section, forget=False):
+    """Restored values of a section's keys; with forget they are dropped from `data` so only the session holds them"""
+    read = data.pop if forget else data.get
+    return {key: _restore_value(key, read(key, None)) for key in LAZY_SECTIONS[section]}
+def ensure_sections(*sections):
+    """Restore the given sections of a loaded project if a tool has not read them yet, showing progress"""
+    pending = st.session_state.get('pending_sections', {})
+    to_load = [section for section in sections if section in pending]
+    if not to_load:
+        return
+    progress = st.progress(0.0)
+    for i, section in enumerate(to_load):
+        progress.progress(i / len(to_load), text=f"Loading {section} data ({i + 1}/{len(to_load)})...")
+        _, load = pending.pop(section)
+        for key, value in load(forget=True).items():
+            st.session_state[key] = value
+    progress.empty()
+def survey_model():
+    """The session's SurveyModel, brought up to date with survey_df (only changed stations are recomputed)"""
+    if 'survey_model' not in st.session_state:
+        st.session_state.survey_model = SurveyModel()
+    model = st.session_state.survey_model
+    survey_type = st.session_state.get('survey_type', "Vertical")
+    if survey_type in SURVEY_COLUMNS and not st.session_state.survey_df.empty:
+        model.sync(st.session_state.survey_df, survey_type)
+    else:
+        model.update([], [], [])
+    return model
+def survey_depth_index():
+    """The session's survey DepthIndex, rebuilt only below the depth the survey model invalidated"""
+    model = survey_model()
+    if 'survey_depth_index' not in st.session_state:
+        st.session_state.survey_depth_index = DepthIndex.from_model(model)
+    else:
+        st.session_state.survey_depth_index.refresh(model)
+    return st.session_state.survey_depth_index
+def well_geometry():
+    """The well path geometry for the VLP (None for a vertical well), rebuilt only when the survey changes"""
+    model = survey_model()
+    cached = st.session_state.get('well_geometry_cache')
+    if cached is None or cached[0] != model.version:
+        geometry = well_path_geometry(model.md, model.positions['tvd']) if len(model) else None
+        st.session_state.well_geometry_cache = cached = (model.version, geometry)
+    return cached[1]
+# Tables longer than this are shown read-only instead of in st.data_editor
+EDITOR_MAX_ROWS = 5000
+def editable_table(df, **kwargs):
+    """
+    st.data_editor for tables of up to EDITOR_MAX_ROWS rows. Larger (imported) tables are shown
+    read-only and returned unchanged, so they never go through per-cell editor state.
+    """
+    if len(df) <= EDITOR_MAX_ROWS:
+        return st.data_editor(df, **kwargs)
+    st.dataframe(df, hide_index=True, use_container_width=True)
+    st.caption(f"{len(df):,} rows: too many to edit here. Import a corrected file to change the table.")
+    return df
+def import_summary(imported, name, unit):
+    """Success message for a bulk_import result"""
+    message = f"Imported {imported['rows']:,} {unit} from {name} in {imported['wall_s'] * 1000:.0f} ms"
+    if imported['dropped']:
+        message += f" ({imported['dropped']:,} rows with missing values dropped)"
+    if imported['conversions']:
+        message += f". Converted {', '.join(imported['conversions'])}."
+    return message
 def load_session_state(data):
-    """Load session state from a dictionary"""
+    """
+    Load session state from a dictionary (a parsed session JSON, or a project_format.LazyProject).
+    Small settings are restored at once; the LAZY_SECTIONS are restored by ensure_sections().
+    """
     # Set a flag to indicate we're loading state to prevent recursion
     if hasattr(st.session_state, '_loading_state') and st.session_state._loading_state:
         return
@@ -233,46 +434,19 @@ def load_session_state(data):
         # Load new state
         st.session_state.fluids = data.get('fluids', {})
         
-        # Convert saved survey data back to DataFrames
-        survey_data = data.get('survey_data_saved', {})
-        st.session_state.survey_data_saved = {}
-        for k, v in survey_data.items():
-            st.session_state.survey_data_saved[k] = pd.DataFrame(v)
-        
         st.session_state.current_survey_type = data.get('current_survey_type', "Vertical")
         
-        if data.get('survey_df') is not None:
-            st.session_state.survey_df = pd.DataFrame(data['survey_df'])
-        else:
-            st.session_state.survey_df = pd.DataFrame()
-        
-        if data.get('MD_heat') is not None:
-            st.session_state.MD_heat = pd.DataFrame(data['MD_heat'])
-        else:
-            st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)', 'Ambient Temperature'])
-        
-        if data.get('TVD_heat') is not None:
-            st.session_state.TVD_heat = pd.DataFrame(data['TVD_heat'])
-        else:
-            st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)', 'Ambient Temperature'])
-        
-        if data.get('Tubing') is not None:
-            st.session_state.Tubing = pd.DataFrame(data['Tubing'])
-        else:
-            st.session_state.Tubing = pd.DataFrame(columns=['Name','To MD','ID(in)','OD(in)','Wall thickness(in)','Roughness(in)'])
-        
-        if data.get('casing_liners') is not None:
-            st.session_state.casing_liners = pd.DataFrame(data['casing_liners'])
-        else:
-            st.session_state.casing_liners = pd.DataFrame(columns=['Section type','Name','From MD','To MD','ID(in)','OD(in)','Wall thickness(in)','Roughness(in)'])
-        
-        if data.get('Completions') is not None:
-            st.session_state.Completions = pd.DataFrame(data['Completions'])
-        else:
-            st.session_state.Completions = pd.DataFrame(columns=['Name','Geometry Profile','Fluid entry','Middle MD (ft)','Type','Active','IPR model'])
+        # Tables and results are restored when a tool first reads them (see ensure_sections);
+        # until then their keys hold empty defaults
+        source = datetime.now().isoformat()
+        st.session_state.pending_sections = {}
+        for section, keys in LAZY_SECTIONS.items():
+            for key in keys:
+                st.session_state[key] = _restore_value(key, None)
+            if any(key in data for key in keys):
+                st.session_state.pending_sections[section] = (f'{source}:{section}',
+                                                              functools.partial(_restore_section, data, section))
         
-        st.session_state.completions = data.get('completions', {})
-        st.session_state.nodal_data = data.get('nodal_data', {})
         st.session_state.additional_data = data.get('additional_data', {})
         st.session_state.additional_data2 = data.get('additional_data2', {})
         
@@ -298,6 +472,56 @@ def load_session_state(data):
         # This prevents immediate rerun while still allowing state to be loaded
         if hasattr(st.session_state, '_loading_state'):
             st.session_state._loading_state = False
+# --- Autosave ---
+# Changed sections are journaled to a project directory every few seconds (see autosave.py).
+# Projects live in their own folders under an app-owned root; each session starts with a random
+# project name, so sessions on a shared server neither see nor overwrite each other's projects
+AUTOSAVE_INTERVAL = 5  # seconds
+AUTOSAVE_ROOT = os.path.join(os.path.expanduser('~'), 'well_design_autosave')
+
+def autosave_journal(directory):
+    """The session's autosave journal for `directory`; switching directory starts a new one"""
+    journal = st.session_state.get('autosave_journal')
+    if journal is None or journal.directory != directory:
+        journal = ProjectJournal(directory)
+        st.session_state.autosave_journal = journal
+        # Never write over an earlier autosave before the user chose to restore or replace it
+        st.session_state.autosave_ready = not journal.exists()
+    return journal
+@st.fragment(run_every=AUTOSAVE_INTERVAL)
+def autosave_section(directory):
+    journal = autosave_journal(directory)
+    if not st.session_state.autosave_ready:
+        st.info("This directory holds an autosaved project.")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Restore", key="autosave_restore", use_container_width=True):
+                load_session_state(journal.recover())
+                st.session_state.autosave_ready = True
+                st.rerun()
+        with col2:
+            if st.button("Start new", key="autosave_start_new", use_container_width=True,
+                         help="Replace the autosaved project with the current session"):
+                ensure_sections(*LAZY_SECTIONS)
+                journal.start_new(session_snapshot())
+                st.session_state.autosave_ready = True
+        return
+    
+    try:
+        status = journal.save(session_snapshot(), pending=st.session_state.get('pending_sections'))
+    except (OSError, ValueError) as e:
+        # ValueError: a session value the project format cannot store (see project_format.save_project)
+        st.warning(f"Autosave failed: {str(e)}")
+        return
+    if status['sections']:
+        st.session_state.autosave_last_change = status
+    last_change = st.session_state.get('autosave_last_change')
+    if last_change is None:
+        st.caption(f"✅ Up to date ({status['time']})")
+    else:
+        st.caption(f"✅ Saved {', '.join(last_change['sections'])} at {last_change['time']} "
+                   f"({last_change['bytes'] / 1024:.1f} KB in {last_change['wall_s'] * 1000:.0f} ms"
+                   f"{', compacted' if last_change['compacted'] else ''})")
 # --- Sidebar ---
 with st.sidebar:
     # Main Page / Home Button (always visible at top)
@@ -319,17 +543,29 @@ with st.sidebar:
     st.subheader("💾 Save/Load Progress")
     
     # Save progress button
+    save_format = st.radio("Save format", ["JSON", "Binary project (.wdp)"], horizontal=True,
+                           help="Binary projects store tables column by column as compressed typed arrays: "
+                                "much smaller and faster to save and load for large surveys and results")
     if st.button("Save Current Progress", type="primary", use_container_width=True):
-        # Convert session state to JSON
-        data = save_session_state()
-        json_str = json.dumps(data, indent=2)
+        ensure_sections(*LAZY_SECTIONS)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if save_format == "JSON":
+            # Convert session state to JSON
+            data = save_session_state()
+            session_bytes = json.dumps(data, indent=2)
+            file_name = f"well_design_progress_{timestamp}.json"
+            mime = "application/json"
+        else:
+            session_bytes = project_bytes(session_snapshot())
+            file_name = f"well_design_progress_{timestamp}{PROJECT_EXTENSION}"
+            mime = "application/octet-stream"
         
         # Create download button
         st.download_button(
             label="Download Session Data",
-            data=json_str,
-            file_name=f"well_design_progress_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json",
+            data=session_bytes,
+            file_name=file_name,
+            mime=mime,
             key="download_session"
         )
         st.success("Session data ready for download!")
@@ -338,14 +574,20 @@ with st.sidebar:
     
     # Load progress section
     st.subheader("📁 Load Progress")
-    uploaded_file = st.file_uploader("Upload your saved session", type="json", key="session_uploader")
+    uploaded_file = st.file_uploader("Upload your saved session", type=["json", PROJECT_EXTENSION.lstrip('.')],
+                                     key="session_uploader")
     if uploaded_file is not None:
         try:
             # Check if we've already processed this file
             if 'last_uploaded_file' not in st.session_state or st.session_state.last_uploaded_file != uploaded_file.name:
-                # Read and parse the JSON file
-                json_str = uploaded_file.read().decode("utf-8")
-                data = json.loads(json_str)
+                # Read a binary project, or parse the JSON file
+                if is_project_file(uploaded_file):
+                    uploaded_file.seek(0)
+                    data = open_project(uploaded_file)
+                else:
+                    uploaded_file.seek(0)
+                    json_str = uploaded_file.read().decode("utf-8")
+                    data = json.loads(json_str)
                 
                 # Load into session state
                 load_session_state(data)
@@ -360,6 +602,23 @@ with st.sidebar:
         
     st.divider()
     
+    # Autosave section
+    st.subheader("🕒 Autosave")
+    autosave_enabled = st.toggle("Autosave changes", value=False, key="autosave_enabled",
+                                 help=f"Every {AUTOSAVE_INTERVAL} s, sections changed since the last save are "
+                                      "appended to a journal in the autosave project")
+    if 'autosave_project' not in st.session_state:
+        st.session_state.autosave_project = secrets.token_hex(8)
+    autosave_project = st.text_input("Autosave project", key="autosave_project", disabled=not autosave_enabled,
+                                     help="Keep this name to restore the project in a later session")
+    if autosave_enabled:
+        try:
+            autosave_section(project_directory(AUTOSAVE_ROOT, autosave_project))
+        except ValueError as e:
+            st.warning(str(e))
+    
+    st.divider()
+    
     # Well Design Section
     if not st.session_state.show_well_design:
         if st.button("🛢️ Well Design"):
@@ -407,7 +666,9 @@ with st.sidebar:
         if st.button("❌ Close Nodal Analysis"):
             st.session_state.show_nodal_analysis = False
 # Fluid Manager
-if st.session_state.show_fluid_manager:
+@st.fragment
+def fluid_manager_section():
+    """Fluid Manager: fluid list and property editor"""
     st.subheader('Fluid Manager 💧')
     
     if not st.session_state.selected_fluid:
@@ -563,6 +824,8 @@ if st.session_state.show_fluid_manager:
                     }
                     current_fluid['notes'] = notes
                     current_fluid['last_modified'] = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    # Build the PVT table now so the flow kernels can look properties up
+                    get_pvt_table(current_fluid['properties'])
                     st.success("✅ Properties saved successfully!")
                     st.rerun()
             
@@ -579,18 +842,28 @@ if st.session_state.show_fluid_manager:
                         st.session_state.selected_fluid = None
                         st.success("Fluid deleted!")
                         st.rerun()
+if st.session_state.show_fluid_manager:
+    fluid_manager_section()
      
 
 #Well Design
 if st.session_state.selected_tool:
     st.header(f"{st.session_state.selected_tool} ")
 # General tool
-if st.session_state.selected_tool == "General":
+@st.fragment
+def general_tool_section():
+    """Well Design > General"""
     st.text_input("Well Name")
     st.radio("Select the well type", ["production", "injection", "advanced"])
     st.radio("Check valve setting", ["Block none", "Block forward", "Block reverse", "Block both"])
+if st.session_state.selected_tool == "General":
+    general_tool_section()
 # survey tool
-if st.session_state.selected_tool == "Deviation survey":
+@st.fragment
+def deviation_survey_section():
+    """Well Design > Deviation survey: survey editor and trajectory plot"""
+    ensure_sections('survey')
+    import matplotlib.pyplot as plt
     # Initialize session state variables if they don't exist
     if 'survey_type' not in st.session_state:
         st.session_state.survey_type = "Vertical"
@@ -632,8 +905,8 @@ if st.session_state.selected_tool == "Deviation survey":
     # Only show table and plot for 2D/3D surveys
     if survey_type != "Vertical":
         # Define columns based on survey type
-        columns_2d = ["MD (ft)", "TVD (ft)", "Horizontal Displacement (ft)", "Angle (°)"]
-        columns_3d = ["MD (ft)", "TVD (ft)", "Horizontal Displacement (ft)", "Angle (°)", "Azimuth (°)", "Max Dogleg Severity (°/100ft)"]
+        columns_2d = SURVEY_COLUMNS['2D']
+        columns_3d = SURVEY_COLUMNS['3D']
         # Handle survey type change
         if st.session_state.current_survey_type != survey_type:
             # Load existing data or create new DataFrame
@@ -668,29 +941,51 @@ if st.session_state.selected_tool == "Deviation survey":
                 "Horizontal Displacement (ft)": st.column_config.NumberColumn("Horizontal Displacement (ft)", min_value=0.0, step=0.1),
                 "Angle (°)": st.column_config.NumberColumn("Angle (°)", min_value=0.0, max_value=90.0, step=0.1),
                 "Azimuth (°)": st.column_config.NumberColumn("Azimuth (°)", min_value=0.0, max_value=360.0, step=0.1),
-                "Max Dogleg Severity (°/100ft)": st.column_config.NumberColumn("Max Dogleg Severity (°/100ft)", min_value=0.0, step=0.1),
+                "Northing (ft)": st.column_config.NumberColumn("Northing (ft)", format="%.1f"),
+                "Easting (ft)": st.column_config.NumberColumn("Easting (ft)", format="%.1f"),
+                "Max Dogleg Severity (°/100ft)": st.column_config.NumberColumn("Max Dogleg Severity (°/100ft)", format="%.2f"),
             }
-        # Editable table
-        st.subheader("Enter Survey Data")
-        
         # Simple, static key
         editor_key = f"data_editor_{survey_type}"
         
-        # Store the current data before showing the editor
-        current_data = st.session_state.survey_df.copy()
+        # Bulk import straight into survey_df, bypassing the editor
+        with st.expander("📥 Import survey file (CSV or LAS)"):
+            st.caption("Columns are matched by name (MD/DEPT, Angle/INC" +
+                       (", Azimuth/AZI" if survey_type == "3D" else "") + "); depths in m are converted to ft.")
+            survey_file = st.file_uploader("Survey file", type=IMPORT_EXTENSIONS, key=f"survey_import_{survey_type}")
+            drop_missing = st.checkbox("Drop rows with missing values", key=f"survey_import_drop_{survey_type}")
+            if st.button("Import stations", key=f"survey_import_button_{survey_type}", disabled=survey_file is None):
+                try:
+                    imported = import_survey(survey_file, survey_type, drop_missing=drop_missing)
+                except ValueError as e:
+                    st.error(f"Could not import {survey_file.name}:\n\n{e}")
+                else:
+                    st.session_state.survey_df = compute_survey(imported['table'], survey_type, survey_model())
+                    st.session_state.pop(editor_key, None)  # drop edits made to the previous table
+                    st.success(import_summary(imported, survey_file.name, "stations"))
+        
+        # Editable table
+        st.subheader("Enter Survey Data")
+        st.caption("Enter MD, Angle" + (" and Azimuth" if survey_type == "3D" else "") +
+                   "; the other columns are computed with the minimum curvature method.")
         
-        # Show the data editor
-        edited_data = st.data_editor(
-            current_data,
+        # Show the data editor (it does not modify the frame it is given, so no copy is needed)
+        edited_data = editable_table(
+            st.session_state.survey_df,
             num_rows="dynamic",
             use_container_width=True,
             hide_index=True,
             column_config=column_config,
+            disabled=[col for col in column_config if col not in INPUT_COLUMNS],
             key=editor_key
         )
         
-        # Always update session state with edited data
-        st.session_state.survey_df = edited_data.copy()
+        # Always update session state with the edited stations and their derived columns; the
+        # survey model only recomputes from the first changed station down
+        model = survey_model()
+        st.session_state.survey_df = compute_survey(edited_data, survey_type, model)
+        if model.recomputed:
+            st.caption(f"Recomputed {model.recomputed} of {len(model)} stations")
         # Manual save button
         col1, col2 = st.columns([1, 1])
         with col1:
@@ -749,25 +1044,36 @@ if st.session_state.selected_tool == "Deviation survey":
                 if has_data:
                     st.subheader("Survey Visualization")
                     
-                    # Create the plot
-                    fig, ax = plt.subplots(figsize=(10, 8))
+                    # Create the plot: vertical section, plus the plan view for 3D surveys
+                    plot_df = st.session_state.survey_df.sort_values("MD (ft)")
+                    markers = {'marker': "o", 'markersize': 6} if len(plot_df) <= 200 else {}
+                    if survey_type == "3D":
+                        fig, (ax, ax_plan) = plt.subplots(1, 2, figsize=(14, 7))
+                    else:
+                        fig, ax = plt.subplots(figsize=(10, 8))
                     ax.plot(
-                        st.session_state.survey_df["Horizontal Displacement (ft)"],
-                        st.session_state.survey_df["TVD (ft)"],
-                        marker="o",
+                        plot_df["Horizontal Displacement (ft)"],
+                        plot_df["TVD (ft)"],
                         linewidth=2,
-                        markersize=6
+                        **markers
                     )
                     ax.set_xlabel("Horizontal Displacement (ft)")
                     ax.set_ylabel("TVD (ft)")
                     ax.set_title(f"{survey_type} Survey: TVD vs Horizontal Displacement")
                     ax.grid(True, alpha=0.3)
                     ax.invert_yaxis()
+                    if survey_type == "3D":
+                        ax_plan.plot(plot_df["Easting (ft)"], plot_df["Northing (ft)"], linewidth=2, **markers)
+                        ax_plan.set_xlabel("Easting (ft)")
+                        ax_plan.set_ylabel("Northing (ft)")
+                        ax_plan.set_title("Plan View")
+                        ax_plan.set_aspect('equal', adjustable='datalim')
+                        ax_plan.grid(True, alpha=0.3)
                     st.pyplot(fig)
                     
                     # Show summary statistics
                     st.subheader("Survey Summary")
-                    col1, col2, col3 = st.columns(3)
+                    col1, col2, col3, col4 = st.columns(4)
                     with col1:
                         st.metric("Max TVD", f"{st.session_state.survey_df['TVD (ft)'].max():.1f} ft")
                     with col2:
@@ -775,6 +1081,9 @@ if st.session_state.selected_tool == "Deviation survey":
                     with col3:
                         if "Angle (°)" in st.session_state.survey_df.columns:
                             st.metric("Max Angle", f"{st.session_state.survey_df['Angle (°)'].max():.1f}°")
+                    with col4:
+                        if "Max Dogleg Severity (°/100ft)" in st.session_state.survey_df.columns:
+                            st.metric("Max DLS", f"{st.session_state.survey_df['Max Dogleg Severity (°/100ft)'].max():.2f}°/100ft")
                 else:
                     st.info("Enter survey data in the table above to see visualization")
             except Exception as e:
@@ -786,10 +1095,34 @@ if st.session_state.selected_tool == "Deviation survey":
         if 'survey_df' in st.session_state:
             st.session_state.survey_df = pd.DataFrame()
         st.session_state.current_survey_type = "Vertical"
+if st.session_state.selected_tool == "Deviation survey":
+    deviation_survey_section()
     
 # Heat transfer
-if st.session_state.selected_tool == "Heat transfer":
+@st.fragment
+def heat_transfer_section():
+    """Well Design > Heat transfer: temperature and U-value tables"""
+    ensure_sections('heat', 'survey')
+    import matplotlib.pyplot as plt
     st.subheader("Heat Transfer Parameters")
+    
+    # Bulk import of long depth tables (e.g. DTS temperature logs) straight into MD_heat / TVD_heat
+    with st.expander("📥 Import depth table file (CSV or LAS)"):
+        st.caption("Columns are matched by name (MD/DEPT or TVD, Ambient Temperature/TEMP, U value); "
+                   "m and °C are converted to ft and °F.")
+        import_depth = st.radio("Load into", ["MD", "TVD"], horizontal=True, key="heat_import_depth")
+        heat_file = st.file_uploader("Depth table file", type=IMPORT_EXTENSIONS, key="heat_import")
+        drop_missing = st.checkbox("Drop rows with missing values", key="heat_import_drop")
+        if st.button("Import table", key="heat_import_button", disabled=heat_file is None):
+            try:
+                imported = import_depth_table(heat_file, import_depth, drop_missing=drop_missing)
+            except ValueError as e:
+                st.error(f"Could not import {heat_file.name}:\n\n{e}")
+            else:
+                st.session_state[f'{import_depth}_heat'] = imported['table']
+                # Drop edits made to the previous table
+                st.session_state.pop('edited_Md_heat' if import_depth == "MD" else 'edited_TVD_heat_data', None)
+                st.success(import_summary(imported, heat_file.name, "rows"))
     Heat_transfer_coefficient = st.radio("Heat transfer coefficient", ["specify", "calculate"])
     if Heat_transfer_coefficient == "specify":
         U_value_input = st.radio("U value input", ["Single", "Multiple"])
@@ -804,7 +1137,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.MD_heat.empty or 'MD(ft)' not in st.session_state.MD_heat.columns:
                         st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)', 'Ambient Temperature'])
                     with st.form("Md_heat_form"):  # Changed form key to be unique
-                        edited_Md_heat_df = st.data_editor(
+                        edited_Md_heat_df = editable_table(
                             st.session_state.MD_heat,
                             column_config={
                                 "MD(ft)": st.column_config.NumberColumn("MD(ft)", required=True, min_value=0.0),
@@ -847,7 +1180,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.TVD_heat.empty or 'TVD(ft)' not in st.session_state.TVD_heat.columns:
                         st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)', 'Ambient Temperature'])
                     with st.form("TVD_heat_form"): # Changed form key to be unique
-                        edited_TVD_heat_df = st.data_editor(
+                        edited_TVD_heat_df = editable_table(
                             st.session_state.TVD_heat,
                             column_config={
                                 "TVD(ft)": st.column_config.NumberColumn("TVD(ft)", required=True, min_value=0.0),
@@ -895,7 +1228,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.MD_heat.empty or 'MD(ft)' not in st.session_state.MD_heat.columns:
                         st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)', 'U value'])
                     with st.form("Md_heat_form"):  # Changed form key to be unique
-                        edited_Md_heat_df = st.data_editor(
+                        edited_Md_heat_df = editable_table(
                             st.session_state.MD_heat,
                             column_config={
                                 "MD(ft)": st.column_config.NumberColumn("MD(ft)", required=True, min_value=0.0),
@@ -938,7 +1271,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.TVD_heat.empty or 'TVD(ft)' not in st.session_state.TVD_heat.columns:
                         st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)', 'U value'])
                     with st.form("TVD_heat_form"): # Changed form key to be unique
-                        edited_TVD_heat_df = st.data_editor(
+                        edited_TVD_heat_df = editable_table(
                             st.session_state.TVD_heat,
                             column_config={
                                 "TVD(ft)": st.column_config.NumberColumn("TVD(ft)", required=True, min_value=0.0),
@@ -983,7 +1316,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.MD_heat.empty or 'MD(ft)' not in st.session_state.MD_heat.columns:
                         st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)', 'U value','Ambient Temperature'])
                     with st.form("Md_heat_form"):  # Changed form key to be unique
-                        edited_Md_heat_df = st.data_editor(
+                        edited_Md_heat_df = editable_table(
                             st.session_state.MD_heat,
                             column_config={
                                 "MD(ft)": st.column_config.NumberColumn("MD(ft)", required=True, min_value=0.0),
@@ -1045,7 +1378,7 @@ if st.session_state.selected_tool == "Heat transfer":
                     if st.session_state.TVD_heat.empty or 'TVD(ft)' not in st.session_state.TVD_heat.columns:
                         st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)', 'U value','Ambient Temperature'])
                     with st.form("TVD_heat_form"): # Changed form key to be unique
-                        edited_TVD_heat_df = st.data_editor(
+                        edited_TVD_heat_df = editable_table(
                             st.session_state.TVD_heat,
                             column_config={
                                 "TVD(ft)": st.column_config.NumberColumn("TVD(ft)", required=True, min_value=0.0),
@@ -1113,7 +1446,7 @@ if st.session_state.selected_tool == "Heat transfer":
                 if st.session_state.MD_heat.empty or 'MD(ft)' not in st.session_state.MD_heat.columns:
                         st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)','Ground denisty','Ground K','Ground Cp'])
                 with st.form("Md_heat_form"):  # Changed form key to be unique
-                        edited_Md_heat_df = st.data_editor(
+                        edited_Md_heat_df = editable_table(
                             st.session_state.MD_heat,
                             column_config={
                                 "MD(ft)": st.column_config.NumberColumn("MD(ft)", required=True, min_value=0.0),
@@ -1170,7 +1503,7 @@ if st.session_state.selected_tool == "Heat transfer":
                 if st.session_state.TVD_heat.empty or 'TVD(ft)' not in st.session_state.TVD_heat.columns:
                         st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)','Ground denisty','Ground K','Ground Cp'])
                 with st.form("TVD_heat_form"): # Changed form key to be unique
-                        edited_TVD_heat_df = st.data_editor(
+                        edited_TVD_heat_df = editable_table(
                             st.session_state.TVD_heat,
                             column_config={
                                 "TVD(ft)": st.column_config.NumberColumn("TVD(ft)", required=True, min_value=0.0),
@@ -1180,7 +1513,7 @@ if st.session_state.selected_tool == "Heat transfer":
                             },
                             hide_index=True,
                             num_rows='dynamic',
-                            key='edited_TVD_heat',
+                            key='edited_TVD_heat_data', # Changed data_editor key to be unique
                             disabled=False
                         )
                         col1, col2 = st.columns(2)
@@ -1229,7 +1562,7 @@ if st.session_state.selected_tool == "Heat transfer":
                 if st.session_state.MD_heat.empty or 'MD(ft)' not in st.session_state.MD_heat.columns:
                         st.session_state.MD_heat = pd.DataFrame(columns=['MD(ft)','Ground denisty','Ground K','Ground Cp','Ambient Temperature'])
                 with st.form("Md_heat_form"):  # Changed form key to be unique
-                        edited_Md_heat_df = st.data_editor(
+                        edited_Md_heat_df = editable_table(
                             st.session_state.MD_heat,
                             column_config={
                                 "MD(ft)": st.column_config.NumberColumn("MD(ft)", required=True, min_value=0.0),
@@ -1288,7 +1621,7 @@ if st.session_state.selected_tool == "Heat transfer":
                 if st.session_state.TVD_heat.empty or 'TVD(ft)' not in st.session_state.TVD_heat.columns:
                         st.session_state.TVD_heat = pd.DataFrame(columns=['TVD(ft)','Ground denisty','Ground K','Ground Cp','Ambient Temperature'])
                 with st.form("TVD_heat_form"): # Changed form key to be unique
-                        edited_TVD_heat_df = st.data_editor(
+                        edited_TVD_heat_df = editable_table(
                             st.session_state.TVD_heat,
                             column_config={
                                 "TVD(ft)": st.column_config.NumberColumn("TVD(ft)", required=True, min_value=0.0),
@@ -1343,6 +1676,31 @@ if st.session_state.selected_tool == "Heat transfer":
                         st.pyplot(fig)
                     except KeyError:
                         st.warning("Data columns are missing. Please re-enter your data.")
+    
+    # Fill one depth table from the other through the deviation survey
+    with st.expander("🔁 Convert between MD and TVD tables"):
+        depth_index = survey_depth_index()
+        if st.session_state.get('survey_type', "Vertical") == "Vertical" or st.session_state.survey_df.empty:
+            st.caption("No deviation survey: TVD equals MD.")
+        else:
+            st.caption("Depths are converted with the deviation survey.")
+        col1, col2 = st.columns(2)
+        with col1:
+            md_ready = not st.session_state.MD_heat.empty and 'MD(ft)' in st.session_state.MD_heat.columns
+            if st.button("MD table → TVD table", disabled=not md_ready, use_container_width=True):
+                converted = st.session_state.MD_heat.rename(columns={'MD(ft)': 'TVD(ft)'})
+                converted['TVD(ft)'] = depth_index.tvd(st.session_state.MD_heat['MD(ft)'].to_numpy(dtype=float))
+                st.session_state.TVD_heat = converted
+                st.success(f"TVD table filled from {len(converted)} MD rows")
+        with col2:
+            tvd_ready = not st.session_state.TVD_heat.empty and 'TVD(ft)' in st.session_state.TVD_heat.columns
+            if st.button("TVD table → MD table", disabled=not tvd_ready, use_container_width=True):
+                converted = st.session_state.TVD_heat.rename(columns={'TVD(ft)': 'MD(ft)'})
+                converted['MD(ft)'] = depth_index.md(st.session_state.TVD_heat['TVD(ft)'].to_numpy(dtype=float))
+                st.session_state.MD_heat = converted
+                st.success(f"MD table filled from {len(converted)} TVD rows")
+if st.session_state.selected_tool == "Heat transfer":
+    heat_transfer_section()
                         
 # Tubulars
 if 'selected_tool' not in st.session_state:
@@ -1361,7 +1719,10 @@ if 'additional_data2' not in st.session_state:
     st.session_state.additional_data2 = {}
 
 # The main application logic starts here, wrapped in a conditional block
-if st.session_state.selected_tool == "Tubulars":
+@st.fragment
+def tubulars_section():
+    """Well Design > Tubulars: casing/liner and tubing tables and their detail forms"""
+    ensure_sections('tubulars')
     
     st.title("Tubulars Data Entry")
     st.markdown("---")
@@ -1569,6 +1930,8 @@ if st.session_state.selected_tool == "Tubulars":
                     st.session_state.additional_data2[f'fluid_denisty_{index}'] = st.session_state[f'fluid_density_input_{index}']
                     st.session_state.additional_data2[f'fluid_thermal_cond_{index}'] = st.session_state[f'fluid_thermal_cond_input_{index}']
                 st.success("Additional details saved!")
+if st.session_state.selected_tool == "Tubulars":
+    tubulars_section()
 
 # ------------------------------------------------
     # Completions
@@ -1580,10 +1943,10 @@ def calculate_and_plot_ipr(completion_data, fluid_properties):
     Calculates the IPR based on completion and fluid data and returns a matplotlib figure.
     Implements Jones's equation when selected: P_ws - P_wf = A * Q_L + B * Q_L^2
     """
+    import matplotlib.pyplot as plt
     # Get data from completion and fluid
-    ipr_model = completion_data['basic_info']['ipr_model']
+    ipr_model = canonical_ipr_model(completion_data['basic_info']['ipr_model'])
     reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
-    productivity_index = completion_data['reservoir'].get('productivity_index', 1.0)
     use_vogel = completion_data['reservoir'].get('use_vogel_below_bubble_point', False)
     reservoir_temperature = completion_data['reservoir'].get('reservoir_temperature', 180)
     
@@ -1593,142 +1956,33 @@ def calculate_and_plot_ipr(completion_data, fluid_properties):
     st.write(f"Reservoir Pressure: {reservoir_pressure} psi")
     st.write(f"Reservoir Temperature: {reservoir_temperature}°F")
     
-    # Initialize variables
-    pb = None
-    aof = None
+    model = ipr_from_completion(completion_data, fluid_properties)
+    pb = getattr(model, 'bubble_point', None)
+    aof = model.aof
     
-    # Generate a range of flowing bottomhole pressures (Pwf)
+    # Flow rates over a range of flowing bottomhole pressures (Pwf)
     pwf_values = np.linspace(100, reservoir_pressure, 50)
-    q_values = []
+    q_values = model.rate(pwf_values)
     
-    # Calculate flow rates for each Pwf based on IPR model
     if ipr_model == 'Vogel':
-        # Get Vogel parameters from completion data
-        q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)  # AOFP (Q_max)
-        c = completion_data['reservoir'].get('vogel_coefficient', 0.2)     # Vogel coefficient
-        
+        q_max = model.max_flow_rate
         st.write("### Vogel Model Parameters")
         st.write(f"AOFP (Q_max): {q_max} STB/D")
-        st.write(f"Vogel Coefficient (C): {c}")
-        
-        # Calculate flow rates using Vogel's equation
-        for pwf in pwf_values:
-            pressure_ratio = pwf / reservoir_pressure
-            # Vogel's equation: Q = Q_max * [1 - (1-C)*(Pwf/P_ws) - C*(Pwf/P_ws)^2]
-            q = q_max * (1 - (1 - c) * pressure_ratio - c * pressure_ratio**2)
-            q_values.append(max(0, q))
-        
-        # For Vogel model, AOF is the same as Q_max
-        aof = q_max
-    
-    elif ipr_model == 'Fetkovitch':
-        # Get Fetkovich parameters from completion data
-        q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)  # AOFP (Q_max)
-        n = completion_data['reservoir'].get('fetkovich_exponent', 1.0)   # Fetkovich exponent
-        
+        st.write(f"Vogel Coefficient (C): {model.vogel_coefficient}")
+    elif ipr_model == 'Fetkovich':
+        q_max = model.max_flow_rate
         st.write("### Fetkovich Model Parameters")
         st.write(f"AOFP (Q_max): {q_max} STB/D")
-        st.write(f"Fetkovich Exponent (n): {n}")
-        
-        # Calculate flow rates using Fetkovich's equation
-        for pwf in pwf_values:
-            pressure_ratio = pwf / reservoir_pressure
-            # Fetkovich's equation: Q = Q_max * [1 - (Pwf/P_ws)^2]^n
-            # Ensure we don't get negative values inside the power function
-            base_value = max(0, 1 - pressure_ratio**2)
-            q = q_max * (base_value)**n
-            q_values.append(max(0, q))
-        
-        # For Fetkovich model, AOF is the same as Q_max
-        aof = q_max
-    
+        st.write(f"Fetkovich Exponent (n): {model.fetkovich_exponent}")
     elif ipr_model == 'Jones':
-        # Get Jones parameters from completion data
-        a = completion_data['reservoir'].get('jones_coefficient_a', 0.5)  # Laminar coefficient
-        b = completion_data['reservoir'].get('jones_coefficient_b', 0.001)  # Turbulent coefficient
-        
         st.write("### Jones Model Parameters")
-        st.write(f"Coefficient A: {a} psi/STB/D")
-        st.write(f"Coefficient B: {b} psi/(STB/D)^2")
-        
-        # Calculate flow rates using Jones's equation
-        for pwf in pwf_values:
-            pressure_drop = reservoir_pressure - pwf
-            # Jones's equation: P_ws - P_wf = A * Q_L + B * Q_L^2
-            # Rearranged to solve for Q_L: Q_L = [-A + sqrt(A^2 + 4*B*(P_ws-P_wf))] / (2*B)
-            if b > 0:  # Avoid division by zero
-                discriminant = a**2 + 4 * b * pressure_drop
-                if discriminant >= 0:
-                    q = (-a + np.sqrt(discriminant)) / (2 * b)
-                else:
-                    q = 0
-            else:
-                # If B is zero, equation reduces to linear: Q_L = (P_ws - P_wf) / A
-                if a > 0:
-                    q = pressure_drop / a
-                else:
-                    q = 0
-            q_values.append(max(0, q))
-        
-        # Calculate AOF for Jones model (when P_wf = 0)
-        if b > 0:
-            discriminant = a**2 + 4 * b * reservoir_pressure
-            if discriminant >= 0:
-                aof = (-a + np.sqrt(discriminant)) / (2 * b)
-            else:
-                aof = 0
-        else:
-            if a > 0:
-                aof = reservoir_pressure / a
-            else:
-                aof = 0
-    
+        st.write(f"Coefficient A: {model.a} psi/STB/D")
+        st.write(f"Coefficient B: {model.b} psi/(STB/D)^2")
     elif ipr_model == 'Well PI' and use_vogel:
-        # Composite PI-Vogel model (existing functionality)
-        # Get fluid properties for bubble point calculation
         if fluid_properties:
-            GOR = fluid_properties.get('GOR', 500)
-            gas_specific_gravity = fluid_properties.get('gas_specific_gravity', 0.85)
-            API = fluid_properties.get('API', 35)
-            
-            # Calculate Bubble Point Pressure using Standing Correlation
-            try:
-                gamma_o = 141.5 / (API + 131.5)
-                pb_calculated = 18.2 * ((GOR * gas_specific_gravity) / gamma_o)**0.83 * \
-                               10**(0.00091 * reservoir_temperature - 0.0125 * API)
-                pb = max(100, min(pb_calculated, reservoir_pressure * 0.95))
-                
-                st.write(f"Calculated Bubble Point (Pb): {pb:.1f} psi")
-            except Exception as e:
-                pb = reservoir_pressure * 0.8
-                st.error(f"Error calculating Pb: {e}. Using default: {pb} psi")
+            st.write(f"Calculated Bubble Point (Pb): {pb:.1f} psi")
         else:
-            pb = reservoir_pressure * 0.8
             st.write("No fluid properties available, using default Pb")
-        
-        # Calculate flow rates using composite PI-Vogel model
-        for pwf in pwf_values:
-            if pwf < pb:
-                # Below bubble point - use Vogel equation
-                qb = productivity_index * (reservoir_pressure - pb)
-                q = qb + (productivity_index * pb / 1.8) * (1 - 0.2 * (pwf/pb) - 0.8 * (pwf/pb)**2)
-            else:
-                # Above bubble point - use straight-line PI
-                q = productivity_index * (reservoir_pressure - pwf)
-            
-            q_values.append(max(0, q))
-        
-        # Calculate AOF for composite model
-        aof = productivity_index * reservoir_pressure
-    
-    else:
-        # Standard Straight-Line PI model (existing functionality)
-        for pwf in pwf_values:
-            q = productivity_index * (reservoir_pressure - pwf)
-            q_values.append(max(0, q))
-        
-        # Calculate AOF for PI model
-        aof = productivity_index * reservoir_pressure
     
     # Create the plot
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -1749,7 +2003,7 @@ def calculate_and_plot_ipr(completion_data, fluid_properties):
         ax.text(0.5, 0.95, equation_text, transform=ax.transAxes, fontsize=12,
                 verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
     
-    elif ipr_model == 'Fetkovitch':
+    elif ipr_model == 'Fetkovich':
         # For Fetkovich model, mark reservoir pressure and AOFP
         ax.axhline(y=reservoir_pressure, color='k', linestyle=':', label=f'Reservoir Pressure ({reservoir_pressure} psi)')
         ax.axvline(x=q_max, color='g', linestyle='--', label=f'AOFP (Q_max = {q_max:.0f} STB/D)')
@@ -1771,7 +2025,7 @@ def calculate_and_plot_ipr(completion_data, fluid_properties):
     
     elif ipr_model == 'Well PI' and use_vogel:
         # For composite PI-Vogel model, mark bubble point and reservoir pressure
-        qb_value = productivity_index * (reservoir_pressure - pb)
+        qb_value = model.qb
         ax.axhline(y=pb, color='r', linestyle='--', label=f'Bubble Point (Pb = {pb:.0f} psi)')
         ax.axvline(x=qb_value, color='g', linestyle='--', label=f'Flow at Pb (Qb = {qb_value:.0f} STB/D)')
         ax.axhline(y=reservoir_pressure, color='k', linestyle=':', label=f'Reservoir Pressure ({reservoir_pressure} psi)')
@@ -1783,7 +2037,10 @@ def calculate_and_plot_ipr(completion_data, fluid_properties):
     ax.legend()
     plt.tight_layout()
     return fig, pb, aof
-if st.session_state.selected_tool == "Completions":
+@st.fragment
+def completions_section():
+    """Well Design > Completions: completion list, editor and IPR plot"""
+    ensure_sections('completions')
     st.subheader('Completions Manager 🔧')
     # Initialize completions data if not exists
     if 'completions' not in st.session_state:
@@ -1816,9 +2073,7 @@ if st.session_state.selected_tool == "Completions":
                     completion_type = st.selectbox('Type', ['Perforation', 'Open Hole', 'Slotted Liner', 'Screen'])
                     active = st.checkbox('Active', value=True)
                 
-                ipr_model = st.selectbox('IPR Model', [
-                    'Well PI', 'Vogel', 'Fetkovitch', 'Jones'
-                ])
+                ipr_model = st.selectbox('IPR Model', list(IPR_MODELS))
                 
                 col1, col2 = st.columns(2)
                 
@@ -1943,8 +2198,8 @@ if st.session_state.selected_tool == "Completions":
                     
                     ipr_model = st.selectbox(
                         'IPR Model',
-                        ['Well PI', 'Vogel', 'Fetkovitch', 'Jones'],
-                        index=['Well PI', 'Vogel', 'Fetkovitch', 'Jones'].index(basic_info['ipr_model'])
+                        list(IPR_MODELS),
+                        index=list(IPR_MODELS).index(canonical_ipr_model(basic_info['ipr_model']))
                     )
                 
                 if st.form_submit_button("💾 Update Basic Info", type="primary"):
@@ -1966,7 +2221,7 @@ if st.session_state.selected_tool == "Completions":
                 st.write("### Reservoir Properties")
               
                 # Get current IPR model
-                ipr_model = current_completion['basic_info']['ipr_model']
+                ipr_model = canonical_ipr_model(current_completion['basic_info']['ipr_model'])
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -2036,7 +2291,7 @@ if st.session_state.selected_tool == "Completions":
                     # Display Vogel equation
                     st.latex(r"Q = Q_{max} \left[ 1 - (1-C)\frac{P_{wf}}{P_{ws}} - C\left(\frac{P_{wf}}{P_{ws}}\right)^2 \right]")
                 
-                elif ipr_model == 'Fetkovitch':
+                elif ipr_model == 'Fetkovich':
                     st.write("#### Fetkovich Parameters")
                     
                     # Add AOFP (Absolute Open Flow Potential) input
@@ -2334,9 +2589,16 @@ if st.session_state.selected_tool == "Completions":
         with col4:
             completion_rate = (completions_with_fluids / total_completions * 100) if total_completions > 0 else 0
             st.metric("Configuration Complete", f"{completion_rate:.0f}%")
+if st.session_state.selected_tool == "Completions":
+    completions_section()
             
 #Well schematics
-if st.session_state.selected_tool == "Well schematics":
+@st.fragment
+def well_schematics_section():
+    """Well Design > Well schematics"""
+    ensure_sections('tubulars', 'survey', 'completions')
+    import matplotlib.pyplot as plt
+    from wellarchitecturedesign import Tubular, Well, Tubing
     # Get bottom depth from survey section
     bottom_depth = st.session_state.get('bottom_depth', 0.0)
     survey_type = st.session_state.get('survey_type', 'Vertical')
@@ -2396,15 +2658,16 @@ if st.session_state.selected_tool == "Well schematics":
                 kop = bottom_depth
                 st.info(f"Vertical well detected: Setting KOP to bottom depth ({bottom_depth} ft)")
             else:
-                # For 2D/3D wells, find the first row where angle > 0
+                # For 2D/3D wells, find the first station where angle > 0
                 if 'survey_df' in st.session_state and not st.session_state.survey_df.empty:
                     survey_df = st.session_state.survey_df
                     if 'Angle (°)' in survey_df.columns:
-                        # Find the first row with angle > 0
-                        first_angle_row = survey_df[survey_df['Angle (°)'] > 0].head(1)
-                        if not first_angle_row.empty:
-                            kop = first_angle_row['MD (ft)'].values[0]
-                            st.info(f"{survey_type} well detected: Setting KOP to first angle change at {kop} ft")
+                        # The survey model tracks the first station with angle > 0 across edits
+                        kickoff_md = survey_model().kickoff_md()
+                        if kickoff_md is not None:
+                            kop = kickoff_md
+                            st.info(f"{survey_type} well detected: Setting KOP to first angle change at {kop} ft "
+                                    f"({survey_depth_index().tvd(kop):.1f} ft TVD)")
                         else:
                             # If no angle > 0 found, use bottom depth
                             kop = bottom_depth
@@ -2520,282 +2783,15 @@ if st.session_state.selected_tool == "Well schematics":
         plt.close(fig)
     except Exception as e:
         st.error(f"Error generating visualization: {str(e)}")
-# Add these functions at the top of your script, after imports but before any other code
-def find_intersection_point(q_ipr, p_ipr, q_vlp, p_vlp):
-    """
-    Find the intersection point between IPR and VLP curves.
-    Returns the intersection flow rate, pressure, and index.
-    """
-    # Interpolate VLP to match IPR flow rates
-    vlp_interp = np.interp(q_ipr, q_vlp, p_vlp)
-    
-    # Find minimum difference
-    diff = np.abs(p_ipr - vlp_interp)
-    idx = np.argmin(diff)
-    
-    # Get intersection point
-    q_intersect = q_ipr[idx]
-    p_intersect = (p_ipr[idx] + vlp_interp[idx]) / 2
-    
-    return q_intersect, p_intersect, idx
-def calculate_fluid_properties(fluid_data, pressure, temperature):
-    """Calculate fluid properties at given pressure and temperature"""
-    # Get fluid properties
-    water_cut = fluid_data.get('water_cut', 0.0)
-    API = fluid_data.get('API', 35.0)
-    gas_sg = fluid_data.get('gas_specific_gravity', 0.65)
-    water_sg = fluid_data.get('water_specific_gravity', 1.0)
-    GOR = fluid_data.get('GOR', 0.0)
-    
-    # Calculate densities
-    gamma_o = 141.5 / (API + 131.5)  # Oil specific gravity
-    rho_o_surface = gamma_o * 62.4  # Oil density at surface (lb/ft³)
-    rho_w_surface = water_sg * 62.4  # Water density at surface (lb/ft³)
-    
-    # Calculate formation volume factors (simplified)
-    # Oil formation volume factor (Standing correlation)
-    Rs = GOR  # Solution GOR (SCF/STB)
-    Bo = 0.9759 + 0.00012 * (Rs * (gas_sg / gamma_o)**0.5 + 1.25 * temperature)**1.2
-    
-    # Water formation volume factor (assumed constant)
-    Bw = 1.0
-    
-    # Gas formation volume factor
-    Z = 0.9  # Compressibility factor (simplified)
-    Bg = 0.0283 * Z * (temperature + 460) / pressure  # (ft³/SCF)
-    
-    # Calculate densities at downhole conditions
-    rho_o = rho_o_surface / Bo  # lb/ft³
-    rho_w = rho_w_surface / Bw  # lb/ft³
-    rho_g = 0.0764 * gas_sg * pressure / (Z * (temperature + 460))  # lb/ft³
-    
-    # Calculate mixture properties
-    rho_l = water_cut * rho_w + (1 - water_cut) * rho_o  # Liquid density
-    
-    return {
-        'rho_o': rho_o,
-        'rho_w': rho_w,
-        'rho_g': rho_g,
-        'rho_l': rho_l,
-        'Bo': Bo,
-        'Bw': Bw,
-        'Bg': Bg,
-        'Rs': Rs,
-        'water_cut': water_cut
-    }
-def calculate_vlp_with_casing(tubing_data, casing_data, fluid_data, wellhead_pressure, flow_rates, reservoir_temp, 
-                             tubing_shoe_depth, perforation_depth):
-    """
-    Calculate VLP curve including both casing and tubing sections.
-    Returns pressure values array (same length as flow_rates)
-    """
-    # Calculate segment lengths
-    casing_length = perforation_depth - tubing_shoe_depth
-    tubing_length = tubing_shoe_depth
-    
-    bhp_values = []
-    
-    for q in flow_rates:
-        if q == 0:
-            # At zero flow, BHP = wellhead pressure + hydrostatic head of entire column
-            # Get fluid properties
-            water_cut = fluid_data.get('water_cut', 0.0)
-            API = fluid_data.get('API', 35.0)
-            water_sg = fluid_data.get('water_specific_gravity', 1.0)
-            
-            gamma_o = 141.5 / (API + 131.5)
-            rho_o_surface = gamma_o * 62.4
-            rho_w_surface = water_sg * 62.4
-            rho_l_avg = water_cut * rho_w_surface + (1 - water_cut) * rho_o_surface
-            
-            # Total hydrostatic pressure
-            bhp = wellhead_pressure + (rho_l_avg * perforation_depth) / 144
-            bhp_values.append(bhp)
-            continue
-        
-        # Start with wellhead pressure
-        current_pressure = wellhead_pressure
-        
-        # 1. Calculate pressure drop in TUBING section (from wellhead to tubing shoe)
-        # Get tubing properties
-        tubing_id = tubing_data['ID(in)'].iloc[0]   # ft
-        tubing_roughness = tubing_data['Roughness(in)'].iloc[0]  # ft
-        
-        # Calculate pressure at tubing shoe
-        p_tubing_shoe = calculate_segment_pressure_drop(
-            current_pressure, q, tubing_id, tubing_roughness, tubing_length, 
-            fluid_data, reservoir_temp, 60  # Surface temp = 60°F
-        )
-        
-        # 2. Calculate pressure drop in CASING section (from tubing shoe to perforation)
-        # Get casing properties
-        casing_id = casing_data['ID(in)'].iloc[0]   # ft
-        casing_roughness = casing_data['Roughness(in)'].iloc[0]   # ft
-        
-        # Calculate temperature at tubing shoe (linear gradient)
-        temp_gradient = (reservoir_temp - 60) / perforation_depth  # °F/ft
-        temp_at_tubing_shoe = 60 + temp_gradient * tubing_shoe_depth
-        
-        # Calculate pressure at perforation
-        p_perforation = calculate_segment_pressure_drop(
-            p_tubing_shoe, q, casing_id, casing_roughness, casing_length, 
-            fluid_data, reservoir_temp, temp_at_tubing_shoe
-        )
-        
-        bhp_values.append(p_perforation)
-    
-    return np.array(bhp_values)
-def calculate_segment_pressure_drop(inlet_pressure, flow_rate, diameter, roughness, length, 
-                                   fluid_data, reservoir_temp, inlet_temp):
-    """
-    Calculate pressure drop for a single segment using Hagedorn and Brown correlation
-    """
-    # Constants
-    g = 32.174  # ft/s² (gravity)
-    A = np.pi * (diameter / 2) ** 2  # Cross-sectional area (ft²)
-    
-    # Fluid properties
-    water_cut = fluid_data.get('water_cut', 0.0)
-    API = fluid_data.get('API', 35.0)
-    gas_sg = fluid_data.get('gas_specific_gravity', 0.65)
-    water_sg = fluid_data.get('water_specific_gravity', 1.0)
-    GOR = fluid_data.get('GOR', 0.0)
-    
-    # Calculate densities
-    gamma_o = 141.5 / (API + 131.5)
-    rho_o_surface = gamma_o * 62.4
-    rho_w_surface = water_sg * 62.4
-    
-    # Surface tension calculation
-    sigma_o = 39 - 0.257 * API
-    sigma_w = 72
-    sigma_l = (1 - water_cut) * sigma_o + water_cut * sigma_w
-    
-    # Initial guess for outlet pressure
-    outlet_pressure = inlet_pressure + 500  # psi
-    
-    # Iterative calculation
-    for iteration in range(20):
-        # Average pressure and temperature
-        p_avg = (inlet_pressure + outlet_pressure) / 2
-        T_avg = (inlet_temp + reservoir_temp) / 2  # °F
-        
-        # Calculate fluid properties at average conditions
-        # Solution GOR using Standing correlation
-        Rs = gas_sg * ((p_avg / 18.2 + 1.4) * 10**(0.0125 * API - 0.00091 * T_avg))**1.2048
-        Rs = min(GOR, Rs)
-        
-        # Oil formation volume factor
-        Bo = 0.9759 + 0.00012 * (Rs * (gas_sg / gamma_o)**0.5 + 1.25 * T_avg)**1.2
-        
-        # Water formation volume factor
-        Bw = 1.0 + 1.2 * 10**-5 * (T_avg - 60) + 1.0 * 10**-6 * (T_avg - 60)**2
-        
-        # Gas formation volume factor
-        T_pr = (T_avg + 460) / (168 + 325 * gas_sg - 12.5 * gas_sg**2)
-        p_pr = p_avg / (677 + 15 * gas_sg - 37.5 * gas_sg**2)
-        Z = 0.701 - 0.000645 * p_pr - 0.016 * T_pr + 0.000044 * p_pr * T_pr
-        Z = max(0.7, min(1.2, Z))
-        Bg = 0.00504 * Z * (T_avg + 460) / p_avg
-        
-        # Calculate densities
-        rho_o = rho_o_surface / Bo
-        rho_w = rho_w_surface / Bw
-        rho_g = 0.0764 * gas_sg * (p_avg / 14.7) * (520 / (T_avg + 460)) / Z
-        rho_l = water_cut * rho_w + (1 - water_cut) * rho_o
-        
-        # Calculate flow rates
-        q_o = flow_rate * (1 - water_cut)
-        q_w = flow_rate * water_cut
-        q_o_res = q_o * Bo
-        q_w_res = q_w * Bw
-        q_g_free = max(0, (GOR - Rs) * q_o)
-        q_g_res = q_g_free * Bg
-        q_total = q_o_res + q_w_res + q_g_res
-        
-        # Convert to ft³/s
-        q_total_cfs = q_total * 5.615 / 86400
-        
-        # Superficial velocities
-        v_sl = (q_o_res + q_w_res) * 5.615 / 86400 / A
-        v_sg = q_g_res * 5.615 / 86400 / A
-        v_m = v_sl + v_sg
-        
-        # No-slip holdup
-        lambda_l = v_sl / v_m if v_m > 0 else 0
-        
-        # Dimensionless numbers
-        N_lv = 1.938 * v_sl * (rho_l / sigma_l)**0.25
-        N_gv = 1.938 * v_sg * (rho_l / sigma_l)**0.25
-        N_d = 120.872 * diameter * (rho_l / sigma_l)**0.5
-        
-        # Liquid viscosity
-        x = 10**(3.0324 - 0.02023 * API) * T_avg**(-1.163)
-        mu_od = 10**x - 1
-        A = 10.715 * (Rs + 100)**(-0.515)
-        B = 5.44 * (Rs + 150)**(-0.338)
-        mu_o = A * mu_od**B
-        mu_w = 1.0
-        mu_l = water_cut * mu_w + (1 - water_cut) * mu_o
-        
-        # N_L
-        N_l = 0.15726 * mu_l * (1 / (rho_l * sigma_l**3))**0.25
-        
-        # Parameter X
-        X = N_lv * (N_gv**0.38) / (N_d**2.14)
-        
-        # Viscosity correction factor
-        if N_l < 0.002:
-            psi = 1.0
-        elif N_l < 0.01:
-            psi = 1.0 + 30 * (N_l - 0.002)
-        elif N_l < 0.03:
-            psi = 1.0 + 30 * (0.01 - 0.002) + 20 * (N_l - 0.01)
-        elif N_l < 0.1:
-            psi = 1.0 + 30 * (0.01 - 0.002) + 20 * (0.03 - 0.01) + 10 * (N_l - 0.03)
-        else:
-            psi = 1.0 + 30 * (0.01 - 0.002) + 20 * (0.03 - 0.01) + 10 * (0.1 - 0.03)
-        
-        # Liquid holdup
-        HL = psi * (0.18 + 0.82 * X**0.25)
-        HL = max(lambda_l, min(0.95, HL))
-        
-        # Mixture properties
-        rho_m = HL * rho_l + (1 - HL) * rho_g
-        mu_g = 0.02
-        mu_m = HL * mu_l + (1 - HL) * mu_g
-        
-        # Reynolds number
-        Re_tp = 1488 * rho_m * v_m * diameter / mu_m
-        
-        # Friction factor
-        if Re_tp > 0:
-            f_tp = (1 / (-2 * np.log10((roughness/diameter)/3.7065 + 5.5452/Re_tp**0.9)))**2
-        else:
-            f_tp = 0.02
-        
-        # Pressure gradient
-        dp_dz_gravity = rho_m / 144
-        dp_dz_friction = f_tp * rho_m * v_m**2 / (2 * diameter * 144)
-        dp_dz = dp_dz_gravity + dp_dz_friction
-        
-        # Total pressure drop
-        dp_total = dp_dz * length
-        
-        # Update outlet pressure
-        outlet_pressure_new = inlet_pressure + dp_total
-        
-        # Check convergence
-        if abs(outlet_pressure_new - outlet_pressure) < 1:
-            outlet_pressure = outlet_pressure_new
-            break
-        else:
-            outlet_pressure = outlet_pressure_new
-    
-    return outlet_pressure
+if st.session_state.selected_tool == "Well schematics":
+    well_schematics_section()
 # Nodal Analysis Section
 # Nodal Analysis Section
-if st.session_state.show_nodal_analysis:
+@st.fragment
+def nodal_analysis_section():
+    """Nodal Analysis: only the active tab is computed and drawn"""
+    ensure_sections('tubulars', 'survey', 'completions', 'nodal')
+    import matplotlib.pyplot as plt
     st.header("Nodal Analysis 📊")
     
     # Initialize session state for nodal analysis if not exists
@@ -2823,10 +2819,14 @@ if st.session_state.show_nodal_analysis:
             }
         }
     
-    # Create tabs for different parts of nodal analysis
-    tab1, tab2, tab3, tab4 = st.tabs(["🛢️ Well Configuration", "💧 Fluid Selection", "📈 Analysis", "🔍 Sensitivity Analysis"])
+    # Tab selector: unlike st.tabs, only the active tab's code runs, so the others neither compute nor draw
+    nodal_tabs = ["🛢️ Well Configuration", "💧 Fluid Selection", "📈 Analysis", "🔍 Sensitivity Analysis",
+                  "🏭 Field Run"]
+    active_tab = st.radio("Nodal analysis step", nodal_tabs, horizontal=True, key="nodal_active_tab",
+                          label_visibility="collapsed")
+    st.divider()
     
-    with tab1:
+    if active_tab == nodal_tabs[0]:
         st.subheader("Well Configuration")
         st.write("Select well components for nodal analysis:")
         
@@ -2919,7 +2919,7 @@ if st.session_state.show_nodal_analysis:
         else:
             st.warning("No completions available. Please create completions in Well Design section.")
     
-    with tab2:
+    if active_tab == nodal_tabs[1]:
         st.subheader("Fluid Selection")
         st.write("Select fluid for analysis:")
         
@@ -2948,7 +2948,7 @@ if st.session_state.show_nodal_analysis:
         else:
             st.warning("No fluids available. Please create fluids in Fluid Manager section.")
     
-    with tab3:
+    if active_tab == nodal_tabs[2]:
         st.subheader("Nodal Analysis")
         st.write("Configure analysis parameters and run the simulation:")
         
@@ -3025,9 +3025,10 @@ if st.session_state.show_nodal_analysis:
                 # Flow correlation selection
                 flow_correlation = st.selectbox(
                     "Flow Correlation",
-                    ["Hagedorn and Brown (Vertical)"],
+                    ["Hagedorn and Brown (Vertical)" if well_geometry() is None else "Hagedorn and Brown (Deviated)"],
                     index=0,
-                    disabled=True  # Only Hagedorn and Brown for now
+                    disabled=True,  # Only Hagedorn and Brown for now
+                    help="Deviated when a 2D/3D survey is entered: the gravity term follows the survey inclination"
                 )
                 
                 # Number of points for curve generation
@@ -3074,218 +3075,48 @@ if st.session_state.show_nodal_analysis:
                         # Get perforation depth from completion data
                         perforation_depth = completion_data['basic_info']['middle_md']
                         
-                        # Get tubing data and tubing shoe depth
-                        if 'Tubing' in st.session_state and not st.session_state.Tubing.empty:
-                            tubing_data = st.session_state.Tubing
-                            
-                            # Get selected tubing if available, otherwise use the first one
-                            selected_tubing_name = st.session_state.nodal_data['well_configuration'].get('selected_tubing')
-                            if selected_tubing_name and selected_tubing_name in tubing_data['Name'].values:
-                                selected_tubing = tubing_data[tubing_data['Name'] == selected_tubing_name]
-                            else:
-                                selected_tubing = tubing_data.head(1)  # Use first tubing if none selected
-                            
-                            # Get tubing shoe depth from selected tubing
-                            tubing_shoe_depth = selected_tubing['To MD'].iloc[0]
-                            
-                            # Validate that tubing shoe is above perforation
-                            if tubing_shoe_depth >= perforation_depth:
-                                st.warning(f"Warning: Tubing shoe depth ({tubing_shoe_depth} ft) is at or below perforation depth ({perforation_depth} ft). Adjusting tubing shoe depth to be 200 ft above perforation.")
-                                tubing_shoe_depth = perforation_depth - 200  # Default 200 ft above
-                            
-                            # Get casing data
-                            if 'casing_liners' in st.session_state and not st.session_state.casing_liners.empty:
-                                casing_data = st.session_state.casing_liners
-                                
-                                # Find casing that covers the interval from tubing shoe to perforation
-                                # Look for casing with From MD <= tubing_shoe_depth and To MD >= perforation_depth
-                                suitable_casings = casing_data[
-                                    (casing_data['From MD'] <= tubing_shoe_depth) & 
-                                    (casing_data['To MD'] >= perforation_depth)
-                                ]
-                                
-                                if not suitable_casings.empty:
-                                    # Use the casing with the smallest ID (innermost)
-                                    casing_data = suitable_casings.sort_values('ID(in)').head(1)
-                                else:
-                                    # If no suitable casing found, use the innermost casing that covers the perforation
-                                    casing_at_perforation = casing_data[
-                                        (casing_data['From MD'] <= perforation_depth) & 
-                                        (casing_data['To MD'] >= perforation_depth)
-                                    ]
-                                    
-                                    if not casing_at_perforation.empty:
-                                        casing_data = casing_at_perforation.sort_values('ID(in)').head(1)
-                                        st.warning("Warning: No casing covers the entire interval from tubing shoe to perforation. Using casing that covers perforation depth.")
-                                    else:
-                                        # Fallback to first casing
-                                        casing_data = casing_data.head(1)
-                                        st.warning("Warning: No suitable casing found. Using first casing available.")
-                            else:
-                                # Create default casing data if none exists
-                                casing_data = pd.DataFrame({
-                                    'Section type': ['Casing'],
-                                    'Name': ['Default Casing'],
-                                    'From MD': [0],
-                                    'To MD': [perforation_depth],
-                                    'ID(in)': [8.0],  # Default 8" ID
-                                    'OD(in)': [8.625],  # Default 8-5/8" OD
-                                    'Wall thickness(in)': [0.3125],
-                                    'Roughness(in)': [0.0006]
-                                })
-                                st.info("No casing data available. Using default casing properties.")
-                            
-                            use_manual_tubing = False
+                        # Tubing, casing and shoe depth the flow passes through
+                        if not use_manual_tubing:
+                            casing_table = st.session_state.casing_liners if 'casing_liners' in st.session_state else None
+                            flow_path = select_flow_path(
+                                tubing_data, casing_table, perforation_depth,
+                                st.session_state.nodal_data['well_configuration'].get('selected_tubing')
+                            )
                         else:
-                            # Use manual tubing parameters
-                            manual_params = st.session_state.nodal_data['well_configuration']['manual_tubing_params']
-                            tubing_data = pd.DataFrame({
-                                'Name': ['Manual Tubing'],
-                                'To MD': [manual_params['length']],
-                                'ID(in)': [manual_params['id']],
-                                'OD(in)': [manual_params['od']],
-                                'Roughness(in)': [manual_params['roughness']]
-                            })
-                            tubing_shoe_depth = manual_params['length']
-                            
-                            # Validate that tubing shoe is above perforation
-                            if tubing_shoe_depth >= perforation_depth:
-                                st.warning(f"Warning: Tubing shoe depth ({tubing_shoe_depth} ft) is at or below perforation depth ({perforation_depth} ft). Adjusting tubing shoe depth to be 200 ft above perforation.")
-                                tubing_shoe_depth = perforation_depth - 200  # Default 200 ft above perforation
-                                manual_params['length'] = tubing_shoe_depth
-                            
-                            # Create default casing data for manual tubing
-                            casing_data = pd.DataFrame({
-                                'Section type': ['Casing'],
-                                'Name': ['Default Casing'],
-                                'From MD': [0],
-                                'To MD': [perforation_depth],
-                                'ID(in)': [8.0],  # Default 8" ID
-                                'OD(in)': [8.625],  # Default 8-5/8" OD
-                                'Wall thickness(in)': [0.3125],
-                                'Roughness(in)': [0.0006]
-                            })
+                            flow_path = select_flow_path(tubing_data, None, perforation_depth)
+                            if flow_path['tubing_shoe_depth'] != manual_params['length']:
+                                manual_params['length'] = flow_path['tubing_shoe_depth']
+                        for warning in flow_path['warnings']:
+                            st.warning(warning)
+                        if use_manual_tubing:
                             st.info("Using manual tubing parameters with default casing properties.")
-                            use_manual_tubing = True
-                        
-                        # Calculate IPR curve using the completion's IPR function
-                        # Generate flow rate range for IPR calculation
-                        ipr_flow_rates = np.linspace(0, max_flow_rate * 1.5, 200)  # Extended range for better intersection finding
-                        
-                        # Calculate IPR using the completion's IPR model
-                        ipr_model = completion_data['basic_info']['ipr_model']
-                        reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
-                        
-                        # Initialize IPR pressures array
-                        ipr_pressures = []
-                        
-                        # Calculate IPR based on the selected model
-                        if ipr_model == 'Vogel':
-                            q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)
-                            c = completion_data['reservoir'].get('vogel_coefficient', 0.2)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    # Solve Vogel equation for pwf
-                                    # q = q_max * [1 - (1-C)*(pwf/P_ws) - C*(pwf/P_ws)^2]
-                                    a = c
-                                    b = 1 - c
-                                    c_term = (q / q_max) - 1
-                                    
-                                    discriminant = b**2 - 4*a*c_term
-                                    if discriminant >= 0:
-                                        pwf_ratio = (-b + np.sqrt(discriminant)) / (2*a)
-                                        pwf = pwf_ratio * reservoir_pressure
-                                    else:
-                                        pwf = reservoir_pressure
-                                ipr_pressures.append(max(0, pwf))
+                        elif flow_path['default_casing']:
+                            st.info("No casing data available. Using default casing properties.")
                         
-                        elif ipr_model == 'Fetkovich':
-                            q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)
-                            n = completion_data['reservoir'].get('fetkovich_exponent', 1.0)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    # Solve Fetkovich equation for pwf
-                                    pwf_ratio = np.sqrt(max(0, 1 - (q/q_max)**(1/n)))
-                                    pwf = pwf_ratio * reservoir_pressure
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        elif ipr_model == 'Jones':
-                            a = completion_data['reservoir'].get('jones_coefficient_a', 0.5)
-                            b = completion_data['reservoir'].get('jones_coefficient_b', 0.001)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    pwf = reservoir_pressure - (a * q + b * q**2)
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        else:  # Well PI
-                            productivity_index = completion_data['reservoir'].get('productivity_index', 1.0)
-                            use_vogel = completion_data['reservoir'].get('use_vogel_below_bubble_point', False)
-                            
-                            # Calculate bubble point if needed
-                            pb = None
-                            if use_vogel and fluid_data:
-                                GOR = fluid_data.get('GOR', 500)
-                                gas_specific_gravity = fluid_data.get('gas_specific_gravity', 0.85)
-                                API = fluid_data.get('API', 35)
-                                reservoir_temperature = completion_data['reservoir'].get('reservoir_temperature', 180)
-                                
-                                try:
-                                    gamma_o = 141.5 / (API + 131.5)
-                                    pb = 18.2 * ((GOR * gas_specific_gravity) / gamma_o)**0.83 * \
-                                         10**(0.00091 * reservoir_temperature - 0.0125 * API)
-                                    pb = max(100, min(pb, reservoir_pressure * 0.95))
-                                except:
-                                    pb = reservoir_pressure * 0.8
-                            
-                            for q in ipr_flow_rates:
-                                if use_vogel and pb and q > productivity_index * (reservoir_pressure - pb):
-                                    # Below bubble point - use Vogel equation
-                                    qb = productivity_index * (reservoir_pressure - pb)
-                                    pwf = pb * (1 - 0.2 * ((q - qb) / (productivity_index * pb / 1.8)) - 
-                                                0.8 * ((q - qb) / (productivity_index * pb / 1.8))**2)
-                                else:
-                                    # Above bubble point - use straight-line PI
-                                    pwf = reservoir_pressure - (q / productivity_index)
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        # Convert to numpy array
-                        ipr_pressures = np.array(ipr_pressures)
-                        
-                        # Calculate VLP curve including both casing and tubing sections
-                        vlp_pressures = calculate_vlp_with_casing(
-                            tubing_data, casing_data, fluid_data, outlet_pressure, 
-                            flow_rates, reservoir_temp, tubing_shoe_depth, perforation_depth
+                        results = cached_nodal_analysis(
+                            flow_path['tubing_data'], flow_path['casing_data'], fluid_data, completion_data,
+                            outlet_pressure, flow_rates, reservoir_temp, flow_path['tubing_shoe_depth'], perforation_depth,
+                            well_geometry()
                         )
-                        
-                        # Find intersection point
-                        q_intersect, p_intersect, idx = find_intersection_point(ipr_flow_rates, ipr_pressures, flow_rates, vlp_pressures)
+                        if not results['vlp_converged']:
+                            st.warning(f"Outlet pressure did not converge for {results['vlp_unconverged_rates']} "
+                                       f"of {len(flow_rates)} VLP flow rates.")
                         
                         # Store results
-                        st.session_state.nodal_data['results'] = {
-                            'q_ipr': ipr_flow_rates,
-                            'p_ipr': ipr_pressures,
-                            'q_vlp': flow_rates,
-                            'p_vlp': vlp_pressures,
-                            'q_intersect': q_intersect,
-                            'p_intersect': p_intersect,
-                            'idx_intersect': idx,
-                            'outlet_pressure': outlet_pressure,
-                            'flow_correlation': "Hagedorn and Brown (Vertical)",
-                            'use_manual_tubing': use_manual_tubing,
-                            'tubing_shoe_depth': tubing_shoe_depth,
-                            'perforation_depth': perforation_depth,
-                            'reservoir_temp': reservoir_temp,
-                            'analysis_complete': True
-                        }
+                        results['use_manual_tubing'] = use_manual_tubing
+                        results['analysis_complete'] = True
+                        st.session_state.nodal_data['results'] = results
+                        
+                        # Keep the stage timings of recent runs so they can be compared
+                        timing_history = st.session_state.nodal_data.setdefault('timing_history', [])
+                        timing_history.append({
+                            'run_time': datetime.now().strftime("%H:%M:%S"),
+                            'completion': selected_completion,
+                            'points': int(num_points),
+                            'q_op': float(results['q_intersect']),
+                            'timings': results['timings']
+                        })
+                        del timing_history[:-10]
                         
                         st.success("Nodal analysis completed successfully!")
                 except Exception as e:
@@ -3302,6 +3133,7 @@ if st.session_state.show_nodal_analysis:
                 # Check if analysis was completed successfully
                 if results.get('analysis_complete', False):
                     st.subheader("Analysis Results")
+                    show_cache_status(['Nodal analysis'])
                     
                     # Display depth information
                     st.write("**Well Configuration:**")
@@ -3335,37 +3167,96 @@ if st.session_state.show_nodal_analysis:
                     
                     # Plot curves
                     st.subheader("IPR and VLP Curves")
+                    plot_timer = StageTimer()
                     
-                    fig, ax = plt.subplots(figsize=(10, 6))
+                    with plot_timer.stage('Plotting'):
+                        fig, ax = plt.subplots(figsize=(10, 6))
                     
-                    # Plot IPR curve
-                    ax.plot(results['q_ipr'], results['p_ipr'], 'b-', linewidth=2, label='IPR Curve')
+                        # Plot IPR curve
+                        ax.plot(results['q_ipr'], results['p_ipr'], 'b-', linewidth=2, label='IPR Curve')
                     
-                    # Plot VLP curve
-                    ax.plot(results['q_vlp'], results['p_vlp'], 'r-', linewidth=2, label='VLP Curve')
+                        # Plot VLP curve
+                        ax.plot(results['q_vlp'], results['p_vlp'], 'r-', linewidth=2, label='VLP Curve')
                     
-                    # Plot intersection point
-                    ax.plot(results['q_intersect'], results['p_intersect'], 'go', markersize=10, label='Operating Point')
+                        # Plot intersection point
+                        ax.plot(results['q_intersect'], results['p_intersect'], 'go', markersize=10, label='Operating Point')
                     
-                    # Add reservoir pressure line
-                    reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
-                    ax.axhline(y=reservoir_pressure, color='k', linestyle='--', alpha=0.5, label='Reservoir Pressure')
+                        # Add reservoir pressure line
+                        reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
+                        ax.axhline(y=reservoir_pressure, color='k', linestyle='--', alpha=0.5, label='Reservoir Pressure')
                     
-                    # Add outlet pressure line
-                    ax.axhline(y=results['outlet_pressure'], color='gray', linestyle='--', alpha=0.5, label='Outlet Pressure')
+                        # Add outlet pressure line
+                        ax.axhline(y=results['outlet_pressure'], color='gray', linestyle='--', alpha=0.5, label='Outlet Pressure')
                     
-                    # Formatting
-                    ax.set_xlabel('Flow Rate (STB/D)')
-                    ax.set_ylabel('Pressure (psi)')
-                    ax.set_title(f'Nodal Analysis - {selected_completion}')
-                    ax.grid(True, alpha=0.3)
-                    ax.legend()
+                        # Formatting
+                        ax.set_xlabel('Flow Rate (STB/D)')
+                        ax.set_ylabel('Pressure (psi)')
+                        ax.set_title(f'Nodal Analysis - {selected_completion}')
+                        ax.grid(True, alpha=0.3)
+                        ax.legend()
                     
-                    # Set axis limits
-                    ax.set_xlim(0, max(results['q_ipr'].max(), results['q_vlp'].max()) * 1.1)
-                    ax.set_ylim(0, max(results['p_ipr'].max(), results['p_vlp'].max()) * 1.1)
+                        # Set axis limits
+                        ax.set_xlim(0, max(results['q_ipr'].max(), results['q_vlp'].max()) * 1.1)
+                        ax.set_ylim(0, max(results['p_ipr'].max(), results['p_vlp'].max()) * 1.1)
                     
-                    st.pyplot(fig)
+                        st.pyplot(fig)
+                    
+                    # Pressure traverse at the operating point
+                    if results.get('traverse'):
+                        traverse = results['traverse']
+                        with st.expander("Pressure Traverse at Operating Point"):
+                            st.write(f"Marched to perforation in {len(traverse['md'])} stations "
+                                     f"({traverse['evaluations']} gradient evaluations)"
+                                     + (f", perforation at {traverse['tvd'][-1]:.0f} ft TVD"
+                                        if 'tvd' in traverse and len(traverse['tvd']) else ""))
+                            with plot_timer.stage('Plotting'):
+                                fig, (ax_p, ax_hl) = plt.subplots(1, 2, figsize=(12, 6), sharey=True)
+                                ax_p.plot(traverse['pressure'], traverse['md'], 'b.-', label='Pressure')
+                                ax_p.axhline(y=results['tubing_shoe_depth'], color='gray', linestyle='--', alpha=0.5, label='Tubing Shoe')
+                                ax_p.set_xlabel('Pressure (psi)')
+                                ax_p.set_ylabel('MD (ft)')
+                                ax_p.grid(True, alpha=0.3)
+                                ax_p.legend()
+                                ax_p.invert_yaxis()
+                                ax_hl.plot(traverse['holdup'], traverse['md'], 'g.-')
+                                ax_hl.set_xlabel('Liquid Holdup')
+                                ax_hl.grid(True, alpha=0.3)
+                                st.pyplot(fig)
+                    
+                    # Per-stage timings of this run, with the drawing above as the Plotting stage
+                    results.setdefault('timings', {}).update(plot_timer.as_dict())
+                    with st.expander("⏱️ Performance"):
+                        timings = results['timings']
+                        total_s = total_wall_time(timings)
+                        st.write(f"Total: {total_s * 1000:.1f} ms")
+                        st.dataframe(pd.DataFrame([
+                            {
+                                'Stage': stage,
+                                'Wall time (ms)': entry['wall_s'] * 1000,
+                                'Share (%)': 100 * entry['wall_s'] / total_s if total_s > 0 else 0.0,
+                                'Calls': entry['calls'],
+                                'Iterations': entry['iterations']
+                            }
+                            for stage, entry in timings.items()
+                        ]), hide_index=True, use_container_width=True)
+                        st.caption("VLP iterations are outlet-pressure solver iterations over all rates; Intersection "
+                                   "calls are VLP evaluations and its iterations Brent steps; Traverse iterations "
+                                   "are gradient evaluations. Plotting is timed on the latest redraw.")
+                        
+                        timing_history = st.session_state.nodal_data.get('timing_history', [])
+                        if len(timing_history) > 1:
+                            st.write("**Recent runs (ms)**")
+                            st.dataframe(pd.DataFrame([
+                                {
+                                    'Run': run['run_time'],
+                                    'Completion': run['completion'],
+                                    'Points': run['points'],
+                                    'Operating rate (STB/D)': run['q_op'],
+                                    **{stage: entry['wall_s'] * 1000 for stage, entry in run['timings'].items()},
+                                    'Total': total_wall_time(run['timings']) * 1000
+                                }
+                                for run in reversed(timing_history)
+                            ]), hide_index=True, use_container_width=True)
                     
                     # Display flow regime information
                     st.subheader("Flow Regime Information")
@@ -3442,7 +3333,7 @@ if st.session_state.show_nodal_analysis:
                     else:
                         st.warning("Please run the analysis to see results.")
     
-    with tab4:  # Sensitivity Analysis Tab
+    if active_tab == nodal_tabs[3]:  # Sensitivity Analysis Tab
         st.subheader("Sensitivity Analysis")
         st.write("Analyze how changes in tubing parameters affect the VLP curve and operating point:")
         
@@ -3500,17 +3391,32 @@ if st.session_state.show_nodal_analysis:
                     format="%.3f" if parameter == "Tubing ID" else "%.4f"
                 )
             
+            plot_vlp_curves = st.checkbox(
+                "Plot full VLP curves",
+                value=True,
+                help="Operating points are solved directly; untick to skip evaluating the full VLP curve for every value"
+            )
+            sensitivity_workers = st.number_input(
+                "Worker processes",
+                min_value=1,
+                max_value=max(1, default_worker_count()),
+                value=max(1, default_worker_count()),
+                step=1,
+                help="Parameter values are solved in parallel on this many processes; 1 runs them in the app process"
+            )
+            
             # Run sensitivity analysis button
             if st.button("🔍 Run Sensitivity Analysis", type="primary"):
                 try:
                     with st.spinner("Running sensitivity analysis..."):
                         # Generate parameter values
-                        param_values = np.arange(start_value, end_value + step_value, step_value)
+                        param_values = np.round(np.arange(start_value, end_value + step_value, step_value), VALUE_DECIMALS)
                         
                         # Initialize results arrays
                         q_op_values = []
                         p_op_values = []
                         vlp_curves = []  # Store full VLP curves for each parameter value
+                        vlp_evaluations = 0
                         
                         # Get base data
                         selected_completion = st.session_state.nodal_data['well_configuration']['selected_completion']
@@ -3521,72 +3427,26 @@ if st.session_state.show_nodal_analysis:
                         # Get perforation depth
                         perforation_depth = completion_data['basic_info']['middle_md']
                         
-                        # Get tubing data and casing data from base analysis
+                        # Get tubing data and casing data as the base analysis selects them
                         if 'Tubing' in st.session_state and not st.session_state.Tubing.empty:
-                            base_tubing_data = st.session_state.Tubing
-                            
-                            # Get selected tubing if available, otherwise use the first one
-                            selected_tubing_name = st.session_state.nodal_data['well_configuration'].get('selected_tubing')
-                            if selected_tubing_name and selected_tubing_name in base_tubing_data['Name'].values:
-                                base_selected_tubing = base_tubing_data[base_tubing_data['Name'] == selected_tubing_name]
-                            else:
-                                base_selected_tubing = base_tubing_data.head(1)
-                            
-                            # Get tubing shoe depth
-                            tubing_shoe_depth = base_selected_tubing['To MD'].iloc[0]
-                            
-                            # Get casing data
-                            if 'casing_liners' in st.session_state and not st.session_state.casing_liners.empty:
-                                casing_data = st.session_state.casing_liners
-                                
-                                # Find casing that covers the interval from tubing shoe to perforation
-                                suitable_casings = casing_data[
-                                    (casing_data['From MD'] <= tubing_shoe_depth) & 
-                                    (casing_data['To MD'] >= perforation_depth)
-                                ]
-                                
-                                if not suitable_casings.empty:
-                                    casing_data = suitable_casings.sort_values('ID(in)').head(1)
-                                else:
-                                    # If no suitable casing found, use the innermost casing that covers the perforation
-                                    casing_at_perforation = casing_data[
-                                        (casing_data['From MD'] <= perforation_depth) & 
-                                        (casing_data['To MD'] >= perforation_depth)
-                                    ]
-                                    
-                                    if not casing_at_perforation.empty:
-                                        casing_data = casing_at_perforation.sort_values('ID(in)').head(1)
-                                    else:
-                                        # Fallback to first casing
-                                        casing_data = casing_data.head(1)
-                            else:
-                                # Create default casing data if none exists
-                                casing_data = pd.DataFrame({
-                                    'Section type': ['Casing'],
-                                    'Name': ['Default Casing'],
-                                    'From MD': [0],
-                                    'To MD': [perforation_depth],
-                                    'ID(in)': [8.0],
-                                    'OD(in)': [8.625],
-                                    'Wall thickness(in)': [0.3125],
-                                    'Roughness(in)': [0.0006]
-                                })
+                            casing_table = st.session_state.casing_liners if 'casing_liners' in st.session_state else None
+                            flow_path = select_flow_path(
+                                st.session_state.Tubing, casing_table, perforation_depth,
+                                st.session_state.nodal_data['well_configuration'].get('selected_tubing')
+                            )
                         else:
                             # Use manual tubing parameters
                             manual_params = st.session_state.nodal_data['well_configuration']['manual_tubing_params']
-                            tubing_shoe_depth = manual_params['length']
-                            
-                            # Create default casing data for manual tubing
-                            casing_data = pd.DataFrame({
-                                'Section type': ['Casing'],
-                                'Name': ['Default Casing'],
-                                'From MD': [0],
-                                'To MD': [perforation_depth],
-                                'ID(in)': [8.0],
-                                'OD(in)': [8.625],
-                                'Wall thickness(in)': [0.3125],
-                                'Roughness(in)': [0.0006]
-                            })
+                            flow_path = select_flow_path(pd.DataFrame({
+                                'Name': ['Manual Tubing'],
+                                'To MD': [manual_params['length']],
+                                'ID(in)': [manual_params['id']],
+                                'OD(in)': [manual_params['od']],
+                                'Roughness(in)': [manual_params['roughness']]
+                            }), None, perforation_depth)
+                        base_tubing = flow_path['tubing_data']
+                        casing_data = flow_path['casing_data']
+                        tubing_shoe_depth = flow_path['tubing_shoe_depth']
                         
                         # Get other parameters from base analysis
                         outlet_pressure = base_results['outlet_pressure']
@@ -3600,136 +3460,39 @@ if st.session_state.show_nodal_analysis:
                         
                         # Calculate IPR curve (same for all sensitivity runs)
                         ipr_flow_rates = np.linspace(0, max_flow_rate * 1.5, 200)
-                        ipr_model = completion_data['basic_info']['ipr_model']
-                        reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
-                        
-                        # Initialize IPR pressures array
-                        ipr_pressures = []
+                        ipr_model = ipr_from_completion(completion_data, fluid_data)
+                        ipr_pressures = ipr_model.pwf(ipr_flow_rates)
                         
-                        # Calculate IPR based on the selected model
-                        if ipr_model == 'Vogel':
-                            q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)
-                            c = completion_data['reservoir'].get('vogel_coefficient', 0.2)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    # Solve Vogel equation for pwf
-                                    a = c
-                                    b = 1 - c
-                                    c_term = (q / q_max) - 1
-                                    
-                                    discriminant = b**2 - 4*a*c_term
-                                    if discriminant >= 0:
-                                        pwf_ratio = (-b + np.sqrt(discriminant)) / (2*a)
-                                        pwf = pwf_ratio * reservoir_pressure
-                                    else:
-                                        pwf = reservoir_pressure
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        elif ipr_model == 'Fetkovich':
-                            q_max = completion_data['reservoir'].get('max_flow_rate', 1000.0)
-                            n = completion_data['reservoir'].get('fetkovich_exponent', 1.0)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    pwf_ratio = np.sqrt(max(0, 1 - (q/q_max)**(1/n)))
-                                    pwf = pwf_ratio * reservoir_pressure
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        elif ipr_model == 'Jones':
-                            a = completion_data['reservoir'].get('jones_coefficient_a', 0.5)
-                            b = completion_data['reservoir'].get('jones_coefficient_b', 0.001)
-                            
-                            for q in ipr_flow_rates:
-                                if q == 0:
-                                    pwf = reservoir_pressure
-                                else:
-                                    pwf = reservoir_pressure - (a * q + b * q**2)
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        else:  # Well PI
-                            productivity_index = completion_data['reservoir'].get('productivity_index', 1.0)
-                            use_vogel = completion_data['reservoir'].get('use_vogel_below_bubble_point', False)
-                            
-                            # Calculate bubble point if needed
-                            pb = None
-                            if use_vogel and fluid_data:
-                                GOR = fluid_data.get('GOR', 500)
-                                gas_specific_gravity = fluid_data.get('gas_specific_gravity', 0.85)
-                                API = fluid_data.get('API', 35)
-                                reservoir_temperature = completion_data['reservoir'].get('reservoir_temperature', 180)
-                                
-                                try:
-                                    gamma_o = 141.5 / (API + 131.5)
-                                    pb = 18.2 * ((GOR * gas_specific_gravity) / gamma_o)**0.83 * \
-                                        10**(0.00091 * reservoir_temperature - 0.0125 * API)
-                                    pb = max(100, min(pb, reservoir_pressure * 0.95))
-                                except:
-                                    pb = reservoir_pressure * 0.8
-                            
-                            for q in ipr_flow_rates:
-                                if use_vogel and pb and q > productivity_index * (reservoir_pressure - pb):
-                                    # Below bubble point - use Vogel equation
-                                    qb = productivity_index * (reservoir_pressure - pb)
-                                    pwf = pb * (1 - 0.2 * ((q - qb) / (productivity_index * pb / 1.8)) - 
-                                                0.8 * ((q - qb) / (productivity_index * pb / 1.8))**2)
-                                else:
-                                    # Above bubble point - use straight-line PI
-                                    pwf = reservoir_pressure - (q / productivity_index)
-                                ipr_pressures.append(max(0, pwf))
-                        
-                        # Convert to numpy array
-                        ipr_pressures = np.array(ipr_pressures)
+                        # Run sensitivity analysis, streaming results back from the worker pool
+                        base_case = {
+                            'tubing_data': base_tubing,
+                            'casing_data': casing_data,
+                            'fluid_data': fluid_data,
+                            'completion_data': completion_data,
+                            'outlet_pressure': outlet_pressure,
+                            'reservoir_temp': reservoir_temp,
+                            'tubing_shoe_depth': tubing_shoe_depth,
+                            'perforation_depth': perforation_depth,
+                            # Survey path, so deviated wells stay deviated and the cache key follows the survey
+                            'geometry': well_geometry(),
+                            'flow_rates': flow_rates,
+                            'ipr_q_max': ipr_flow_rates[-1],
+                            'plot_vlp_curves': plot_vlp_curves
+                        }
+                        progress_bar = st.progress(0.0, text="Solving sensitivity cases...")
+                        case_results = cached_sensitivity(
+                            base_case, parameter, param_values, max_workers=sensitivity_workers,
+                            progress_callback=lambda done, total: progress_bar.progress(
+                                done / total, text=f"Solved {done} of {total} cases")
+                        )
+                        progress_bar.empty()
                         
-                        # Run sensitivity analysis
-                        for param_value in param_values:
-                            # Create modified tubing data based on parameter being varied
-                            if 'Tubing' in st.session_state and not st.session_state.Tubing.empty:
-                                # Use the selected tubing from base analysis
-                                modified_tubing_data = base_selected_tubing.copy()
-                                
-                                # Update the parameter being varied
-                                if parameter == "Tubing ID":
-                                    modified_tubing_data['ID(in)'] = param_value
-                                else:  # Tubing Roughness
-                                    modified_tubing_data['Roughness(in)'] = param_value
-                            else:
-                                # Use manual tubing parameters
-                                manual_params = st.session_state.nodal_data['well_configuration']['manual_tubing_params'].copy()
-                                
-                                # Update the parameter being varied
-                                if parameter == "Tubing ID":
-                                    manual_params['id'] = param_value
-                                else:  # Tubing Roughness
-                                    manual_params['roughness'] = param_value
-                                
-                                modified_tubing_data = pd.DataFrame({
-                                    'Name': ['Manual Tubing'],
-                                    'To MD': [manual_params['length']],
-                                    'ID(in)': [manual_params['id']],
-                                    'OD(in)': [manual_params['od']],
-                                    'Roughness(in)': [manual_params['roughness']]
-                                })
-                            
-                            # Calculate VLP curve with modified tubing data
-                            vlp_pressures = calculate_vlp_with_casing(
-                                modified_tubing_data, casing_data, fluid_data, outlet_pressure, 
-                                flow_rates, reservoir_temp, tubing_shoe_depth, perforation_depth
-                            )
-                            
-                            # Store the full VLP curve
-                            vlp_curves.append(vlp_pressures)
-                            
-                            # Find intersection point
-                            q_intersect, p_intersect, idx = find_intersection_point(ipr_flow_rates, ipr_pressures, flow_rates, vlp_pressures)
-                            
-                            # Store results
-                            q_op_values.append(q_intersect)
-                            p_op_values.append(p_intersect)
+                        for case in case_results:
+                            q_op_values.append(case['q_op'])
+                            p_op_values.append(case['p_op'])
+                            vlp_evaluations += case['vlp_evaluations']
+                            if case['vlp_curve'] is not None:
+                                vlp_curves.append(case['vlp_curve'])
                         
                         # Store sensitivity results
                         st.session_state.nodal_data['sensitivity'] = {
@@ -3741,6 +3504,7 @@ if st.session_state.show_nodal_analysis:
                             'q_op_values': q_op_values,
                             'p_op_values': p_op_values,
                             'vlp_curves': vlp_curves,
+                            'vlp_evaluations': vlp_evaluations,
                             'ipr_flow_rates': ipr_flow_rates,
                             'ipr_pressures': ipr_pressures,
                             'flow_rates': flow_rates,
@@ -3759,6 +3523,7 @@ if st.session_state.show_nodal_analysis:
             sensitivity_results = st.session_state.nodal_data.get('sensitivity', {})
             if sensitivity_results.get('analysis_complete', False):
                 st.subheader("Sensitivity Analysis Results")
+                show_cache_status(['Sensitivity'])
                 
                 # Create the main plot with IPR and multiple VLP curves
                 fig, ax = plt.subplots(figsize=(12, 8))
@@ -3769,19 +3534,16 @@ if st.session_state.show_nodal_analysis:
                 # Plot VLP curves for each parameter value
                 colors = plt.cm.viridis(np.linspace(0, 1, len(sensitivity_results['param_values'])))
                 
-                for i, (param_value, vlp_curve) in enumerate(zip(sensitivity_results['param_values'], sensitivity_results['vlp_curves'])):
+                vlp_curves = sensitivity_results['vlp_curves']
+                for i, param_value in enumerate(sensitivity_results['param_values']):
                     # Plot VLP curve
-                    ax.plot(sensitivity_results['flow_rates'], vlp_curve, color=colors[i], linewidth=1.5, 
-                            alpha=0.7, label=f'{parameter} = {param_value:.3f}')
-                    
-                    # Find and mark operating point
-                    q_intersect, p_intersect, idx = find_intersection_point(
-                        sensitivity_results['ipr_flow_rates'], 
-                        sensitivity_results['ipr_pressures'], 
-                        sensitivity_results['flow_rates'], 
-                        vlp_curve
-                    )
-                    ax.plot(q_intersect, p_intersect, 'o', color=colors[i], markersize=8)
+                    if vlp_curves:
+                        ax.plot(sensitivity_results['flow_rates'], vlp_curves[i], color=colors[i], linewidth=1.5, 
+                                alpha=0.7, label=f'{parameter} = {param_value:.3f}')
+                    
+                    # Mark the solved operating point
+                    ax.plot(sensitivity_results['q_op_values'][i], sensitivity_results['p_op_values'][i], 'o',
+                            color=colors[i], markersize=8, label=None if vlp_curves else f'{parameter} = {param_value:.3f}')
                 
                 # Add reservoir pressure line
                 reservoir_pressure = completion_data['reservoir'].get('reservoir_pressure', 3000)
@@ -3801,7 +3563,10 @@ if st.session_state.show_nodal_analysis:
                 flow_max = max(np.array(sensitivity_results['flow_rates']))
                 ax.set_xlim(0, max(ipr_max, flow_max) * 1.1)
                 ipr_pressure_max = max(np.array(sensitivity_results['ipr_pressures']))
-                vlp_pressure_max = max([max(vlp) for vlp in sensitivity_results['vlp_curves']])
+                if vlp_curves:
+                    vlp_pressure_max = max([max(vlp) for vlp in vlp_curves])
+                else:
+                    vlp_pressure_max = np.nanmax(np.append(sensitivity_results['p_op_values'], 0))
                 ax.set_ylim(0, max(ipr_pressure_max, vlp_pressure_max) * 1.1)
                 
                 # Add legend (limit to 10 items to avoid overcrowding)
@@ -3828,6 +3593,9 @@ if st.session_state.show_nodal_analysis:
                 })
                 
                 st.dataframe(sensitivity_df)
+                if 'vlp_evaluations' in sensitivity_results:
+                    st.caption(f"VLP evaluated at {sensitivity_results['vlp_evaluations']} flow rates "
+                               f"for {len(sensitivity_results['param_values'])} parameter values.")
                 
                 # Add download button for sensitivity results
                 st.subheader("Export Sensitivity Results")
@@ -3847,9 +3615,251 @@ if st.session_state.show_nodal_analysis:
                     st.error(f"Sensitivity analysis failed: {sensitivity_results['error']}")
                 else:
                     st.info("Run the sensitivity analysis to see results.")
+            
+            # Multi-parameter sweeps around the base case
+            st.markdown("---")
+            st.subheader("Multi-Parameter Sweep")
+            base_case = base_results.get('base_case')
+            if base_case is not None and not isinstance(base_case['tubing_data'], pd.DataFrame):
+                # Results restored from a saved session hold the base case tables as dicts
+                base_case = dict(base_case,
+                                 tubing_data=pd.DataFrame(base_case['tubing_data']),
+                                 casing_data=pd.DataFrame(base_case['casing_data']),
+                                 flow_rates=np.asarray(base_case['flow_rates'], dtype=float))
+            if base_case is None:
+                st.info("Re-run the base nodal analysis to enable multi-parameter sweeps.")
+            else:
+                base_values = {
+                    'Tubing ID': float(base_case['tubing_data']['ID(in)'].iloc[0]),
+                    'Tubing Roughness': float(base_case['tubing_data']['Roughness(in)'].iloc[0]),
+                    'Wellhead Pressure': float(base_case['outlet_pressure']),
+                    'Water Cut': float(base_case['fluid_data'].get('water_cut', 0.0)),
+                    'GOR': float(base_case['fluid_data'].get('GOR', 0.0)),
+                    'Reservoir Pressure': float(base_case['completion_data']['reservoir'].get('reservoir_pressure', 3000))
+                }
+                sweep_parameters = st.multiselect(
+                    "Parameters to vary",
+                    list(SWEEP_PARAMETERS),
+                    default=['Tubing ID', 'Wellhead Pressure']
+                )
+                design = st.radio("Case design", ["Full factorial", "Latin hypercube"], horizontal=True)
+                
+                sweep_ranges = {}
+                for sweep_parameter in sweep_parameters:
+                    base_value = base_values[sweep_parameter]
+                    if sweep_parameter == 'Water Cut':
+                        default_low, default_high = 0.0, 0.9
+                    else:
+                        default_low, default_high = 0.5 * base_value, 1.5 * base_value
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        low = st.number_input(f"{sweep_parameter} min", value=default_low,
+                                              format="%.4f", key=f"sweep_low_{sweep_parameter}")
+                    with col2:
+                        high = st.number_input(f"{sweep_parameter} max", value=default_high,
+                                               format="%.4f", key=f"sweep_high_{sweep_parameter}")
+                    with col3:
+                        levels = st.number_input(f"{sweep_parameter} levels", min_value=2, max_value=50, value=5,
+                                                 step=1, key=f"sweep_levels_{sweep_parameter}",
+                                                 disabled=design != "Full factorial")
+                    sweep_ranges[sweep_parameter] = (low, high, int(levels))
+                
+                if design == "Full factorial":
+                    n_cases = int(np.prod([levels for _, _, levels in sweep_ranges.values()])) if sweep_ranges else 0
+                    st.caption(f"{n_cases} cases")
+                else:
+                    n_cases = st.number_input("Number of cases", min_value=2, max_value=100000, value=200, step=10)
+                
+                if st.button("🧮 Run Multi-Parameter Sweep", disabled=not sweep_parameters):
+                    try:
+                        if design == "Full factorial":
+                            cases = factorial_design({name: np.linspace(low, high, levels)
+                                                      for name, (low, high, levels) in sweep_ranges.items()})
+                        else:
+                            cases = latin_hypercube_design({name: (low, high)
+                                                            for name, (low, high, _) in sweep_ranges.items()},
+                                                           int(n_cases))
+                        progress_bar = st.progress(0.0, text="Solving sweep cases...")
+                        sweep_table = cached_sweep(
+                            base_case, cases, max_workers=sensitivity_workers,
+                            progress_callback=lambda done, total: progress_bar.progress(
+                                done / total, text=f"Solved {done} of {total} cases")
+                        )
+                        progress_bar.empty()
+                        st.session_state.nodal_data['sweep'] = {
+                            'design': design,
+                            'parameters': sweep_parameters,
+                            'table': sweep_table
+                        }
+                    except Exception as e:
+                        st.error(f"An error occurred during the sweep: {str(e)}")
+                
+                sweep_results = st.session_state.nodal_data.get('sweep')
+                if sweep_results:
+                    sweep_table = pd.DataFrame(sweep_results['table'])
+                    swept = sweep_results['parameters']
+                    show_cache_status(['Sweep'])
+                    
+                    # Slice and plot the stored table; nothing is recomputed here
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        x_parameter = st.selectbox("X axis", swept, key="sweep_x")
+                    with col2:
+                        color_options = [name for name in swept if name != x_parameter]
+                        color_parameter = st.selectbox("Color by", ["None"] + color_options, key="sweep_color")
+                    
+                    sliced = sweep_table
+                    if sweep_results['design'] == "Full factorial":
+                        for name in swept:
+                            if name in (x_parameter, color_parameter):
+                                continue
+                            levels = np.unique(sweep_table[name])
+                            level = st.select_slider(f"{name} slice", options=levels.tolist(), key=f"sweep_slice_{name}")
+                            sliced = sliced[sliced[name] == level]
+                    
+                    fig, ax = plt.subplots(figsize=(10, 6))
+                    if color_parameter == "None":
+                        ax.plot(sliced[x_parameter], sliced['q_op'], 'o', color='tab:blue')
+                    elif sweep_results['design'] == "Full factorial":
+                        for level, group in sliced.groupby(color_parameter):
+                            group = group.sort_values(x_parameter)
+                            ax.plot(group[x_parameter], group['q_op'], 'o-', label=f"{color_parameter} = {level:g}")
+                        ax.legend(loc='best')
+                    else:
+                        points = ax.scatter(sliced[x_parameter], sliced['q_op'], c=sliced[color_parameter], cmap='viridis')
+                        fig.colorbar(points, ax=ax, label=color_parameter)
+                    ax.set_xlabel(x_parameter)
+                    ax.set_ylabel('Operating Flow Rate (STB/D)')
+                    ax.set_title(f"Operating rate vs {x_parameter} ({len(sliced)} of {len(sweep_table)} cases)")
+                    ax.grid(True, alpha=0.3)
+                    st.pyplot(fig)
+                    
+                    st.dataframe(sweep_table)
+                    st.download_button(
+                        label="Download Sweep Results as CSV",
+                        data=sweep_table.to_csv(index=False).encode('utf-8'),
+                        file_name=f"sweep_{'_'.join(name.replace(' ', '_') for name in swept)}.csv",
+                        mime='text/csv'
+                    )
         else:
             st.warning("Please run the base nodal analysis first before running sensitivity analysis.")
             
+    if active_tab == nodal_tabs[4]:  # Field Run Tab
+        st.subheader("Field Run")
+        st.write("Solve the operating point of every active completion with its assigned fluid.")
+        
+        completions = st.session_state.completions if 'completions' in st.session_state else {}
+        active_names = [name for name, completion in completions.items() if completion['basic_info'].get('active', True)]
+        well_configuration = st.session_state.nodal_data.get('well_configuration', {})
+        has_tubing = ('Tubing' in st.session_state and not st.session_state.Tubing.empty) or \
+            bool(well_configuration.get('manual_tubing_params'))
+        
+        if not active_names:
+            st.info("No active completions. Create completions in the Completions Manager and mark them active.")
+        elif not has_tubing:
+            st.error("No tubing data available. Please configure tubing in Well Design section or enter manual parameters.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                field_outlet_pressure = st.number_input(
+                    "Outlet Pressure (Wellhead Pressure) (psi)",
+                    min_value=0.0,
+                    value=float(st.session_state.nodal_data.get('outlet_pressure', 100.0)),
+                    step=10.0,
+                    key="field_outlet_pressure"
+                )
+                field_min_rate = st.number_input("Minimum Flow Rate (STB/D)", min_value=0.0, value=0.0,
+                                                 step=10.0, key="field_min_rate")
+                field_max_rate = st.number_input("Maximum Flow Rate (STB/D)", min_value=100.0, value=5000.0,
+                                                 step=100.0, key="field_max_rate")
+            with col2:
+                field_points = st.slider("Number of Calculation Points", min_value=20, max_value=200, value=100,
+                                         step=10, key="field_points")
+                field_workers = st.number_input(
+                    "Worker processes",
+                    min_value=1,
+                    max_value=max(1, default_worker_count()),
+                    value=max(1, default_worker_count()),
+                    step=1,
+                    key="field_workers",
+                    help="Completions are solved in parallel on this many processes; 1 runs them in the app process"
+                )
+                st.write(f"**Active completions:** {len(active_names)}")
+            
+            if st.button("🏭 Run All Active Completions", type="primary"):
+                try:
+                    field_session = {
+                        'fluids': st.session_state.fluids,
+                        'completions': completions,
+                        'Tubing': st.session_state.Tubing if 'Tubing' in st.session_state else pd.DataFrame(),
+                        'casing_liners': st.session_state.casing_liners if 'casing_liners' in st.session_state else pd.DataFrame(),
+                        'nodal_data': {'well_configuration': well_configuration},
+                        'well_geometry': well_geometry()
+                    }
+                    progress_bar = st.progress(0.0, text="Solving completions...")
+                    field_table = run_field(
+                        field_session,
+                        {
+                            'outlet_pressure': field_outlet_pressure,
+                            'min_flow_rate': field_min_rate,
+                            'max_flow_rate': field_max_rate,
+                            'num_points': field_points
+                        },
+                        names=active_names,
+                        max_workers=field_workers,
+                        progress_callback=lambda done, total: progress_bar.progress(
+                            done / total, text=f"Solved {done} of {total} completions")
+                    )
+                    progress_bar.empty()
+                    st.session_state.nodal_data['field_results'] = field_table
+                except Exception as e:
+                    st.error(f"An error occurred during the field run: {str(e)}")
+            
+            field_table = st.session_state.nodal_data.get('field_results')
+            if field_table is not None and not isinstance(field_table, pd.DataFrame):
+                field_table = pd.DataFrame(field_table)  # restored from a saved session
+            if field_table is not None and not field_table.empty:
+                solved = field_table['error'].isna() & field_table['operating_point_converged'].fillna(False).astype(bool)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Completions Solved", f"{int(solved.sum())} / {len(field_table)}")
+                with col2:
+                    st.metric("Total Operating Rate", f"{field_table.loc[solved, 'q_op_stbd'].sum():.0f} STB/D")
+                with col3:
+                    st.metric("Failed", int(field_table['error'].notna().sum()))
+                
+                # Sortable by clicking a column header
+                st.dataframe(
+                    field_table.rename(columns={
+                        'completion': 'Completion',
+                        'fluid': 'Fluid',
+                        'ipr_model': 'IPR Model',
+                        'tubing': 'Tubing',
+                        'tubing_id_in': 'Tubing ID (in)',
+                        'tubing_shoe_depth_ft': 'Tubing Shoe (ft)',
+                        'perforation_depth_ft': 'Perforation (ft)',
+                        'outlet_pressure_psi': 'Outlet Pressure (psi)',
+                        'reservoir_temp_f': 'Reservoir Temp (°F)',
+                        'q_op_stbd': 'Operating Rate (STB/D)',
+                        'p_op_psi': 'Bottomhole Pressure (psi)',
+                        'operating_point_converged': 'Operating Point Converged',
+                        'vlp_converged': 'VLP Converged',
+                        'vlp_iterations': 'VLP Iterations',
+                        'warnings': 'Warnings',
+                        'error': 'Error'
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+                st.download_button(
+                    label="Download Field Results as CSV",
+                    data=field_table.to_csv(index=False).encode('utf-8'),
+                    file_name="field_run.csv",
+                    mime='text/csv'
+                )
+if st.session_state.show_nodal_analysis:
+    nodal_analysis_section()
+            
 # At the end of your app, add a section to show session info
 if st.session_state.show_well_design or st.session_state.show_fluid_manager or st.session_state.show_nodal_analysis:
     st.sidebar.divider()
@@ -3860,10 +3870,16 @@ if st.session_state.show_well_design or st.session_state.show_fluid_manager or s
         st.sidebar.json({
             "fluids_count": len(st.session_state.fluids),
             "completions_count": len(st.session_state.completions) if 'completions' in st.session_state else 0,
+            "sections_not_loaded": sorted(st.session_state.get('pending_sections', {})),
             "selected_tool": st.session_state.selected_tool,
             "show_well_design": st.session_state.show_well_design,
             "show_fluid_manager": st.session_state.show_fluid_manager,
             "show_nodal_analysis": st.session_state.show_nodal_analysis
         })
+        st.sidebar.caption("Calculation cache")
+        st.sidebar.json(cache_stats())
+        st.sidebar.json(st.session_state.get('analysis_cache_status', {}))
+        if st.sidebar.button("Clear Calculation Cache"):
+            clear_result_caches()
 
 
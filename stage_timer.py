@@ -0,0 +1,40 @@
+"""
+Lightweight hot-path instrumentation for the nodal analysis workflow.
+A StageTimer accumulates wall time, call counts and solver iterations per named stage
+(IPR, VLP, intersection, ...) and exports them as plain dicts that can be kept with the results.
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Wall time, calls and iterations per stage, in the order stages were first entered"""
+    def __init__(self):
+        self._stages = {}
+
+    def _entry(self, name):
+        return self._stages.setdefault(name, {'wall_s': 0.0, 'calls': 0, 'iterations': 0})
+
+    @contextmanager
+    def stage(self, name, calls=1):
+        """Time the body of a with-block as `calls` call(s) of stage `name`"""
+        entry = self._entry(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry['wall_s'] += time.perf_counter() - start
+            entry['calls'] += calls
+
+    def add(self, name, calls=0, iterations=0):
+        """Add calls and solver iterations to a stage's totals"""
+        entry = self._entry(name)
+        entry['calls'] += int(calls)
+        entry['iterations'] += int(iterations)
+
+    def as_dict(self):
+        """{stage: {'wall_s', 'calls', 'iterations'}} as plain Python values"""
+        return {name: dict(entry) for name, entry in self._stages.items()}
+def total_wall_time(timings):
+    """Summed wall time (s) of a StageTimer.as_dict() result"""
+    return sum(entry['wall_s'] for entry in timings.values())
@@ -0,0 +1,323 @@
+"""
+Deviation survey calculations for the Deviation survey tool and the tools that read its table.
+MD, inclination and azimuth are the measured inputs; TVD, northing, easting, horizontal
+displacement and dogleg severity are derived with the minimum curvature method, vectorized over
+all stations, so MWD surveys of tens of thousands of stations recompute in milliseconds.
+A SurveyModel keeps the cumulative positions between edits and recomputes only from the first
+station whose inputs changed, recording the depth from which its results were invalidated.
+"""
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+MD_COLUMN = "MD (ft)"
+TVD_COLUMN = "TVD (ft)"
+DISPLACEMENT_COLUMN = "Horizontal Displacement (ft)"
+ANGLE_COLUMN = "Angle (°)"
+AZIMUTH_COLUMN = "Azimuth (°)"
+NORTHING_COLUMN = "Northing (ft)"
+EASTING_COLUMN = "Easting (ft)"
+DLS_COLUMN = "Max Dogleg Severity (°/100ft)"
+
+# Editor columns per survey type, in display order
+SURVEY_COLUMNS = {
+    '2D': [MD_COLUMN, TVD_COLUMN, DISPLACEMENT_COLUMN, ANGLE_COLUMN],
+    '3D': [MD_COLUMN, TVD_COLUMN, DISPLACEMENT_COLUMN, ANGLE_COLUMN, AZIMUTH_COLUMN, NORTHING_COLUMN,
+           EASTING_COLUMN, DLS_COLUMN],
+}
+
+# Columns the user enters; every other survey column is derived from them
+INPUT_COLUMNS = (MD_COLUMN, ANGLE_COLUMN, AZIMUTH_COLUMN)
+
+# Derived columns and the minimum_curvature() results they hold
+DERIVED_COLUMNS = {
+    TVD_COLUMN: 'tvd',
+    DISPLACEMENT_COLUMN: 'displacement',
+    NORTHING_COLUMN: 'northing',
+    EASTING_COLUMN: 'easting',
+    DLS_COLUMN: 'dls',
+}
+
+# (md, inclination, azimuth, tvd, northing, easting) of the surface
+SURFACE = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def minimum_curvature(md, inclination, azimuth, tie_in=SURFACE):
+    """
+    Minimum curvature positions of survey stations ordered by MD.
+    md in ft, inclination and azimuth in degrees. tie_in is the station above the first one as
+    (md, inclination, azimuth, tvd, northing, easting), by default the surface. Returns a dict of
+    arrays: 'tvd', 'northing', 'easting', 'displacement' (closure distance) in ft and 'dls' in
+    °/100ft, the dogleg severity of the interval ending at each station.
+    """
+    tie_md, tie_inc, tie_azi, tie_tvd, tie_north, tie_east = tie_in
+    md_all = np.concatenate([[tie_md], np.asarray(md, dtype=float)])
+    inc_all = np.radians(np.concatenate([[tie_inc], np.asarray(inclination, dtype=float)]))
+    azi_all = np.radians(np.concatenate([[tie_azi], np.asarray(azimuth, dtype=float)]))
+
+    step = np.diff(md_all)
+    inc1, inc2 = inc_all[:-1], inc_all[1:]
+    azi1, azi2 = azi_all[:-1], azi_all[1:]
+    cos_dogleg = np.cos(inc2 - inc1) - np.sin(inc1) * np.sin(inc2) * (1 - np.cos(azi2 - azi1))
+    dogleg = np.arccos(np.clip(cos_dogleg, -1.0, 1.0))
+    # Ratio factor 2/β tan(β/2), which tends to 1 for straight intervals
+    small = dogleg < 1e-9
+    ratio = np.where(small, 1.0, 2.0 / np.where(small, 1.0, dogleg) * np.tan(dogleg / 2))
+    half_step = step / 2 * ratio
+
+    tvd = tie_tvd + np.cumsum(half_step * (np.cos(inc1) + np.cos(inc2)))
+    northing = tie_north + np.cumsum(half_step * (np.sin(inc1) * np.cos(azi1) + np.sin(inc2) * np.cos(azi2)))
+    easting = tie_east + np.cumsum(half_step * (np.sin(inc1) * np.sin(azi1) + np.sin(inc2) * np.sin(azi2)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dls = np.where(step > 0, np.degrees(dogleg) * 100.0 / step, 0.0)
+    return {
+        'tvd': tvd,
+        'northing': northing,
+        'easting': easting,
+        'displacement': np.hypot(northing, easting),
+        'dls': dls
+    }
+def _first_difference(old, new):
+    """Index of the first element where two 1-D arrays differ, or the shorter length if one is a prefix"""
+    n = min(len(old), len(new))
+    different = np.flatnonzero(old[:n] != new[:n])
+    return int(different[0]) if len(different) else n
+class SurveyModel:
+    """
+    Survey stations in MD order with their cumulative minimum curvature positions.
+    update() recomputes only from the first station whose MD, inclination or azimuth changed,
+    tying in to the unchanged station above it. Each change bumps `version`; consumers that
+    remember the version they last read get the depth from which results changed with
+    changed_since() and only refresh below it.
+    """
+    # Changes remembered for changed_since(); older versions are treated as fully invalidated
+    HISTORY = 64
+
+    def __init__(self):
+        self.md = np.empty(0)
+        self.inclination = np.empty(0)
+        self.azimuth = np.empty(0)
+        self.positions = {key: np.empty(0) for key in DERIVED_COLUMNS.values()}
+        self.version = 0
+        self.recomputed = 0
+        self._changes = deque(maxlen=self.HISTORY)
+        self._kickoff_index = None
+
+    def __len__(self):
+        return len(self.md)
+
+    def update(self, md, inclination, azimuth):
+        """
+        Bring the model to the given stations (ordered by MD). Returns the index of the first
+        recomputed station, or None when nothing changed.
+        """
+        # Copies, so later edits to the caller's arrays are seen as changes by the next update()
+        md = np.array(md, dtype=float)
+        inclination = np.array(inclination, dtype=float)
+        azimuth = np.array(azimuth, dtype=float)
+        first = min(_first_difference(self.md, md), _first_difference(self.inclination, inclination),
+                    _first_difference(self.azimuth, azimuth))
+        if first == len(md) == len(self.md):
+            self.recomputed = 0
+            return None
+
+        if first > 0:
+            tie_in = (md[first - 1], inclination[first - 1], azimuth[first - 1],
+                      *(self.positions[key][first - 1] for key in ('tvd', 'northing', 'easting')))
+        else:
+            tie_in = SURFACE
+        tail = minimum_curvature(md[first:], inclination[first:], azimuth[first:], tie_in)
+        self.positions = {key: np.concatenate([values[:first], tail[key]]) for key, values in self.positions.items()}
+        self.md, self.inclination, self.azimuth = md, inclination, azimuth
+        self.recomputed = len(md) - first
+
+        # The kickoff stays put if it lies above the first change; otherwise every station above
+        # the change is vertical and only the recomputed range needs searching
+        if self._kickoff_index is None or self._kickoff_index >= first:
+            later = np.flatnonzero(inclination[first:] > 0)
+            self._kickoff_index = first + int(later[0]) if len(later) else None
+
+        self.version += 1
+        self._changes.append((self.version, tie_in[0]))
+        return first
+
+    def sync(self, df, survey_type):
+        """update() from a survey table; see compute_survey for how rows are read"""
+        _, _, md, inclination, azimuth = _survey_inputs(df, survey_type)
+        return self.update(md, inclination, azimuth)
+
+    def changed_since(self, version):
+        """
+        MD below which positions may differ from those at `version`, or None if nothing changed.
+        Positions above the returned depth are unchanged.
+        """
+        if version >= self.version:
+            return None
+        if not self._changes or version < self._changes[0][0] - 1:
+            return 0.0
+        return min(md for changed, md in self._changes if changed > version)
+
+    def kickoff_md(self):
+        """MD of the first station with a non-zero inclination, or None for a vertical well"""
+        return None if self._kickoff_index is None else float(self.md[self._kickoff_index])
+def _survey_inputs(df, survey_type):
+    """Table with the survey type's columns, the MD order of its rows and the ordered input arrays"""
+    result = df.reindex(columns=SURVEY_COLUMNS[survey_type])
+    md = pd.to_numeric(result[MD_COLUMN], errors='coerce').to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(md))
+    order = valid[np.argsort(md[valid], kind='stable')]
+    inclination = pd.to_numeric(result[ANGLE_COLUMN], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    if survey_type == '3D':
+        azimuth = pd.to_numeric(result[AZIMUTH_COLUMN], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    else:
+        azimuth = np.zeros(len(result))
+    return result, order, md[order], inclination[order], azimuth[order]
+def compute_survey(df, survey_type='3D', model=None):
+    """
+    Survey table with the derived columns computed from MD, Angle and Azimuth (0 for 2D surveys).
+    Stations are processed in MD order and keep their row order. Rows without an MD keep empty
+    derived values; missing angles and azimuths count as 0. With a SurveyModel, only the stations
+    from the first changed one onward are recomputed.
+    """
+    result, order, md, inclination, azimuth = _survey_inputs(df, survey_type)
+    if model is None:
+        positions = minimum_curvature(md, inclination, azimuth)
+    else:
+        model.update(md, inclination, azimuth)
+        positions = model.positions
+
+    for column, key in DERIVED_COLUMNS.items():
+        if column not in result.columns:
+            continue
+        values = np.full(len(result), np.nan)
+        values[order] = positions[key]
+        result[column] = values
+    return result
+def _pchip_slopes(x, y):
+    """
+    Monotone cubic (Fritsch-Carlson / PCHIP) node slopes for strictly increasing x: weighted
+    harmonic means of the neighbouring secants, zero at local extrema, one-sided at the ends.
+    """
+    if len(x) < 2:
+        return np.zeros(len(x))
+    h = np.diff(x)
+    delta = np.diff(y) / h
+    slopes = np.empty(len(x))
+    slopes[0], slopes[-1] = delta[0], delta[-1]
+    if len(x) > 2:
+        w1 = 2 * h[1:] + h[:-1]
+        w2 = h[1:] + 2 * h[:-1]
+        same_sign = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            harmonic = (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:])
+        slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+    return slopes
+class _MonotoneCurve:
+    """y(x) through nodes with strictly increasing x, evaluated by binary search and PCHIP"""
+    def __init__(self, x, y, slopes=None, extrapolate='linear'):
+        self.x = x
+        self.y = y
+        self.slopes = _pchip_slopes(x, y) if slopes is None else slopes
+        self.extrapolate = extrapolate
+
+    def updated(self, x, y, start):
+        """
+        Curve through new nodes whose first `start` nodes equal this curve's. A node's slope only
+        depends on its neighbours, so slopes are reused up to start - 2 and recomputed below.
+        """
+        if start < 2 or start > len(self.x):
+            return _MonotoneCurve(x, y, extrapolate=self.extrapolate)
+        tail = _pchip_slopes(x[start - 2:], y[start - 2:])[1:]
+        if len(x) - (start - 1) != len(tail):
+            return _MonotoneCurve(x, y, extrapolate=self.extrapolate)
+        return _MonotoneCurve(x, y, np.concatenate([self.slopes[:start - 1], tail]), self.extrapolate)
+
+    def __call__(self, xq):
+        xq = np.asarray(xq, dtype=float)
+        x, y, slopes = self.x, self.y, self.slopes
+        i = np.clip(np.searchsorted(x, xq, side='right') - 1, 0, len(x) - 2)
+        h = x[i + 1] - x[i]
+        t = (xq - x[i]) / h
+        t2, t3 = t * t, t * t * t
+        values = ((2 * t3 - 3 * t2 + 1) * y[i] + (t3 - 2 * t2 + t) * h * slopes[i] +
+                  (-2 * t3 + 3 * t2) * y[i + 1] + (t3 - t2) * h * slopes[i + 1])
+        below, above = xq < x[0], xq > x[-1]
+        if self.extrapolate == 'linear':
+            values = np.where(below, y[0] + (xq - x[0]) * slopes[0], values)
+            values = np.where(above, y[-1] + (xq - x[-1]) * slopes[-1], values)
+        else:
+            values = np.where(below, y[0], np.where(above, y[-1], values))
+        return values if values.ndim else float(values)
+class DepthIndex:
+    """
+    Depth conversions along the well path: MD→TVD, TVD→MD and MD→inclination, answered by
+    binary search into the stations' sorted cumulative arrays and monotone (PCHIP) interpolation
+    between them, vectorized over arrays of depths. Above the first and below the last station
+    depths extrapolate along the end slope, inclination holds its end value. TVD→MD returns the
+    first MD reaching a TVD (stations that do not go deeper are skipped).
+    A vertical well (no stations) has TVD = MD and zero inclination.
+    """
+    def __init__(self, md, tvd, inclination):
+        md, tvd, inclination = self._nodes(md, tvd, inclination)
+        self._tvd = _MonotoneCurve(md, tvd)
+        self._inclination = _MonotoneCurve(md, inclination, extrapolate='constant')
+        deeper = self._deeper(tvd)
+        self._md = _MonotoneCurve(tvd[deeper], md[deeper])
+        self.version = 0
+
+    @staticmethod
+    def _nodes(md, tvd, inclination):
+        """Stations with the surface prepended and repeated MDs dropped (first one kept)"""
+        md, tvd, inclination = (np.asarray(a, dtype=float) for a in (md, tvd, inclination))
+        if len(md) == 0 or md[0] > 0:
+            md, tvd, inclination = (np.concatenate([[0.0], a]) for a in (md, tvd, inclination))
+        keep = np.concatenate([[True], np.diff(md) > 0])
+        md, tvd, inclination = md[keep], tvd[keep], inclination[keep]
+        if len(md) < 2:
+            # Vertical below the last station
+            md, tvd, inclination = np.append(md, md[-1] + 1.0), np.append(tvd, tvd[-1] + 1.0), np.append(inclination, 0.0)
+        return md, tvd, inclination
+
+    @staticmethod
+    def _deeper(tvd):
+        """Mask of the stations deeper than every station above them"""
+        deepest_above = np.concatenate([[-np.inf], np.maximum.accumulate(tvd)[:-1]])
+        return tvd > deepest_above
+
+    @classmethod
+    def from_model(cls, model):
+        index = cls(model.md, model.positions['tvd'], model.inclination)
+        index.version = model.version
+        return index
+
+    def refresh(self, model):
+        """
+        Bring the index up to date with a SurveyModel, keeping everything above the depth the
+        model invalidated since the index was built. Returns False if nothing changed.
+        """
+        changed_md = model.changed_since(self.version)
+        if changed_md is None:
+            return False
+        md, tvd, inclination = self._nodes(model.md, model.positions['tvd'], model.inclination)
+        start = int(np.searchsorted(md, changed_md, side='right'))
+        self._tvd = self._tvd.updated(md, tvd, start)
+        self._inclination = self._inclination.updated(md, inclination, start)
+        deeper = self._deeper(tvd)
+        inverse_md = md[deeper]
+        self._md = self._md.updated(tvd[deeper], inverse_md, int(np.searchsorted(inverse_md, changed_md, side='right')))
+        self.version = model.version
+        return True
+
+    def tvd(self, md):
+        """TVD (ft) at measured depths (ft)"""
+        return self._tvd(md)
+
+    def md(self, tvd):
+        """Measured depth (ft) where the well first reaches true vertical depths (ft)"""
+        return self._md(tvd)
+
+    def inclination(self, md):
+        """Inclination (°) at measured depths (ft)"""
+        return self._inclination(md)
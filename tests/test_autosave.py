@@ -0,0 +1,110 @@
+"""Incremental autosave journal of autosave.py"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autosave import JOURNAL_NAME, SNAPSHOT_NAME, ProjectJournal, _read_records, project_directory
+
+
+def _state():
+    return {
+        'fluids': [{'name': 'Oil', 'API': 35.0}],
+        'survey_df': pd.DataFrame({'MD (ft)': np.linspace(0.0, 5000.0, 200), 'Angle (°)': np.zeros(200)}),
+        'MD_heat': pd.DataFrame({'MD(ft)': [0.0, 5000.0], 'Ambient Temperature': [60.0, 160.0]}),
+        'Tubing': pd.DataFrame({'Name': ['Tubing'], 'ID(in)': [2.441]}),
+        'nodal_data': {'q_op': 850.0},
+        'show_nodal_analysis': True,
+    }
+def _assert_same_state(recovered, expected):
+    assert set(recovered) == set(expected)
+    for key, value in expected.items():
+        if isinstance(value, pd.DataFrame):
+            pd.testing.assert_frame_equal(recovered[key], value)
+        else:
+            assert recovered[key] == value
+def test_save_writes_only_changed_sections(tmp_path):
+    journal = ProjectJournal(str(tmp_path))
+    state = _state()
+    first = journal.save(state)
+    assert set(first['sections']) == {'fluids', 'survey', 'heat', 'tubulars', 'completions', 'nodal', 'workspace'}
+    assert journal.save(state)['sections'] == []
+
+    state['MD_heat'] = state['MD_heat'].assign(**{'Ambient Temperature': [65.0, 160.0]})
+    state['show_nodal_analysis'] = False
+    status = journal.save(state)
+    assert status['sections'] == ['heat', 'workspace']
+    assert not status['compacted']
+    records, _ = _read_records(os.path.join(tmp_path, JOURNAL_NAME))
+    assert [header['section'] for header, _ in records][-2:] == ['heat', 'workspace']
+    assert [header['seq'] for header, _ in records] == list(range(1, len(records) + 1))
+
+    _assert_same_state(ProjectJournal(str(tmp_path)).recover(), state)
+def test_recover_drops_truncated_last_record(tmp_path):
+    journal = ProjectJournal(str(tmp_path))
+    state = _state()
+    journal.save(state)
+    saved = dict(state)
+    state['nodal_data'] = {'q_op': 910.0}
+    journal.save(state)
+
+    path = os.path.join(tmp_path, JOURNAL_NAME)
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 7)
+
+    recovering = ProjectJournal(str(tmp_path))
+    _assert_same_state(recovering.recover(), saved)
+    records, valid_bytes = _read_records(path)
+    assert os.path.getsize(path) == valid_bytes
+    assert [header['section'] for header, _ in records].count('nodal') == 1
+
+    # Saving after recovery journals the lost section again and keeps the sequence going
+    assert recovering.save(state)['sections'] == ['nodal']
+    records, _ = _read_records(path)
+    assert [header['seq'] for header, _ in records] == list(range(1, len(records) + 1))
+    _assert_same_state(ProjectJournal(str(tmp_path)).recover(), state)
+def test_recover_ignores_corrupt_record(tmp_path):
+    journal = ProjectJournal(str(tmp_path))
+    state = _state()
+    journal.save(state)
+    saved = dict(state)
+    state['fluids'] = [{'name': 'Oil', 'API': 30.0}]
+    journal.save(state)
+
+    path = os.path.join(tmp_path, JOURNAL_NAME)
+    with open(path, 'r+b') as f:
+        f.seek(-3, os.SEEK_END)
+        f.write(b'xyz')
+    _assert_same_state(ProjectJournal(str(tmp_path)).recover(), saved)
+def test_compaction_replaces_journal_with_snapshot(tmp_path):
+    journal = ProjectJournal(str(tmp_path), max_records=10)
+    state = _state()
+    journal.save(state)
+    for q_op in (900.0, 950.0, 1000.0):
+        state['nodal_data'] = {'q_op': q_op}
+        status = journal.save(state)
+    assert status['compacted']
+    assert os.path.getsize(os.path.join(tmp_path, JOURNAL_NAME)) == 0
+    assert os.path.exists(os.path.join(tmp_path, SNAPSHOT_NAME))
+
+    state['Tubing'] = state['Tubing'].assign(**{'ID(in)': [2.992]})
+    assert journal.save(state)['sections'] == ['tubulars']
+    _assert_same_state(ProjectJournal(str(tmp_path)).recover(), state)
+def test_unsupported_value_leaves_journal_intact(tmp_path):
+    journal = ProjectJournal(str(tmp_path))
+    state = _state()
+    journal.save(state)
+    path = os.path.join(tmp_path, JOURNAL_NAME)
+    size = os.path.getsize(path)
+    with pytest.raises(ValueError, match="Cannot save"):
+        journal.save(dict(state, nodal_data={'run_at': pd.Timestamp('2024-01-01')}))
+    assert os.path.getsize(path) == size
+    _assert_same_state(ProjectJournal(str(tmp_path)).recover(), state)
+@pytest.mark.parametrize('name', ['', '  ', '../other', '/etc', 'a/../..'])
+def test_project_directory_stays_inside_root(tmp_path, name):
+    with pytest.raises(ValueError):
+        project_directory(str(tmp_path), name)
+def test_project_directory(tmp_path):
+    assert project_directory(str(tmp_path), ' well-a ') == os.path.join(os.path.realpath(tmp_path), 'well-a')
@@ -0,0 +1,104 @@
+"""CSV and LAS survey and depth-table import of bulk_import.py"""
+import io
+
+import numpy as np
+import pytest
+
+import bulk_import
+from bulk_import import FT_PER_M, import_depth_table, import_survey, read_columns
+from survey import ANGLE_COLUMN, AZIMUTH_COLUMN, MD_COLUMN
+
+
+LAS_DTS = """~Version information
+ VERS.   2.0 : CWLS LAS version 2.0
+ WRAP.   NO  : one line per depth step
+~Well information
+ STRT.M  100.0 :
+ STOP.M  103.0 :
+ NULL.   -999.25 : null value
+~Curve information
+ DEPT.M      : measured depth
+ TEMP.DEGC   : DTS temperature
+~A  DEPTH TEMP
+100.0  20.0
+101.0  -999.25
+102.0  25.0
+103.0  30.0
+"""
+
+
+def _text(content):
+    return io.BytesIO(content.encode('utf-8'))
+def test_csv_with_app_headers():
+    result = import_survey(_text("MD (ft),Angle (°),Azimuth (°)\n0,0,0\n1000,10.5,45\n2000,30,90\n"))
+    assert result['format'] == 'CSV'
+    assert result['conversions'] == []
+    assert list(result['table'].columns) == [MD_COLUMN, ANGLE_COLUMN, AZIMUTH_COLUMN]
+    np.testing.assert_array_equal(result['table'][MD_COLUMN], [0.0, 1000.0, 2000.0])
+    np.testing.assert_array_equal(result['table'][AZIMUTH_COLUMN], [0.0, 45.0, 90.0])
+@pytest.mark.parametrize('content', [
+    "DEPTH;INC;AZI\nm;deg;deg\n0;0;0\n100;5;10\n200;10;20\n",
+    "# exported survey\nDEPT(m)\tINCL\tAZIM\n0\t0\t0\n100\t5\t10\n200\t10\t20\n",
+    "Depth[m]  Inc  Azi\n0  0  0\n100  5  10\n200  10  20\n",
+])
+def test_csv_delimiters_mnemonics_and_metres(content):
+    """Delimiter, column aliases and the depth unit (header or units line) are sniffed"""
+    result = import_survey(_text(content))
+    assert result['conversions'] == ["MD m → ft"]
+    np.testing.assert_allclose(result['table'][MD_COLUMN], np.array([0.0, 100.0, 200.0]) * FT_PER_M)
+    np.testing.assert_array_equal(result['table'][ANGLE_COLUMN], [0.0, 5.0, 10.0])
+def test_2d_survey_ignores_azimuth():
+    result = import_survey(_text("MD,Angle\n0,0\n500,12\n"), survey_type='2D')
+    assert list(result['table'].columns) == [MD_COLUMN, ANGLE_COLUMN]
+def test_las_depth_table_converts_units_and_nulls():
+    """LAS is recognised by its ~ sections; NULL values count as missing; m and °C are converted"""
+    with pytest.raises(ValueError, match="1 missing or non-numeric values"):
+        import_depth_table(_text(LAS_DTS))
+    result = import_depth_table(_text(LAS_DTS), drop_missing=True)
+    assert result['format'] == 'LAS'
+    assert result['dropped'] == 1
+    assert sorted(result['conversions']) == ["MD m → ft", "temperature °C → °F"]
+    table = result['table']
+    assert list(table.columns) == ['MD(ft)', 'Ambient Temperature']
+    np.testing.assert_allclose(table['MD(ft)'], np.array([100.0, 102.0, 103.0]) * FT_PER_M)
+    np.testing.assert_allclose(table['Ambient Temperature'], [68.0, 77.0, 86.0])
+def test_las_file_by_name(tmp_path):
+    path = tmp_path / 'survey.las'
+    path.write_text("# header comment\n~Curve information\n DEPT.FT :\n INC.DEG :\n~A\n0 0\n500 1.5\n900 4\n")
+    result = import_survey(path, survey_type='2D')
+    assert result['format'] == 'LAS'
+    assert result['conversions'] == []
+    np.testing.assert_array_equal(result['table'][MD_COLUMN], [0.0, 500.0, 900.0])
+    np.testing.assert_array_equal(result['table'][ANGLE_COLUMN], [0.0, 1.5, 4.0])
+def test_missing_values_and_chunks(monkeypatch):
+    monkeypatch.setattr(bulk_import, 'CHUNK_ROWS', 4)
+    rows = "\n".join(f"{i * 10},{'' if i == 6 else 1.0}" for i in range(10))
+    progress = []
+    data = read_columns(_text("MD,Angle\n" + rows + "\n"), ['md', 'inclination'], ['md', 'inclination'],
+                        progress.append)
+    assert data['rows'] == 10
+    assert data['chunks'] == 3
+    assert progress == [4, 8, 10]
+    assert np.isnan(data['columns']['inclination'][6])
+    with pytest.raises(ValueError, match=r"Angle \(°\): 1 missing or non-numeric values \(first in row 7\)"):
+        import_survey(_text("MD,Angle\n" + rows + "\n"), survey_type='2D')
+    assert import_survey(_text("MD,Angle\n" + rows + "\n"), survey_type='2D', drop_missing=True)['rows'] == 9
+def test_validation_problems():
+    with pytest.raises(ValueError) as error:
+        import_survey(_text("MD,Angle,Azimuth\n0,0,0\n100,200,10\n100,5,400\n"))
+    message = str(error.value)
+    assert "must increase from row to row: 1 rows do not (first in row 3, 100 after 100)" in message
+    assert "Angle (°): 1 values outside 0 to 180 (first in row 2: 200)" in message
+    assert "Azimuth (°): 1 values outside 0 to 360 (first in row 3: 400)" in message
+@pytest.mark.parametrize('content, message', [
+    ("", "The file is empty"),
+    ("MD,Angle,Azimuth\n", "The file has no data rows"),
+    ("MD,Angle,Azimuth\nft,deg,deg\n", "The file has no data rows"),
+    ("MD,Azimuth\n0,0\n", "No inclination column found"),
+])
+def test_unusable_files(content, message):
+    with pytest.raises(ValueError, match=message):
+        import_survey(_text(content))
+def test_depth_table_needs_a_value_column():
+    with pytest.raises(ValueError, match="No Ambient Temperature or U value column found"):
+        import_depth_table(_text("TVD,Angle\n0,0\n"), depth='TVD')
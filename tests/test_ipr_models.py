@@ -0,0 +1,47 @@
+"""IPR models of ipr_models.py and their analytic inverses"""
+import numpy as np
+import pytest
+
+from ipr_models import CompositeVogel, Fetkovich, Jones, Vogel, WellPI, ipr_from_completion
+
+
+MODELS = {
+    'well_pi': WellPI(3000.0, 2.5),
+    'composite_vogel': CompositeVogel(3000.0, 2.5, 1800.0),
+    'composite_vogel_pb_at_pr': CompositeVogel(3000.0, 2.5, 3000.0),
+    'vogel': Vogel(3000.0, 4000.0),
+    'vogel_linear': Vogel(3000.0, 4000.0, vogel_coefficient=0.0),
+    'vogel_c_1': Vogel(3000.0, 4000.0, vogel_coefficient=1.0),
+    'fetkovich': Fetkovich(3000.0, 4000.0, 0.8),
+    'fetkovich_steep': Fetkovich(3000.0, 4000.0, 2.5),
+    'jones': Jones(3000.0, 0.5, 0.0001),
+    'jones_linear': Jones(3000.0, 0.5, 0.0),
+}
+
+
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_rate_inverts_pwf(name):
+    """rate(pwf(q)) == q over the whole rate range up to the AOF"""
+    model = MODELS[name]
+    q = np.linspace(0.0, model.aof, 501)
+    np.testing.assert_allclose(model.rate(model.pwf(q)), q, rtol=1e-9, atol=1e-6 * model.aof)
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_pwf_inverts_rate(name):
+    model = MODELS[name]
+    pwf = np.linspace(0.0, model.reservoir_pressure, 501)
+    np.testing.assert_allclose(model.pwf(model.rate(pwf)), pwf, rtol=1e-9, atol=1e-6 * model.reservoir_pressure)
+@pytest.mark.parametrize('name', sorted(MODELS))
+def test_end_points(name):
+    model = MODELS[name]
+    assert model.rate(model.reservoir_pressure) == pytest.approx(0.0, abs=1e-9)
+    assert model.rate(0.0) == pytest.approx(model.aof)
+    assert model.pwf(0.0) == pytest.approx(model.reservoir_pressure)
+    assert model.pwf(2 * model.aof) == pytest.approx(0.0, abs=1e-9)
+@pytest.mark.parametrize('exponent', [0.0, -0.5, float('nan')])
+def test_fetkovich_exponent_must_be_positive(exponent):
+    with pytest.raises(ValueError, match="Fetkovich exponent must be positive"):
+        Fetkovich(3000.0, 4000.0, exponent)
+    completion = {'basic_info': {'ipr_model': 'Fetkovitch'},
+                  'reservoir': {'reservoir_pressure': 3000.0, 'fetkovich_exponent': exponent}}
+    with pytest.raises(ValueError, match="Fetkovich exponent must be positive"):
+        ipr_from_completion(completion)
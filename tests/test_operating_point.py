@@ -0,0 +1,74 @@
+"""IPR/VLP operating point search of nodal_analysis.find_operating_point"""
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import FIXTURE_WELLS
+from ipr_models import ipr_from_completion
+from nodal_analysis import calculate_vlp_vectorized, find_intersection_point, find_operating_point
+
+
+class _CountingVLP:
+    """VLP pressure function recording every rate it is evaluated at"""
+    def __init__(self, func):
+        self.func = func
+        self.rates = []
+
+    def __call__(self, q):
+        self.rates.extend(np.asarray(q, dtype=float).tolist())
+        return self.func(np.asarray(q, dtype=float))
+def _linear_ipr(q):
+    return 3000.0 - q
+def test_single_intersection():
+    vlp = _CountingVLP(lambda q: 1000.0 + 0.5 * q)
+    result = find_operating_point(_linear_ipr, vlp, q_max=3000.0, tolerance=0.01)
+    assert result['converged']
+    assert result['q'] == pytest.approx(4000.0 / 3, abs=0.01)
+    assert result['p'] == pytest.approx(1000.0 + 0.5 * result['q'])
+    assert result['vlp_evaluations'] == len(vlp.rates) == len(set(vlp.rates))
+def test_highest_rate_crossing_when_vlp_dips():
+    """A VLP curve that dips at low rates crosses the IPR twice; the stable point is the higher one"""
+    vlp = _CountingVLP(lambda q: 3200.0 - 2.0 * q + 0.001 * q ** 2)
+    result = find_operating_point(_linear_ipr, vlp, q_max=3000.0, tolerance=0.01)
+    # 3000 - q = 3200 - 2 q + 0.001 q² at q = 500 ∓ 100√5: 276.4 (unstable) and 723.6
+    assert result['q'] == pytest.approx(500.0 + 100.0 * np.sqrt(5.0), abs=0.01)
+def test_no_intersection():
+    vlp = _CountingVLP(lambda q: 3500.0 + 0.5 * q)
+    result = find_operating_point(_linear_ipr, vlp, q_max=3000.0)
+    assert np.isnan(result['q']) and np.isnan(result['p'])
+    assert not result['converged']
+    assert result['iterations'] == 0
+def test_scan_range_expands_past_q_max():
+    vlp = _CountingVLP(lambda q: 1000.0 + 0.5 * q)
+    result = find_operating_point(_linear_ipr, vlp, q_max=500.0, tolerance=0.01)
+    assert result['q'] == pytest.approx(4000.0 / 3, abs=0.01)
+    assert max(vlp.rates) <= 2000.0
+def test_reuses_scan_curve():
+    """VLP values passed as vlp_scan are not recomputed, and no rate is evaluated twice"""
+    vlp = _CountingVLP(lambda q: 1000.0 + 0.5 * q)
+    q_scan = np.linspace(0.0, 3000.0, 31)
+    result = find_operating_point(_linear_ipr, vlp, q_scan=q_scan, vlp_scan=1000.0 + 0.5 * q_scan, tolerance=0.01)
+    assert result['q'] == pytest.approx(4000.0 / 3, abs=0.01)
+    assert not set(vlp.rates) & set(q_scan.tolist())
+    assert len(vlp.rates) == len(set(vlp.rates)) == result['vlp_evaluations'] - len(q_scan)
+    assert result['vlp_calls'] == len(vlp.rates)
+@pytest.mark.parametrize('well_name', sorted(FIXTURE_WELLS))
+def test_fixture_wells_match_dense_curves(well_name):
+    well = FIXTURE_WELLS[well_name]
+    ipr = ipr_from_completion(well['completion_data'], well['fluid_data'])
+
+    def vlp_at(q):
+        return calculate_vlp_vectorized(
+            well['tubing_data'], well['casing_data'], well['fluid_data'], well['outlet_pressure'], q,
+            well['reservoir_temp'], well['tubing_shoe_depth'], well['perforation_depth'])
+
+    result = find_operating_point(ipr.pwf, vlp_at, ipr.aof, tolerance=0.1)
+    q_dense = np.linspace(0.0, ipr.aof, 4001)
+    p_ipr, p_vlp = ipr.pwf(q_dense), vlp_at(q_dense)
+    assert result['vlp_evaluations'] < 40
+    if np.all(p_ipr < p_vlp):
+        # The well cannot lift its fluid (high_water_cut): the curves never cross
+        assert np.isnan(result['q']) and not result['converged']
+        return
+    q_curve, _, _ = find_intersection_point(q_dense, p_ipr, q_dense, p_vlp)
+    assert result['converged']
+    assert result['q'] == pytest.approx(q_curve, abs=ipr.aof / 4000 + 0.1)
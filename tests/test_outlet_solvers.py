@@ -0,0 +1,31 @@
+"""Outlet-pressure solvers of nodal_analysis on the benchmark fixture wells"""
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import FIXTURE_WELLS
+from nodal_analysis import calculate_segment_pressure_drop_vectorized
+
+
+def _solve(well, method, inlet_pressure, length, max_iterations):
+    flow_rates = np.linspace(100, well['flow_rates'][-1], 50)
+    return calculate_segment_pressure_drop_vectorized(
+        inlet_pressure, flow_rates, well['tubing_data']['ID(in)'].iloc[0], well['tubing_data']['Roughness(in)'].iloc[0],
+        length, well['fluid_data'], well['reservoir_temp'], 60, method=method, max_iterations=max_iterations,
+        return_info=True
+    )
+@pytest.mark.parametrize('well_name', sorted(FIXTURE_WELLS))
+def test_brent_brackets_high_outlet_pressure(well_name):
+    """A root thousands of psi above the inlet is bracketed within a few doubling steps"""
+    well = FIXTURE_WELLS[well_name]
+    pressure, info = _solve(well, 'brent', 5000.0, 30000.0, max_iterations=12)
+    reference, _ = _solve(well, 'secant', 5000.0, 30000.0, max_iterations=200)
+    assert info['converged'].all()
+    assert info['iterations'].max() <= 12
+    np.testing.assert_allclose(pressure, reference, atol=0.05)
+@pytest.mark.parametrize('method', ['successive', 'secant', 'brent'])
+def test_solvers_agree_on_fixture_wells(method):
+    for well in FIXTURE_WELLS.values():
+        pressure, info = _solve(well, method, well['outlet_pressure'], well['tubing_shoe_depth'], max_iterations=50)
+        reference, _ = _solve(well, 'secant', well['outlet_pressure'], well['tubing_shoe_depth'], max_iterations=200)
+        assert info['converged'].all()
+        np.testing.assert_allclose(pressure, reference, atol=0.05)
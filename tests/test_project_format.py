@@ -0,0 +1,87 @@
+"""Binary .wdp project files of project_format.py"""
+import io
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from project_format import is_project_file, load_project, open_project, project_bytes, save_project
+
+
+def _state():
+    return {
+        'survey_df': pd.DataFrame({
+            'MD (ft)': np.linspace(0.0, 9000.0, 500),
+            'Angle (°)': np.linspace(0.0, 60.0, 500).astype(np.float32),
+            'Station': np.arange(500, dtype=np.int64),
+        }),
+        'Tubing': pd.DataFrame({'Name': ['Upper', 'Lower'], 'ID(in)': [2.992, 2.441], 'Active': [True, False]},
+                               index=[3, 7]),
+        'empty_table': pd.DataFrame(columns=['MD(ft)', 'U value']),
+        'completions': [{
+            'basic_info': {'name': 'Zone A', 'middle_md': 8500.0, 'active': True},
+            'reservoir': {'reservoir_pressure': np.float64(3200.0), 'layers': np.int64(2), 'notes': None},
+            'perforations': [(8450.0, 8550.0), (8600.0, 8650.0)],
+        }],
+        'nodal_data': {'vlp_curve': np.linspace(500.0, 2500.0, 64), 'q_op': 1234.5, 'labels': np.array(['a', 'b'])},
+        'survey_type': '3D',
+        'bottom_depth': 9000.0,
+    }
+def _assert_same_state(loaded, expected):
+    assert set(loaded) == set(expected)
+    for key in ('survey_df', 'Tubing', 'empty_table'):
+        pd.testing.assert_frame_equal(loaded[key], expected[key], check_index_type=False)
+    completion, saved = loaded['completions'][0], expected['completions'][0]
+    assert completion['basic_info'] == saved['basic_info']
+    assert completion['reservoir'] == {'reservoir_pressure': 3200.0, 'layers': 2, 'notes': None}
+    assert completion['perforations'] == [[8450.0, 8550.0], [8600.0, 8650.0]]
+    np.testing.assert_array_equal(loaded['nodal_data']['vlp_curve'], expected['nodal_data']['vlp_curve'])
+    assert loaded['nodal_data']['vlp_curve'].dtype == np.float64
+    assert loaded['nodal_data']['labels'] == ['a', 'b']
+    assert loaded['nodal_data']['q_op'] == 1234.5
+    assert loaded['survey_type'] == '3D'
+    assert loaded['bottom_depth'] == 9000.0
+def test_round_trip(tmp_path):
+    state = _state()
+    path = tmp_path / 'project.wdp'
+    save_project(state, path)
+    assert is_project_file(path)
+    loaded = load_project(path)
+    _assert_same_state(loaded, state)
+    assert loaded['survey_df']['Angle (°)'].dtype == np.float32
+    assert loaded['survey_df']['Station'].dtype == np.int64
+    assert loaded['Tubing']['Active'].dtype == bool
+    assert list(loaded['Tubing'].index) == [3, 7]
+def test_lazy_project_matches_load():
+    state = _state()
+    data = project_bytes(state)
+    project = open_project(io.BytesIO(data))
+    assert set(project.keys()) == set(state)
+    assert 'survey_df' in project and 'missing' not in project
+    pd.testing.assert_frame_equal(project.get('survey_df'), state['survey_df'])
+    pd.testing.assert_frame_equal(project.pop('Tubing'), state['Tubing'], check_index_type=False)
+    assert 'Tubing' not in project
+    assert project.get('Tubing', 'default') == 'default'
+def test_session_json_layout_round_trips():
+    """Plain lists and dicts, as in a session JSON, come back unchanged"""
+    state = {'survey_data_saved': {'MD (ft)': {'0': 0.0, '1': 100.0}}, 'flags': [True, False, None], 'name': 'Well'}
+    assert load_project(io.BytesIO(project_bytes(state))) == state
+@pytest.mark.parametrize('state, where', [
+    ({'created': pd.Timestamp('2024-01-01')}, "state['created']"),
+    ({'completions': [{'basic_info': {'tags': {1, 2}}}]}, "state['completions'][0]['basic_info']['tags']"),
+    ({'survey_df': pd.DataFrame({'Date': [object()]})}, "state['survey_df'] column 'Date'"),
+])
+def test_unsupported_values_are_rejected(tmp_path, state, where):
+    path = tmp_path / 'project.wdp'
+    with pytest.raises(ValueError, match=f"Cannot save {re.escape(where)}: .* not supported"):
+        save_project(state, path)
+    assert not path.exists()
+def test_rejects_other_files():
+    assert not is_project_file(io.BytesIO(b'{"survey_type": "3D"}'))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('manifest.json', '{"format": "other"}')
+    with pytest.raises(ValueError, match="Not a well design project file"):
+        load_project(buffer)
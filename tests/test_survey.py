@@ -0,0 +1,217 @@
+"""Minimum curvature survey calculations, the incremental SurveyModel and the DepthIndex of survey.py"""
+import numpy as np
+import pytest
+
+from survey import DepthIndex, SurveyModel, minimum_curvature
+
+
+def _survey(count=200):
+    """A build-and-turn survey of `count` stations every 50 ft"""
+    md = 50.0 * np.arange(1, count + 1)
+    inclination = np.clip((md - 1000.0) / 40.0, 0.0, 85.0)
+    azimuth = np.where(md > 1000.0, 30.0 + (md - 1000.0) / 100.0, 0.0) % 360
+    return md, inclination, azimuth
+def _assert_matches_full_recompute(model):
+    expected = minimum_curvature(model.md, model.inclination, model.azimuth)
+    for key, values in expected.items():
+        np.testing.assert_allclose(model.positions[key], values, rtol=1e-12, atol=1e-9)
+def _tangent(inclination, azimuth):
+    """Unit direction (north, east, down) of a station"""
+    inc, azi = np.radians(inclination), np.radians(azimuth)
+    return np.array([np.sin(inc) * np.cos(azi), np.sin(inc) * np.sin(azi), np.cos(inc)])
+def test_vertical_well():
+    md = np.array([100.0, 500.0, 1250.0, 4000.0])
+    result = minimum_curvature(md, np.zeros(4), np.zeros(4))
+    np.testing.assert_allclose(result['tvd'], md)
+    for key in ('northing', 'easting', 'displacement', 'dls'):
+        np.testing.assert_allclose(result[key], 0.0, atol=1e-12)
+def test_horizontal_hold_from_tie_in():
+    """A 90° hold due east stays at the tie-in TVD and moves east by the MD drilled"""
+    md = np.arange(2100.0, 3001.0, 100.0)
+    tie_in = (2000.0, 90.0, 90.0, 1500.0, 300.0, 400.0)
+    result = minimum_curvature(md, np.full(len(md), 90.0), np.full(len(md), 90.0), tie_in)
+    np.testing.assert_allclose(result['tvd'], 1500.0, atol=1e-9)
+    np.testing.assert_allclose(result['northing'], 300.0, atol=1e-9)
+    np.testing.assert_allclose(result['easting'], 400.0 + md - 2000.0)
+    np.testing.assert_allclose(result['dls'], 0.0, atol=1e-12)
+def test_quarter_circle_build():
+    """Building from vertical to 90° over 100 ft is a quarter circle of radius 200/π ft"""
+    result = minimum_curvature([100.0], [90.0], [0.0])
+    radius = 200 / np.pi
+    assert result['tvd'][0] == pytest.approx(radius)
+    assert result['northing'][0] == pytest.approx(radius)
+    assert result['easting'][0] == pytest.approx(0.0, abs=1e-12)
+    assert result['dls'][0] == pytest.approx(90.0)
+@pytest.mark.parametrize('inc1, azi1, inc2, azi2', [
+    (30.0, 0.0, 60.0, 90.0),
+    (10.0, 350.0, 45.0, 20.0),
+    (80.0, 200.0, 95.0, 140.0),
+])
+def test_build_and_turn_follows_circular_arc(inc1, azi1, inc2, azi2):
+    """Each interval is the circular arc from one station direction to the next"""
+    step = 150.0
+    tie_in = (1000.0, inc1, azi1, 900.0, -50.0, 75.0)
+    result = minimum_curvature([1000.0 + step], [inc2], [azi2], tie_in)
+
+    t1, t2 = _tangent(inc1, azi1), _tangent(inc2, azi2)
+    dogleg = np.arccos(np.clip(t1 @ t2, -1.0, 1.0))
+    radius = step / dogleg
+    normal = np.cross(t1, t2) / np.linalg.norm(np.cross(t1, t2))
+    offset = radius * (np.sin(dogleg) * t1 + (1 - np.cos(dogleg)) * np.cross(normal, t1))
+
+    np.testing.assert_allclose([result['northing'][0], result['easting'][0], result['tvd'][0]],
+                               np.array([-50.0, 75.0, 900.0]) + offset, atol=1e-9)
+    assert result['dls'][0] == pytest.approx(np.degrees(dogleg) * 100.0 / step)
+def test_stations_chain_like_single_intervals():
+    """Surveying several stations at once matches tying each one in to the previous result"""
+    md = np.array([500.0, 800.0, 1200.0, 1900.0, 2600.0])
+    inclination = np.array([0.0, 12.0, 35.0, 62.0, 88.0])
+    azimuth = np.array([0.0, 40.0, 55.0, 70.0, 110.0])
+    result = minimum_curvature(md, inclination, azimuth)
+    tie_in = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for i in range(len(md)):
+        single = minimum_curvature(md[i:i + 1], inclination[i:i + 1], azimuth[i:i + 1], tie_in)
+        for key in result:
+            assert result[key][i] == pytest.approx(single[key][0], abs=1e-9)
+        tie_in = (md[i], inclination[i], azimuth[i], single['tvd'][0], single['northing'][0], single['easting'][0])
+def test_model_edit_recomputes_from_changed_station():
+    md, inclination, azimuth = _survey()
+    model = SurveyModel()
+    assert model.update(md, inclination, azimuth) == 0
+    assert model.recomputed == len(md)
+
+    inclination = inclination.copy()
+    inclination[120] += 3.0
+    assert model.update(md, inclination, azimuth) == 120
+    assert model.recomputed == len(md) - 120
+    _assert_matches_full_recompute(model)
+    assert model.update(md, inclination, azimuth) is None
+    assert model.recomputed == 0
+def test_model_add_and_delete_stations():
+    md, inclination, azimuth = _survey()
+    model = SurveyModel()
+    model.update(md[:150], inclination[:150], azimuth[:150])
+
+    # Stations appended below the last one only compute the new ones
+    assert model.update(md, inclination, azimuth) == 150
+    assert model.recomputed == 50
+    _assert_matches_full_recompute(model)
+
+    # A station inserted mid-survey shifts everything below it
+    md_inserted = np.insert(md, 80, md[79] + 20.0)
+    inclination_inserted = np.insert(inclination, 80, inclination[79])
+    azimuth_inserted = np.insert(azimuth, 80, azimuth[79])
+    assert model.update(md_inserted, inclination_inserted, azimuth_inserted) == 80
+    _assert_matches_full_recompute(model)
+
+    # Deleting rows recomputes from the first removed one; truncating recomputes nothing
+    keep = np.ones(len(md), dtype=bool)
+    keep[[40, 41, 90]] = False
+    assert model.update(md[keep], inclination[keep], azimuth[keep]) == 40
+    _assert_matches_full_recompute(model)
+    assert model.update(md[keep][:100], inclination[keep][:100], azimuth[keep][:100]) == 100
+    assert model.recomputed == 0
+    _assert_matches_full_recompute(model)
+def test_model_changed_since():
+    md, inclination, azimuth = _survey()
+    model = SurveyModel()
+    model.update(md, inclination, azimuth)
+    version = model.version
+    assert model.changed_since(version) is None
+
+    inclination = inclination.copy()
+    inclination[150] += 1.0
+    model.update(md, inclination, azimuth)
+    assert model.changed_since(version) == md[149]
+    inclination[60] += 1.0
+    model.update(md, inclination, azimuth)
+    assert model.changed_since(version) == md[59]
+    assert model.changed_since(version + 1) == md[59]
+    assert model.changed_since(0) == 0.0
+    assert model.kickoff_md() == md[inclination > 0][0]
+def test_model_changed_since_history_rollover():
+    """Versions older than the remembered changes are reported as changed from the surface"""
+    md, inclination, azimuth = _survey()
+    model = SurveyModel()
+    model.update(md, inclination, azimuth)
+    version = model.version
+    inclination = inclination.copy()
+    for _ in range(SurveyModel.HISTORY):
+        inclination[-1] += 0.01
+        model.update(md, inclination, azimuth)
+    assert model.changed_since(version) == md[-2]
+    inclination[-1] += 0.01
+    model.update(md, inclination, azimuth)
+    assert model.changed_since(version) == 0.0
+    assert model.changed_since(version + 1) == md[-2]
+def _assert_same_index(index, model):
+    fresh = DepthIndex.from_model(model)
+    for curve in ('_tvd', '_inclination', '_md'):
+        for attr in ('x', 'y', 'slopes'):
+            np.testing.assert_allclose(getattr(getattr(index, curve), attr), getattr(getattr(fresh, curve), attr),
+                                       rtol=1e-12, atol=1e-12, err_msg=f'{curve}.{attr}')
+    md_query = np.linspace(-100.0, model.md[-1] + 500.0, 997)
+    np.testing.assert_allclose(index.tvd(md_query), fresh.tvd(md_query), rtol=1e-12)
+    np.testing.assert_allclose(index.inclination(md_query), fresh.inclination(md_query), rtol=1e-12)
+    tvd_query = np.linspace(0.0, model.positions['tvd'].max() + 200.0, 997)
+    np.testing.assert_allclose(index.md(tvd_query), fresh.md(tvd_query), rtol=1e-12)
+@pytest.mark.parametrize('station', [0, 1, 2, 3, 100, 198, 199])
+def test_depth_index_refresh_matches_rebuild_after_edit(station):
+    """Slopes reused above start - 2 and recomputed below give the same index as a rebuild"""
+    md, inclination, azimuth = _survey()
+    inclination = inclination + 0.5
+    model = SurveyModel()
+    model.update(md, inclination, azimuth)
+    index = DepthIndex.from_model(model)
+
+    inclination = inclination.copy()
+    inclination[station] += 2.0
+    model.update(md, inclination, azimuth)
+    assert index.refresh(model)
+    assert not index.refresh(model)
+    _assert_same_index(index, model)
+def test_depth_index_refresh_matches_rebuild_after_adding_and_deleting():
+    md, inclination, azimuth = _survey()
+    model = SurveyModel()
+    model.update(md[:120], inclination[:120], azimuth[:120])
+    index = DepthIndex.from_model(model)
+
+    model.update(md, inclination, azimuth)
+    index.refresh(model)
+    _assert_same_index(index, model)
+
+    keep = np.ones(len(md), dtype=bool)
+    keep[[70, 150]] = False
+    model.update(md[keep], inclination[keep], azimuth[keep])
+    index.refresh(model)
+    _assert_same_index(index, model)
+
+    # Several edits between refreshes are caught up in one go
+    model.update(md[keep][:160], inclination[keep][:160], azimuth[keep][:160])
+    edited = inclination[keep][:160].copy()
+    edited[90] += 1.0
+    model.update(md[keep][:160], edited, azimuth[keep][:160])
+    index.refresh(model)
+    _assert_same_index(index, model)
+def test_depth_index_md_on_path_that_climbs_back_up():
+    """TVD to MD returns the first MD reaching a TVD and skips stations that climb back up"""
+    md = 100.0 * np.arange(1, 41)
+    inclination = np.concatenate([np.zeros(10), np.linspace(10.0, 110.0, 20), np.full(10, 110.0)])
+    positions = minimum_curvature(md, inclination, np.zeros(len(md)))
+    tvd = positions['tvd']
+    assert tvd[-1] < tvd.max()
+    index = DepthIndex(md, tvd, inclination)
+
+    deepest = int(np.argmax(tvd))
+    np.testing.assert_allclose(index.md(tvd[:deepest + 1]), md[:deepest + 1])
+    # Between stations the inverse lands on the same path: TVD at the returned MD is the asked TVD
+    tvd_query = np.linspace(0.0, tvd[deepest], 301)
+    md_found = index.md(tvd_query)
+    assert np.all(np.diff(md_found) > 0)
+    assert np.all(md_found <= md[deepest])
+    np.testing.assert_allclose(index.tvd(md_found), tvd_query, atol=0.5)
+    # TVDs the path passes again while climbing still map to the first, deeper-going crossing
+    climbed_tvd = tvd[-1]
+    first_crossing = index.md(climbed_tvd)
+    assert first_crossing < md[deepest]
+    assert index.tvd(first_crossing) == pytest.approx(climbed_tvd, abs=0.5)